@@ -1,3 +1,5 @@
+import time
+
 import click
 from flask.cli import with_appcontext
 from app import db
@@ -18,15 +20,39 @@ def drop_tables_command():
     click.echo("🗑️ Tabelas removidas com sucesso!")
 
 @click.command('seed-db')
+@click.option('--scale', 'escala', type=click.IntRange(1, 99),
+              help='Gera dados sintéticos para N campi (cerca de 1.000 eventos por campus e ano)')
+@click.option('--years', 'anos', type=click.IntRange(1, 50), default=1, show_default=True,
+              help='Anos letivos gerados com --scale')
+@click.option('--semente', type=int, default=42, show_default=True, help='Semente do gerador (dados reprodutíveis)')
+@click.option('--ano-inicial', type=int, default=2025, show_default=True, help='Primeiro ano gerado')
 @with_appcontext
-def seed_db_command():
-    """Popula o banco com dados iniciais."""
+def seed_db_command(escala, anos, semente, ano_inicial):
+    """Popula o banco com dados iniciais (ou, com --scale, com dados sintéticos para testes de carga)."""
+    if escala is None:
+        try:
+            from app.scripts.seed_data import seed_database
+            seed_database()
+            click.echo("🌱 Dados iniciais inseridos com sucesso!")
+        except Exception as e:
+            click.echo(f"❌ Erro ao inserir dados: {str(e)}")
+        return
+
     try:
-        from app.scripts.seed_data import seed_database
-        seed_database()
-        click.echo("🌱 Dados iniciais inseridos com sucesso!")
+        from app.scripts.dados_sinteticos import gerar_dados_sinteticos
+        click.echo(f"🔄 Gerando dados sintéticos: {escala} campi, {anos} ano(s) a partir de {ano_inicial}, semente {semente}...")
+        inicio = time.perf_counter()
+        total = 0
+        for tabela, linhas, segundos in gerar_dados_sinteticos(escala, anos, semente, ano_inicial):
+            total += linhas
+            click.echo(f"✅ {tabela}: {linhas} linhas em {segundos:.2f} s ({linhas / max(segundos, 1e-6):,.0f} linhas/s)")
+        segundos = time.perf_counter() - inicio
+        click.echo(f"🌱 {total} linhas em {segundos:.2f} s ({total / max(segundos, 1e-6):,.0f} linhas/s)")
+        if db.engine.name == 'postgresql':
+            click.echo("ℹ️ Execute 'flask refresh-reports' para atualizar as visões materializadas.")
     except Exception as e:
-        click.echo(f"❌ Erro ao inserir dados: {str(e)}")
+        db.session.rollback()
+        click.echo(f"❌ Erro ao gerar dados sintéticos: {str(e)}")
 
 @click.command('init-advanced-features')
 @with_appcontext
@@ -34,14 +60,54 @@ def init_advanced_features_command():
     """Inicializa recursos avançados do PostgreSQL (visões, funções, gatilhos, regras)."""
     try:
         from app.scripts.setup import setup_db_features
+        from app.models.views import registro_visoes
         setup_db_features()
+        # As visões recém-criadas passam a ser usadas sem reiniciar o processo
+        registro_visoes.esquecer()
         click.echo("✅ Recursos avançados do PostgreSQL configurados com sucesso!")
     except Exception as e:
         click.echo(f"❌ Erro ao configurar recursos avançados: {str(e)}")
 
+@click.command('recompute-counts')
+@with_appcontext
+def recompute_counts_command():
+    """Reconstrói os contadores de dias por categoria e compara com o cálculo completo."""
+    try:
+        from app.services.contagem import recalcular_todas_contagens
+        divergencias = recalcular_todas_contagens()
+        for d in divergencias:
+            click.echo(f"⚠️ Categoria {d['id_categoria']} ({d['nome']}): armazenado {d['armazenado']}, calculado {d['calculado']}")
+        if divergencias:
+            click.echo(f"🔧 {len(divergencias)} contadores divergentes foram corrigidos.")
+        click.echo("✅ Contadores de dias recalculados com sucesso!")
+    except Exception as e:
+        click.echo(f"❌ Erro ao recalcular contadores: {str(e)}")
+
+@click.command('refresh-reports')
+@click.option('--bloqueante', is_flag=True, help='REFRESH sem CONCURRENTLY (bloqueia leituras, mais rápido)')
+@with_appcontext
+def refresh_reports_command(bloqueante):
+    """Atualiza as visões materializadas dos relatórios (PostgreSQL)."""
+    try:
+        from app.services.relatorios_materializados import atualizar_relatorios
+        tempos = atualizar_relatorios(concorrente=not bloqueante)
+        if tempos is None:
+            click.echo("⏳ Outra atualização dos relatórios já está em andamento.")
+            return
+        if not tempos:
+            click.echo("⚠️ Nenhuma visão materializada encontrada. Execute 'flask init-advanced-features' no PostgreSQL.")
+            return
+        for visao, segundos in tempos:
+            click.echo(f"🔄 {visao}: {segundos * 1000:.0f} ms")
+        click.echo("✅ Visões materializadas atualizadas com sucesso!")
+    except Exception as e:
+        click.echo(f"❌ Erro ao atualizar as visões materializadas: {str(e)}")
+
 def register_commands(app):
     """Registra todos os comandos personalizados no app Flask."""
     app.cli.add_command(create_tables_command)
     app.cli.add_command(drop_tables_command)
     app.cli.add_command(seed_db_command)
-    app.cli.add_command(init_advanced_features_command)
\ No newline at end of file
+    app.cli.add_command(init_advanced_features_command)
+    app.cli.add_command(recompute_counts_command)
+    app.cli.add_command(refresh_reports_command)
\ No newline at end of file
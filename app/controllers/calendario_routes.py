@@ -2,13 +2,17 @@ from flask import Blueprint, render_template, redirect, url_for, flash, request
 from app import db
 from app.models.models import Calendario, TipoCalendario, CategoriaCalendario
 from app.forms import CalendarioForm
+from sqlalchemy.orm import joinedload, selectinload
 from datetime import datetime
 
 calendario_bp = Blueprint('calendario', __name__, url_prefix='/calendarios')
 
 @calendario_bp.route('/')
 def listar():
-    calendarios = Calendario.query.order_by(Calendario.ano.desc(), Calendario.nome).all()
+    calendarios = (Calendario.query
+                   .options(joinedload(Calendario.tipo_calendario))
+                   .order_by(Calendario.ano.desc(), Calendario.nome)
+                   .all())
     return render_template('calendarios/listar.html', calendarios=calendarios)
 
 @calendario_bp.route('/novo', methods=['GET', 'POST'])
@@ -64,7 +68,11 @@ def excluir(id):
 
 @calendario_bp.route('/visualizar/<int:id>')
 def visualizar(id):
-    calendario = Calendario.query.get_or_404(id)
+    calendario = (Calendario.query
+                  .options(joinedload(Calendario.tipo_calendario),
+                           selectinload(Calendario.categorias).joinedload(CategoriaCalendario.periodo))
+                  .filter_by(id_calendario=id)
+                  .first_or_404())
     return render_template('calendarios/visualizar.html', calendario=calendario)
 
 @calendario_bp.route('/alternar-status/<int:id>', methods=['POST'])
@@ -80,7 +88,10 @@ def alternar_status(id):
 
 @calendario_bp.route('/copiar/<int:id>', methods=['GET', 'POST'])
 def copiar(id):
-    calendario_original = Calendario.query.get_or_404(id)
+    calendario_original = (Calendario.query
+                           .options(joinedload(Calendario.tipo_calendario), selectinload(Calendario.categorias))
+                           .filter_by(id_calendario=id)
+                           .first_or_404())
     
     if request.method == 'POST':
         novo_nome = request.form.get('novo_nome')
@@ -1,16 +1,27 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from sqlalchemy import text
+from sqlalchemy.orm import joinedload
 from app import db
 from app.models.models import CategoriaCalendario, Calendario, Periodo, Eventos
 from app.forms import CategoriaForm
+from app.services.cache import invalidar_calendario
+from app.services.paginacao import links_paginacao, paginar, por_pagina
 from datetime import datetime
 
 categoria_bp = Blueprint('categoria', __name__, url_prefix='/categorias')
 
 @categoria_bp.route('/')
 def listar():
-    categorias = CategoriaCalendario.query.all()
-    return render_template('categorias/listar.html', categorias=categorias)
+    query = CategoriaCalendario.query.options(joinedload(CategoriaCalendario.calendario),
+                                              joinedload(CategoriaCalendario.periodo))
+    id_calendario = request.args.get('calendario', type=int)
+    if id_calendario:
+        query = query.filter(CategoriaCalendario.id_calendario == id_calendario)
+    
+    pagina = paginar(query, [CategoriaCalendario.id_categoria], [int],
+                     request.args.get('cursor'), por_pagina(request.args.get('por_pagina')))
+    return render_template('categorias/listar.html', categorias=pagina.itens,
+                           **links_paginacao('categoria.listar', pagina))
 
 @categoria_bp.route('/novo', methods=['GET', 'POST'])
 def novo():
@@ -41,6 +52,7 @@ def novo():
         
         db.session.add(categoria)
         db.session.commit()
+        invalidar_calendario(categoria.id_calendario)
         flash('Categoria criada com sucesso!', 'success')
         return redirect(url_for('categoria.listar'))
         
@@ -64,8 +76,10 @@ def editar(id):
             flash(f'A cor {form.corassociada.data} já está sendo usada em outra categoria deste calendário.', 'danger')
             return render_template('categorias/form.html', form=form, titulo='Editar Categoria')
         
+        calendario_anterior = categoria.id_calendario
         form.populate_obj(categoria)
         db.session.commit()
+        invalidar_calendario(calendario_anterior, categoria.id_calendario)
         flash('Categoria atualizada com sucesso!', 'success')
         return redirect(url_for('categoria.listar'))
         
@@ -76,8 +90,10 @@ def excluir(id):
     categoria = CategoriaCalendario.query.get_or_404(id)
     
     try:
+        id_calendario = categoria.id_calendario
         db.session.delete(categoria)
         db.session.commit()
+        invalidar_calendario(id_calendario)
         flash('Categoria excluída com sucesso!', 'success')
     except Exception:
         db.session.rollback()
@@ -102,6 +118,7 @@ def remover(id):
     # Depois, remover a categoria
     db.session.delete(categoria)
     db.session.commit()
+    invalidar_calendario(id_calendario)
     
     flash(f'Categoria "{categoria.nome}" e seus {len(eventos)} eventos foram removidos com sucesso!', 'success')
     
@@ -143,6 +160,7 @@ def nova_para_calendario(id_calendario):
         
         db.session.add(categoria)
         db.session.commit()
+        invalidar_calendario(categoria.id_calendario)
         flash('Categoria criada com sucesso!', 'success')
         return redirect(url_for('calendario.visualizar', id=id_calendario))
         
@@ -154,7 +172,10 @@ def visualizar(id):
     Visualiza detalhes de uma categoria específica e seus eventos associados.
     Também demonstra o uso da função PostgreSQL contar_eventos_por_categoria.
     """
-    categoria = CategoriaCalendario.query.get_or_404(id)
+    categoria = (CategoriaCalendario.query
+                 .options(joinedload(CategoriaCalendario.calendario), joinedload(CategoriaCalendario.periodo))
+                 .filter_by(id_categoria=id)
+                 .first_or_404())
     
     # Usar a função PostgreSQL para contar eventos
     try:
@@ -2,21 +2,102 @@ from flask import Blueprint, render_template, redirect, url_for, flash, request,
 from app import db
 from app.models.models import Eventos, CategoriaCalendario, Calendario
 from app.forms import EventoForm
-from sqlalchemy import or_, and_
-from datetime import datetime, timedelta
+from app.services.dias import (
+    MASCARA_TODOS_DIAS, contar_dias_validos_lote, dias_semana_domingo_zero, iterar_dias_validos,
+    mascara_dias_semana, trechos_de_dias
+)
+from app.services.ocupacao import intervalo_ocupado, mapas_categoria
+from app.services.conflitos import (
+    ESCOPOS, MENSAGEM_CONFLITO_LOCAL, conflitos_calendario, conflitos_do_evento, eh_conflito_local, normalizar_local,
+    resumo_conflito
+)
+from app.services.paginacao import POR_PAGINA_PADRAO, links_paginacao, paginar, por_pagina
+from app.services.versoes import condicional, etag_calendario, etag_global
+from app.services.cache import em_cache_calendario, invalidar_calendario
+from sqlalchemy import or_, and_, func
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import joinedload, selectinload
+from datetime import date, datetime, timedelta
 
 evento_bp = Blueprint('evento', __name__, url_prefix='/eventos')
 
 @evento_bp.route('/')
 def listar():
-    eventos = Eventos.query.all()
-    return render_template('eventos/listar.html', eventos=eventos)
+    filtros = filtros_listagem()
+    pagina = pagina_eventos(filtros, request.args.get('cursor'), por_pagina(request.args.get('por_pagina')))
+    return render_template('eventos/listar.html',
+                           eventos=pagina.itens,
+                           filtros=filtros,
+                           calendarios=Calendario.query.order_by(Calendario.ano.desc(), Calendario.nome).all(),
+                           categorias=opcoes_categorias(),
+                           **links_paginacao('evento.listar', pagina))
+
+@evento_bp.route('/api')
+def listar_json():
+    """Listagem de eventos em JSON, com os mesmos filtros e cursor da página"""
+    pagina = pagina_eventos(filtros_listagem(), request.args.get('cursor'), por_pagina(request.args.get('por_pagina')))
+    return jsonify({
+        'eventos': [evento_json(evento) for evento in pagina.itens],
+        'proximo_cursor': pagina.proximo_cursor,
+    })
+
+def filtros_listagem():
+    """Filtros da listagem de eventos lidos da query string (valores inválidos são ignorados)"""
+    return {
+        'calendario': request.args.get('calendario', type=int),
+        'categoria': request.args.get('categoria', type=int),
+        'inicio': _data_do_feed(request.args.get('inicio')),
+        'fim': _data_do_feed(request.args.get('fim')),
+        'local': (request.args.get('local') or '').strip() or None,
+    }
+
+def pagina_eventos(filtros, cursor=None, limite=POR_PAGINA_PADRAO):
+    """Uma página de eventos ordenados por (datainicio, id_evento), a partir do cursor"""
+    query = Eventos.query.options(joinedload(Eventos.categoria))
+    
+    if filtros['calendario']:
+        query = query.filter(Eventos.id_categoria.in_(
+            db.session.query(CategoriaCalendario.id_categoria)
+            .filter(CategoriaCalendario.id_calendario == filtros['calendario'])))
+    if filtros['categoria']:
+        query = query.filter(Eventos.id_categoria == filtros['categoria'])
+    # Período: eventos que tocam o intervalo informado
+    if filtros['inicio']:
+        query = query.filter(Eventos.datafim >= filtros['inicio'])
+    if filtros['fim']:
+        query = query.filter(Eventos.datainicio <= filtros['fim'])
+    # Local: mesma normalização do índice ix_eventos_local_normalizado
+    if filtros['local']:
+        query = query.filter(func.lower(func.trim(Eventos.local)) == normalizar_local(filtros['local']))
+    
+    return paginar(query, [Eventos.datainicio, Eventos.id_evento], [date, int], cursor, limite)
+
+def evento_json(evento):
+    return {
+        'id': evento.id_evento,
+        'titulo': evento.titulo,
+        'descricao': evento.descricao,
+        'inicio': evento.datainicio.isoformat(),
+        'fim': evento.datafim.isoformat(),
+        'dia_todo': bool(evento.dia_todo),
+        'local': evento.local,
+        'recorrente': evento.recorrente,
+        'categoria': {
+            'id': evento.categoria.id_categoria,
+            'nome': evento.categoria.nome,
+            'id_calendario': evento.categoria.id_calendario,
+        },
+    }
+
+def opcoes_categorias():
+    """Opções do campo de categoria ("Categoria - Calendário"), com os calendários na mesma consulta"""
+    categorias = CategoriaCalendario.query.options(joinedload(CategoriaCalendario.calendario)).all()
+    return [(c.id_categoria, f"{c.nome} - {c.calendario.nome}") for c in categorias]
 
 @evento_bp.route('/novo', methods=['GET', 'POST'])
 def novo():
     form = EventoForm()
-    form.id_categoria.choices = [(c.id_categoria, f"{c.nome} - {c.calendario.nome}") 
-                                for c in CategoriaCalendario.query.all()]
+    form.id_categoria.choices = opcoes_categorias()
     
     if form.validate_on_submit():
         # Buscar a categoria e o calendário associado
@@ -41,20 +122,33 @@ def novo():
             datainicio=form.datainicio.data,
             datafim=form.datafim.data,
             dia_todo=form.dia_todo.data,
-            local=form.local.data
+            local=form.local.data,
+            recorrenciadias=form.recorrenciadias.data or None,
+            recorrenciaintervalo=form.recorrenciaintervalo.data,
+            recorrenciacontagem=form.recorrenciacontagem.data,
+            recorrenciaexcecoes=form.recorrenciaexcecoes.data or None
         )
+        evento.ajustar_fim_recorrencia()
         
-        # Verificar conflitos de eventos
-        conflitos = verificar_conflitos(evento)
-        if conflitos:
-            flash(f'Atenção! Existem {len(conflitos)} eventos conflitantes no mesmo período.', 'warning')
-        
-        db.session.add(evento)
-        db.session.commit()
+        try:
+            # Verificar conflitos de eventos
+            conflitos = verificar_conflitos(evento)
+            if conflitos:
+                flash(f'Atenção! Existem {len(conflitos)} eventos conflitantes no mesmo período.', 'warning')
+            
+            db.session.add(evento)
+            db.session.commit()
+            invalidar_calendario(calendario.id_calendario)
+        except DBAPIError as e:
+            db.session.rollback()
+            if not eh_conflito_local(e):
+                raise
+            flash(MENSAGEM_CONFLITO_LOCAL, 'danger')
+            return render_template('eventos/form.html', form=form, titulo='Novo Evento')
         
         # Se a categoria tem habilitação de contagem, atualizar o total de dias
         if categoria.habilitacaocontagem:
-            dias_validos = categoria.atualizar_contagem_dias()
+            dias_validos = categoria.dias_validos_registrados()
             if categoria.totaldias and dias_validos > categoria.totaldias:
                 flash(f'Atenção! A categoria agora tem {dias_validos} dias registrados, ultrapassando o limite de {categoria.totaldias} dias.', 'warning')
         
@@ -67,8 +161,7 @@ def novo():
 def editar(id):
     evento = Eventos.query.get_or_404(id)
     form = EventoForm(obj=evento)
-    form.id_categoria.choices = [(c.id_categoria, f"{c.nome} - {c.calendario.nome}") 
-                                for c in CategoriaCalendario.query.all()]
+    form.id_categoria.choices = opcoes_categorias()
     
     if form.validate_on_submit():
         # Buscar a categoria e o calendário associado
@@ -86,31 +179,34 @@ def editar(id):
             flash('As datas do evento devem estar dentro do período da categoria.', 'warning')
             # Não bloqueia, apenas avisa
         
-        # Guardar a categoria antiga se foi alterada
-        categoria_antiga = None
-        if evento.id_categoria != form.id_categoria.data:
-            categoria_antiga = evento.categoria
-        
-        # Atualizar os dados do evento
-        form.populate_obj(evento)
-        
-        # Verificar conflitos de eventos
-        conflitos = verificar_conflitos(evento, evento.id_evento)
-        if conflitos:
-            flash(f'Atenção! Existem {len(conflitos)} eventos conflitantes no mesmo período.', 'warning')
-        
-        db.session.commit()
+        calendario_anterior = evento.categoria.id_calendario
+        try:
+            # Atualizar os dados do evento
+            form.populate_obj(evento)
+            evento.recorrenciadias = evento.recorrenciadias or None
+            evento.recorrenciaexcecoes = evento.recorrenciaexcecoes or None
+            evento.ajustar_fim_recorrencia()
+            
+            # Verificar conflitos de eventos (a consulta já envia a alteração ao banco)
+            conflitos = verificar_conflitos(evento, id)
+            if conflitos:
+                flash(f'Atenção! Existem {len(conflitos)} eventos conflitantes no mesmo período.', 'warning')
+            
+            db.session.commit()
+            invalidar_calendario(calendario_anterior, calendario.id_calendario)
+        except DBAPIError as e:
+            db.session.rollback()
+            if not eh_conflito_local(e):
+                raise
+            flash(MENSAGEM_CONFLITO_LOCAL, 'danger')
+            return render_template('eventos/form.html', form=form, titulo='Editar Evento')
         
         # Se a categoria tem habilitação de contagem, atualizar o total de dias
         if categoria.habilitacaocontagem:
-            dias_validos = categoria.atualizar_contagem_dias()
+            dias_validos = categoria.dias_validos_registrados()
             if categoria.totaldias and dias_validos > categoria.totaldias:
                 flash(f'Atenção! A categoria agora tem {dias_validos} dias registrados, ultrapassando o limite de {categoria.totaldias} dias.', 'warning')
         
-        # Se a categoria foi alterada, atualizar a contagem na categoria antiga também
-        if categoria_antiga and categoria_antiga.habilitacaocontagem:
-            categoria_antiga.atualizar_contagem_dias()
-        
         flash('Evento atualizado com sucesso!', 'success')
         return redirect(url_for('evento.listar'))
         
@@ -119,69 +215,51 @@ def editar(id):
 @evento_bp.route('/excluir/<int:id>', methods=['POST'])
 def excluir(id):
     evento = Eventos.query.get_or_404(id)
+    id_calendario = evento.categoria.id_calendario
     
     db.session.delete(evento)
     db.session.commit()
+    invalidar_calendario(id_calendario)
     flash('Evento excluído com sucesso!', 'success')
     
     return redirect(url_for('evento.listar'))
 
-@evento_bp.route('/calendario/<int:id>')
-def eventos_calendario(id):
-    calendario = Calendario.query.get_or_404(id)
-    categorias = CategoriaCalendario.query.filter_by(id_calendario=id).all()
-    categoria_ids = [c.id_categoria for c in categorias]
-    
-    # Mapeamento de categorias para fácil acesso
-    categorias_dict = {c.id_categoria: c for c in categorias}
-    
-    eventos = Eventos.query.filter(Eventos.id_categoria.in_(categoria_ids)).all()
-    
-    # Formatar eventos para o fullCalendar respeitando dias válidos
+def formatar_eventos(eventos, categorias_dict, inicio=None, fim=None):
+    """
+    Formata eventos para o FullCalendar respeitando dias válidos e recorrência.
+    Com janela [inicio, fim], apenas os dias dentro dela são expandidos.
+    """
     eventos_formatados = []
-    contagem_dias_por_categoria = {}  # Agora vamos usar o ID da categoria como chave
     
     for evento in eventos:
         categoria = categorias_dict.get(evento.id_categoria)
-        dias_semana_validos = []
-        
-        # Verificar se a categoria tem dias da semana válidos definidos
-        if categoria.diassemanasvalidos:
-            dias_semana_validos = [int(d) for d in categoria.diassemanasvalidos]
+        mascara = mascara_dias_semana(categoria.diassemanasvalidos)
         
-        # Se existem restrições de dias da semana
-        if dias_semana_validos:
-            # Criar eventos individuais para cada dia válido
-            data_atual = evento.datainicio
-            
-            # Contador para essa categoria - USANDO ID DA CATEGORIA
-            if categoria.id_categoria not in contagem_dias_por_categoria:
-                contagem_dias_por_categoria[categoria.id_categoria] = 0
-            
-            while data_atual <= evento.datafim:
-                # Verifica se o dia da semana é válido (1=Segunda até 7=Domingo)
-                if data_atual.isoweekday() in dias_semana_validos:
-                    # Adiciona um evento individual para este dia
-                    eventos_formatados.append({
-                        'id': evento.id_evento,
-                        'title': evento.titulo,
-                        'start': data_atual.isoformat(),
-                        'end': (data_atual + timedelta(days=1)).isoformat(),
-                        'allDay': True,
-                        'backgroundColor': categoria.corassociada,
-                        'borderColor': categoria.corassociada,
-                        'textColor': '#ffffff',
-                        'description': evento.descricao or '',
-                        'location': evento.local or '',
-                        'categoria_nome': categoria.nome,
-                        'categoria_id': categoria.id_categoria,  # Adicionado ID da categoria
-                        'evento_original_id': evento.id_evento
-                    })
-                    
-                    # Incrementa a contagem de dias válidos
-                    contagem_dias_por_categoria[categoria.id_categoria] += 1
-                
-                data_atual += timedelta(days=1)
+        # Se existem restrições de dias da semana ou o evento é recorrente
+        if mascara or evento.recorrente:
+            # Criar eventos individuais apenas para os dias válidos (1=Segunda até 7=Domingo)
+            dias = (data_atual
+                    for ocorrencia_inicio, ocorrencia_fim in evento.ocorrencias(inicio, fim)
+                    for data_atual in iterar_dias_validos(max(ocorrencia_inicio, inicio or ocorrencia_inicio),
+                                                          min(ocorrencia_fim, fim or ocorrencia_fim),
+                                                          mascara or MASCARA_TODOS_DIAS))
+            for data_atual in dias:
+                # Adiciona um evento individual para este dia
+                eventos_formatados.append({
+                    'id': evento.id_evento,
+                    'title': evento.titulo,
+                    'start': data_atual.isoformat(),
+                    'end': (data_atual + timedelta(days=1)).isoformat(),
+                    'allDay': True,
+                    'backgroundColor': categoria.corassociada,
+                    'borderColor': categoria.corassociada,
+                    'textColor': '#ffffff',
+                    'description': evento.descricao or '',
+                    'location': evento.local or '',
+                    'categoria_nome': categoria.nome,
+                    'categoria_id': categoria.id_categoria,  # Adicionado ID da categoria
+                    'evento_original_id': evento.id_evento
+                })
         else:
             # Se não há restrição de dias, adiciona o evento normalmente
             eventos_formatados.append({
@@ -198,44 +276,201 @@ def eventos_calendario(id):
                 'categoria_nome': categoria.nome,
                 'categoria_id': categoria.id_categoria  # Adicionado ID da categoria
             })
-            
-            # Para eventos sem restrição de dias, conta todos os dias
-            if categoria.id_categoria not in contagem_dias_por_categoria:
-                contagem_dias_por_categoria[categoria.id_categoria] = 0
-                
-            contagem_dias_por_categoria[categoria.id_categoria] += (evento.datafim - evento.datainicio).days + 1
     
-    # Inicializa contadores para categorias sem eventos - POR ID
-    for categoria in categorias:
-        if categoria.id_categoria not in contagem_dias_por_categoria:
-            contagem_dias_por_categoria[categoria.id_categoria] = 0
+    return eventos_formatados
+
+def formatar_eventos_compacto(eventos, categorias_dict, inicio=None, fim=None):
+    """
+    Formato compacto do feed: o estilo de cada categoria vai uma vez e cada evento vai
+    uma vez com sua regra de dias, em vez de um item completo por dia válido.
+    A página reconstrói as ocorrências no navegador (ver eventos/calendario.html).
+    
+    Cada evento traz 'inicio' e uma das formas:
+    - 'fim' e 'diaTodo': evento contínuo, sem restrição de dias;
+    - 'fim' e 'diasSemana': todos os dias da semana listados entre inicio e fim (0 = Domingo);
+    - 'trechos': [deslocamento, quantidade] de dias consecutivos a partir de inicio (recorrentes).
+    """
+    categorias_usadas = {}
+    eventos_compactos = []
+    
+    for evento in eventos:
+        categoria = categorias_dict.get(evento.id_categoria)
+        mascara = mascara_dias_semana(categoria.diassemanasvalidos)
+        item = {
+            'id': evento.id_evento,
+            'titulo': evento.titulo,
+            'categoria': categoria.id_categoria,
+            'descricao': evento.descricao or '',
+            'local': evento.local or ''
+        }
+        
+        if evento.recorrente:
+            dias = [data_atual
+                    for ocorrencia_inicio, ocorrencia_fim in evento.ocorrencias(inicio, fim)
+                    for data_atual in iterar_dias_validos(ocorrencia_inicio, ocorrencia_fim,
+                                                          mascara or MASCARA_TODOS_DIAS)]
+            if not dias:
+                continue
+            item['inicio'] = dias[0].isoformat()
+            item['trechos'] = trechos_de_dias(dias, dias[0])
+        elif mascara:
+            janela_inicio = max(evento.datainicio, inicio or evento.datainicio)
+            janela_fim = min(evento.datafim, fim or evento.datafim)
+            if not contar_dias_validos_lote([(janela_inicio, janela_fim)], mascara)[0]:
+                continue
+            item['inicio'] = janela_inicio.isoformat()
+            item['fim'] = janela_fim.isoformat()
+            item['diasSemana'] = dias_semana_domingo_zero(mascara)
+        else:
+            item['inicio'] = evento.datainicio.isoformat()
+            item['fim'] = evento.datafim.isoformat()
+            item['diaTodo'] = evento.dia_todo
+        
+        categorias_usadas[categoria.id_categoria] = {'nome': categoria.nome, 'cor': categoria.corassociada}
+        eventos_compactos.append(item)
+    
+    return {'categorias': categorias_usadas, 'eventos': eventos_compactos}
+
+def _data_do_feed(valor):
+    """Lê as datas enviadas pelo FullCalendar ('2025-03-01' ou '2025-03-01T00:00:00-03:00')"""
+    try:
+        return datetime.strptime(valor[:10], '%Y-%m-%d').date() if valor else None
+    except ValueError:
+        return None
+
+@evento_bp.route('/calendario/<int:id>')
+@condicional(etag_calendario)
+def eventos_calendario(id):
+    # A página agrupa as categorias por período: carregados junto com o calendário
+    calendario = (Calendario.query
+                  .options(selectinload(Calendario.categorias).joinedload(CategoriaCalendario.periodo))
+                  .filter_by(id_calendario=id)
+                  .first_or_404())
     
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        return jsonify(eventos_formatados)
+        return jsonify(em_cache_calendario(id, 'eventos', lambda: _eventos_formatados(id)))
+    
+    # A página não leva os eventos (o FullCalendar busca pelo feed, mês a mês);
+    # aqui só se calculam contagens, sem expandir os dias
+    contagens = em_cache_calendario(id, 'contagens', lambda: _contagens_calendario(id))
     
     return render_template('eventos/calendario.html', 
                            calendario=calendario, 
-                           eventos=eventos_formatados,
-                           contagem_dias_por_categoria=contagem_dias_por_categoria)
+                           **contagens)
 
-@evento_bp.route('/relatorio/<int:id>')
-def relatorio_calendario(id):
+def _eventos_e_categorias(id):
+    categorias = CategoriaCalendario.query.filter_by(id_calendario=id).all()
+    categoria_ids = [c.id_categoria for c in categorias]
+    eventos = Eventos.query.filter(Eventos.id_categoria.in_(categoria_ids)).all()
+    return eventos, categorias
+
+def _eventos_formatados(id):
+    """Todos os eventos do calendário no formato do FullCalendar"""
+    eventos, categorias = _eventos_e_categorias(id)
+    return formatar_eventos(eventos, {c.id_categoria: c for c in categorias})
+
+def _contagens_calendario(id):
+    """Entradas e dias válidos por categoria, exibidos nas estatísticas da página do calendário"""
+    eventos, categorias = _eventos_e_categorias(id)
+    
+    # Mapeamento de categorias para fácil acesso
+    categorias_dict = {c.id_categoria: c for c in categorias}
+    
+    intervalos_por_categoria = {}  # Intervalos de cada categoria, para a contagem em lote
+    entradas_por_categoria = {}  # Quantos itens cada categoria tem no calendário
+    
+    for evento in eventos:
+        categoria = categorias_dict.get(evento.id_categoria)
+        mascara = mascara_dias_semana(categoria.diassemanasvalidos)
+        ocorrencias = list(evento.ocorrencias())
+        
+        if mascara or evento.recorrente:
+            entradas = sum(contar_dias_validos_lote(ocorrencias, mascara or MASCARA_TODOS_DIAS))
+        else:
+            entradas = 1
+        if entradas:
+            entradas_por_categoria[categoria.nome] = entradas_por_categoria.get(categoria.nome, 0) + entradas
+        
+        intervalos_por_categoria.setdefault(categoria.id_categoria, []).extend(ocorrencias)
+    
+    # Contagem de dias válidos por categoria - USANDO ID DA CATEGORIA
+    # Categorias sem restrição de dias contam todos os dias dos eventos
+    contagem_dias_por_categoria = {}
+    for categoria in categorias:
+        mascara = mascara_dias_semana(categoria.diassemanasvalidos) or MASCARA_TODOS_DIAS
+        intervalos = intervalos_por_categoria.get(categoria.id_categoria, [])
+        contagem_dias_por_categoria[categoria.id_categoria] = sum(
+            contar_dias_validos_lote(intervalos, mascara))
+    
+    return {
+        'entradas_por_categoria': entradas_por_categoria,
+        'total_entradas': sum(entradas_por_categoria.values()),
+        'contagem_dias_por_categoria': contagem_dias_por_categoria,
+    }
+
+@evento_bp.route('/calendario/<int:id>/feed')
+@condicional(etag_calendario)
+def feed_calendario(id):
+    """
+    Eventos do calendário na janela visível do FullCalendar (?start=&end=, fim exclusivo).
+    Com ?formato=compacto, responde no formato de formatar_eventos_compacto.
+    """
     calendario = Calendario.query.get_or_404(id)
+    
+    inicio = _data_do_feed(request.args.get('start')) or calendario.datainicio
+    fim = _data_do_feed(request.args.get('end'))
+    fim = fim - timedelta(days=1) if fim else calendario.datafim
+    formato = 'compacto' if request.args.get('formato') == 'compacto' else 'completo'
+    
+    return jsonify(em_cache_calendario(id, ('feed', formato, inicio.isoformat(), fim.isoformat()),
+                                       lambda: _feed_calendario(id, inicio, fim, formato)))
+
+def _feed_calendario(id, inicio, fim, formato):
     categorias = CategoriaCalendario.query.filter_by(id_calendario=id).all()
+    categorias_dict = {c.id_categoria: c for c in categorias}
+    
+    # Apenas os eventos que tocam a janela (índice ix_eventos_categoria_periodo)
+    eventos = Eventos.query.filter(
+        Eventos.id_categoria.in_(list(categorias_dict)),
+        Eventos.datainicio <= fim,
+        Eventos.datafim >= inicio
+    ).all()
+    
+    if formato == 'compacto':
+        return formatar_eventos_compacto(eventos, categorias_dict, inicio, fim)
+    return formatar_eventos(eventos, categorias_dict, inicio, fim)
+
+@evento_bp.route('/relatorio/<int:id>')
+@condicional(etag_calendario)
+def relatorio_calendario(id):
+    calendario = (Calendario.query
+                  .options(joinedload(Calendario.tipo_calendario),
+                           selectinload(Calendario.categorias).joinedload(CategoriaCalendario.periodo),
+                           selectinload(Calendario.categorias).joinedload(CategoriaCalendario.contagem))
+                  .filter_by(id_calendario=id)
+                  .first_or_404())
+    categorias = calendario.categorias
+    
+    # Eventos de todas as categorias numa só consulta, separados por categoria
+    eventos_por_categoria = {}
+    eventos = (Eventos.query
+               .filter(Eventos.id_categoria.in_([c.id_categoria for c in categorias]))
+               .order_by(Eventos.datainicio, Eventos.id_evento)
+               .all())
+    for evento in eventos:
+        eventos_por_categoria.setdefault(evento.id_categoria, []).append(evento)
     
     # Preparar dados para o relatório
     dados_categorias = []
     for categoria in categorias:
-        eventos = Eventos.query.filter_by(id_categoria=categoria.id_categoria).order_by(Eventos.datainicio).all()
-        
-        # Atualizar contagem de dias válidos, se necessário
+        # Contagem de dias válidos mantida incrementalmente em ContagemCategoria
         dias_validos = None
         if categoria.habilitacaocontagem:
-            dias_validos = categoria.atualizar_contagem_dias()
+            dias_validos = categoria.dias_validos_registrados()
         
         dados_categorias.append({
             'categoria': categoria,
-            'eventos': eventos,
+            'eventos': eventos_por_categoria.get(categoria.id_categoria, []),
             'dias_validos': dias_validos
         })
     
@@ -243,17 +478,56 @@ def relatorio_calendario(id):
                           calendario=calendario, 
                           dados_categorias=dados_categorias)
 
+def etag_conflitos(id):
+    """No escopo 'local' entram eventos de outros calendários: usa a versão global"""
+    if request.args.get('escopo') == 'local':
+        return etag_global()
+    return etag_calendario(id)
+
+@evento_bp.route('/conflitos/<int:id>')
+@condicional(etag_conflitos)
+def conflitos(id):
+    calendario = Calendario.query.get_or_404(id)
+    escopo = request.args.get('escopo', 'categoria')
+    if escopo not in ESCOPOS:
+        flash('Escopo de conflito inválido.', 'danger')
+        return redirect(url_for('evento.conflitos', id=id))
+    
+    pares = conflitos_calendario(id, escopo)
+    # Só as categorias dos eventos listados (no escopo 'local' podem ser de outros calendários)
+    ids_categorias = {evento.id_categoria for par in pares for evento in par}
+    categorias = {c.id_categoria: c for c in CategoriaCalendario.query.filter(
+        CategoriaCalendario.id_categoria.in_(ids_categorias))}
+    
+    return render_template('eventos/conflitos.html',
+                           calendario=calendario,
+                           escopo=escopo,
+                           escopos=ESCOPOS,
+                           pares=pares,
+                           categorias=categorias)
+
+@evento_bp.route('/conflitos/<int:id>.json')
+@condicional(etag_conflitos)
+def conflitos_json(id):
+    Calendario.query.get_or_404(id)
+    escopo = request.args.get('escopo', 'categoria')
+    if escopo not in ESCOPOS:
+        return jsonify({'erro': f'Escopo inválido. Use: {", ".join(ESCOPOS)}'}), 400
+    
+    pares = conflitos_calendario(id, escopo)
+    return jsonify({
+        'id_calendario': id,
+        'escopo': escopo,
+        'total': len(pares),
+        'conflitos': [resumo_conflito(a, b) for a, b in pares]
+    })
+
 def verificar_conflitos(evento, evento_id=None):
     """Verifica se há conflitos com outros eventos na mesma categoria e período"""
-    query = Eventos.query.filter(
-        Eventos.id_categoria == evento.id_categoria,
-        and_(
-            Eventos.datainicio <= evento.datafim,
-            Eventos.datafim >= evento.datainicio
-        )
-    )
+    # Para eventos novos, o mapa de ocupação da categoria descarta sem consulta
+    # os períodos em que nenhum dia está ocupado
+    if not evento_id and not intervalo_ocupado(mapas_categoria(evento.id_categoria),
+                                               evento.datainicio, evento.datafim):
+        return []
     
-    if evento_id:
-        query = query.filter(Eventos.id_evento != evento_id)
-        
-    return query.all()
\ No newline at end of file
+    return conflitos_do_evento(evento, 'categoria', evento_id)
\ No newline at end of file
@@ -1,7 +1,13 @@
-from flask import Blueprint, render_template, flash
-from app.models.models import Calendario, Eventos
-from sqlalchemy import extract, desc
+from flask import Blueprint, render_template, flash, jsonify, current_app
+from app import db
+from app.models.models import Calendario, CategoriaCalendario, Eventos, TipoCalendario
+from app.services.cache import cache_atual, em_cache_global
+from app.services.perfil_sqlite import perfil_ativo, pragmas_atuais
+from app.services.saude_banco import estatisticas_pool, verificar_banco
+from app.services.sessao import engine_leitura
+from sqlalchemy import extract, desc, func, literal, select, union_all
 from datetime import datetime
+from types import SimpleNamespace
 
 main = Blueprint('main', __name__)
 
@@ -10,47 +16,110 @@ def index():
     # Buscar o ano atual
     ano_atual = datetime.now().year
     
-    # Buscar calendários ativos
-    calendarios_ativos = Calendario.query.filter_by(ativo=True).all()
+    # Os dados do painel vêm do cache compartilhado (dependem de todos os calendários e da data);
+    # qualquer gravação muda a versão global e invalida a entrada
+    painel = em_cache_global('painel', 'index', _dados_painel, ttl=current_app.config.get('CACHE_TTL_PAINEL'))
     
     # Se não houver calendários ativos, exibir uma mensagem
-    if not calendarios_ativos:
+    if not painel['calendarios_ativos']:
         flash('Não há calendários ativos no sistema. Por favor, ative algum calendário.', 'info')
     
-    # Contar eventos por calendário
-    contagem_eventos = {}
-    for calendario in calendarios_ativos:
-        # Contar eventos em todas as categorias do calendário
-        evento_ids = []
-        for categoria in calendario.categorias:
-            for evento in categoria.eventos:
-                evento_ids.append(evento.id_evento)
-        
-        contagem_eventos[calendario.id_calendario] = len(set(evento_ids))
+    return render_template('index.html', ano_atual=ano_atual, **painel)
+
+def _dados_painel():
+    """
+    Dados do painel inicial em duas consultas de custo fixo, já em estruturas
+    simples (sem objetos da sessão) para o cache:
+    - calendários ativos com o total de eventos de cada um (agregado agrupado);
+    - eventos recentes e próximos (UNION ALL de duas buscas limitadas no índice
+      ix_eventos_datainicio_id), com o total geral de eventos em cada linha.
+    """
+    hoje = datetime.now().date()
     
-    # Estatísticas gerais
-    total_eventos = Eventos.query.count()
+    # Calendários ativos e quantos eventos cada um tem
+    calendarios = (db.session.query(
+                       Calendario.id_calendario, Calendario.nome, Calendario.ano,
+                       Calendario.datainicio, Calendario.datafim,
+                       TipoCalendario.nome.label('tipo'),
+                       func.count(Eventos.id_evento).label('eventos'))
+                   .join(TipoCalendario, Calendario.id_tipo == TipoCalendario.id_tipo)
+                   .outerjoin(CategoriaCalendario, CategoriaCalendario.id_calendario == Calendario.id_calendario)
+                   .outerjoin(Eventos, Eventos.id_categoria == CategoriaCalendario.id_categoria)
+                   .filter(Calendario.ativo == True)
+                   .group_by(Calendario.id_calendario, Calendario.nome, Calendario.ano,
+                             Calendario.datainicio, Calendario.datafim, TipoCalendario.nome)
+                   .order_by(Calendario.id_calendario)
+                   .all())
     
-    # Eventos recentes
-    eventos_recentes = (Eventos.query
-                        .order_by(desc(Eventos.datainicio))
-                        .limit(5)
-                        .all())
+    # Eventos recentes (5) e próximos (10) numa só ida ao banco
+    colunas = (Eventos.id_evento, Eventos.titulo, Eventos.datainicio, Eventos.datafim,
+               select(func.count(Eventos.id_evento)).scalar_subquery().label('total'))
+    recentes = (select(literal('recente').label('lista'), *colunas)
+                .order_by(desc(Eventos.datainicio), desc(Eventos.id_evento))
+                .limit(5)
+                .subquery())
+    proximos = (select(literal('proximo').label('lista'), *colunas)
+                .where(Eventos.datainicio >= hoje)
+                .order_by(Eventos.datainicio, Eventos.id_evento)
+                .limit(10)
+                .subquery())
+    linhas = db.session.execute(union_all(select(recentes), select(proximos))).all()
     
-    # Busca eventos próximos (próximos 15 dias)
-    hoje = datetime.now().date()
-    eventos_proximos = Eventos.query.filter(
-        Eventos.datainicio >= hoje
-    ).order_by(Eventos.datainicio).limit(10).all()
+    eventos_recentes = sorted((l for l in linhas if l.lista == 'recente'),
+                              key=lambda l: (l.datainicio, l.id_evento), reverse=True)
+    eventos_proximos = sorted((l for l in linhas if l.lista == 'proximo'),
+                              key=lambda l: (l.datainicio, l.id_evento))
     
-    return render_template('index.html', 
-                          calendarios_ativos=calendarios_ativos,
-                          contagem_eventos=contagem_eventos,
-                          total_eventos=total_eventos,
-                          eventos_recentes=eventos_recentes,
-                          eventos_proximos=eventos_proximos,
-                          ano_atual=ano_atual)
+    return {
+        'calendarios_ativos': [
+            SimpleNamespace(id_calendario=c.id_calendario, nome=c.nome, ano=c.ano,
+                            datainicio=c.datainicio, datafim=c.datafim,
+                            tipo_calendario=SimpleNamespace(nome=c.tipo))
+            for c in calendarios
+        ],
+        'contagem_eventos': {c.id_calendario: c.eventos for c in calendarios},
+        'total_eventos': linhas[0].total if linhas else 0,
+        'eventos_recentes': [_resumo_evento(e) for e in eventos_recentes],
+        'eventos_proximos': [_resumo_evento(e) for e in eventos_proximos],
+    }
+
+def _resumo_evento(evento):
+    return SimpleNamespace(
+        id_evento=evento.id_evento,
+        titulo=evento.titulo,
+        datainicio=evento.datainicio,
+        datafim=evento.datafim
+    )
 
 @main.route('/sobre')
 def sobre():
-    return render_template('sobre.html')
\ No newline at end of file
+    return render_template('sobre.html')
+
+@main.route('/cache/estatisticas')
+def estatisticas_cache():
+    """Contadores de acertos, faltas e descartes do cache das páginas de leitura"""
+    return jsonify(cache_atual().estatisticas())
+
+
+@main.route('/healthz/db')
+def saude_banco():
+    """Conectividade do banco (SELECT 1) e ocupação do pool de conexões; 503 se o banco não responde"""
+    ok, latencia, erro = verificar_banco()
+    dados = {
+        'status': 'ok' if ok else 'erro',
+        'banco': db.engine.name,
+        'latencia_ms': round(latencia, 2),
+        'erro': erro,
+        'pool': estatisticas_pool(),
+        'configuracao': {chave: current_app.config[chave] for chave in (
+            'DB_POOL_SIZE', 'DB_MAX_OVERFLOW', 'DB_POOL_TIMEOUT', 'DB_POOL_RECYCLE',
+            'DB_POOL_PRE_PING', 'DB_STATEMENT_TIMEOUT_MS', 'DB_BUSY_TIMEOUT_MS')},
+    }
+    if ok and perfil_ativo(current_app.config):
+        leitura = engine_leitura()
+        dados['pool_leitura'] = estatisticas_pool(leitura)
+        dados['sqlite'] = {'escrita': pragmas_atuais(db.engine), 'leitura': pragmas_atuais(leitura)}
+    resposta = jsonify(dados)
+    resposta.status_code = 200 if ok else 503
+    resposta.headers['Cache-Control'] = 'no-store'
+    return resposta
@@ -2,13 +2,16 @@ from flask import Blueprint, render_template, redirect, url_for, flash, request
 from app import db
 from app.models.models import Periodo
 from app.forms import PeriodoForm
+from app.services.paginacao import links_paginacao, paginar, por_pagina
 
 periodo_bp = Blueprint('periodo', __name__, url_prefix='/periodos')
 
 @periodo_bp.route('/')
 def listar():
-    periodos = Periodo.query.all()
-    return render_template('periodos/listar.html', periodos=periodos)
+    pagina = paginar(Periodo.query, [Periodo.id_periodo], [int],
+                     request.args.get('cursor'), por_pagina(request.args.get('por_pagina')))
+    return render_template('periodos/listar.html', periodos=pagina.itens,
+                           **links_paginacao('periodo.listar', pagina))
 
 @periodo_bp.route('/novo', methods=['GET', 'POST'])
 def novo():
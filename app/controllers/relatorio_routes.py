@@ -1,52 +1,70 @@
-from flask import Blueprint, render_template, jsonify, flash, redirect, url_for
-from sqlalchemy import text, inspect
+from flask import Blueprint, abort, current_app, request, render_template, jsonify, flash, redirect, url_for
+from sqlalchemy import select, text, inspect
 from app import db
-from app.models.models import Periodo, Calendario, CategoriaCalendario
+from app.models.models import Periodo, Calendario, CategoriaCalendario, Eventos
+from app.models.views import modelos_disponiveis, registro_visoes
+from app.services.versoes import condicional, etag_calendario, etag_global
+from app.services.cache import em_cache_global
+from app.services.paginacao import por_pagina
+from app.services.api_relatorios import (
+    SEM_CHAVE_UNICA, ParametroInvalido, item_json, ler_parametros, pagina_consulta, pagina_lista
+)
+from app.services.exportacao import LINHAS_POR_BLOCO, resposta_exportacao
+from app.services.relatorios import COLUNAS as COLUNAS_RELATORIOS, RELATORIOS, calcular_relatorio
+from app.services.relatorios_materializados import (
+    consulta_materializada, etag_relatorios, linhas_materializadas, snapshot_do_relatorio
+)
 from datetime import date
+from types import SimpleNamespace
 
 # Verificamos se estamos usando PostgreSQL ou SQLite
 def is_postgres():
     """Verifica se o banco de dados é PostgreSQL"""
     return db.engine.name == 'postgresql'
 
-# Definimos um dicionário para armazenar modelos disponíveis
-available_models = {}
-
-# Importações condicionais para os modelos de visão
-try:
-    from app.models.views import (
-        EventosAtivosHoje, ResumoCalendario, EventosFuturosAtivos, 
-        is_sqlite
-    )
-    
-    # Registramos os modelos básicos
-    available_models['eventos_ativos'] = EventosAtivosHoje
-    available_models['resumo_calendario'] = ResumoCalendario
-    available_models['eventos_futuros'] = EventosFuturosAtivos
-    
-    # Importações condicionais para classes que só existem no PostgreSQL
-    if not is_sqlite():
-        from app.models.views import (
-            DiasLetivos, FeriadosDiasLetivos, FeriadosDoAno, DiasLetivosPorPeriodo
-        )
-        
-        # Registramos modelos específicos do PostgreSQL
-        available_models['dias_letivos'] = DiasLetivos
-        available_models['feriados_dias_letivos'] = FeriadosDiasLetivos
-        available_models['feriados_ano'] = FeriadosDoAno
-        available_models['dias_por_periodo'] = DiasLetivosPorPeriodo
-except ImportError as e:
-    print(f"Aviso: Alguns modelos de visão não puderam ser importados: {e}")
+# Modelos das visões que existem no banco atual, resolvidos no primeiro uso
+# (uma consulta ao catálogo por engine, ver app.models.views.RegistroVisoes)
+available_models = modelos_disponiveis
 
 relatorio_bp = Blueprint('relatorio', __name__, url_prefix='/relatorios')
 
 def view_exists(view_name):
     """Verifica se uma visão existe no banco de dados"""
-    try:
-        inspector = inspect(db.engine)
-        return view_name in inspector.get_view_names()
-    except:
+    return view_name in registro_visoes.catalogo()
+
+def relatorio_disponivel(nome):
+    """O relatório pode ser exibido: há uma visão no banco ou ele é calculado em Python"""
+    return nome in available_models or nome in RELATORIOS
+
+def _usar_motor(nome):
+    """Relatórios de app.services.relatorios são calculados em Python, a não ser que
+    RELATORIOS_MOTOR = 'visoes' peça as visões do PostgreSQL (quando elas existem)"""
+    if nome not in RELATORIOS:
         return False
+    return current_app.config.get('RELATORIOS_MOTOR') != 'visoes' or nome not in available_models
+
+def _linhas_visao(nome, snapshot=None):
+    """
+    Linhas de uma visão como objetos simples, guardadas no cache de relatórios.
+    Com um snapshot (visão materializada) as linhas vêm dele, e o momento do
+    refresh entra na chave do cache.
+    """
+    if snapshot:
+        modelo = available_models[nome]
+        colunas = [coluna.key for coluna in inspect(modelo).column_attrs]
+        return em_cache_global('relatorios', (nome, snapshot['atualizadoem']),
+                               lambda: linhas_materializadas(nome, colunas))
+    
+    if _usar_motor(nome):
+        return em_cache_global('relatorios', nome, lambda: calcular_relatorio(nome))
+    
+    modelo = available_models[nome]
+    colunas = [coluna.key for coluna in inspect(modelo).column_attrs]
+    
+    def consultar():
+        return [SimpleNamespace(**{c: getattr(linha, c) for c in colunas}) for linha in modelo.query.all()]
+    
+    return em_cache_global('relatorios', nome, consultar)
 
 @relatorio_bp.route('/')
 def index():
@@ -55,12 +73,12 @@ def index():
     is_postgres_db = is_postgres()
     views_disponiveis = {
         'eventos_ativos': 'eventos_ativos' in available_models,
-        'dias_letivos': 'dias_letivos' in available_models,
+        'dias_letivos': relatorio_disponivel('dias_letivos'),
         'resumo_calendarios': 'resumo_calendario' in available_models,
-        'feriados_dias_letivos': 'feriados_dias_letivos' in available_models,
+        'feriados_dias_letivos': relatorio_disponivel('feriados_dias_letivos'),
         'eventos_futuros': 'eventos_futuros' in available_models,
-        'feriados_ano': 'feriados_ano' in available_models,
-        'dias_por_periodo': 'dias_por_periodo' in available_models
+        'feriados_ano': relatorio_disponivel('feriados_ano'),
+        'dias_por_periodo': relatorio_disponivel('dias_por_periodo')
     }
     
     if not is_postgres_db:
@@ -71,6 +89,7 @@ def index():
                            is_postgres=is_postgres_db)
 
 @relatorio_bp.route('/eventos-ativos')
+@condicional(etag_global)
 def eventos_ativos():
     """Eventos ativos no período atual"""
     if 'eventos_ativos' not in available_models:
@@ -78,27 +97,30 @@ def eventos_ativos():
         return redirect(url_for('relatorio.index'))
         
     try:
-        eventos = available_models['eventos_ativos'].query.all()
+        eventos = _linhas_visao('eventos_ativos')
         return render_template('relatorios/eventos_ativos.html', eventos=eventos)
     except Exception as e:
         flash(f"Erro ao acessar a visão: {str(e)}", "danger")
         return redirect(url_for('relatorio.index'))
 
 @relatorio_bp.route('/dias-letivos')
+@condicional(etag_relatorios)
 def dias_letivos():
     """Relatório de dias letivos"""
-    if 'dias_letivos' not in available_models:
+    if not relatorio_disponivel('dias_letivos'):
         flash("Esta visão não está disponível no SQLite. Para usar este relatório, configure um banco de dados PostgreSQL.", "danger")
         return redirect(url_for('relatorio.index'))
     
     try:
-        dados = available_models['dias_letivos'].query.all()
-        return render_template('relatorios/dias_letivos.html', dados=dados)
+        snapshot = snapshot_do_relatorio('dias_letivos')
+        dados = _linhas_visao('dias_letivos', snapshot)
+        return render_template('relatorios/dias_letivos.html', dados=dados, snapshot=snapshot)
     except Exception as e:
         flash(f"Erro ao acessar a visão: {str(e)}", "danger")
         return redirect(url_for('relatorio.index'))
 
 @relatorio_bp.route('/resumo-calendarios')
+@condicional(etag_relatorios)
 def resumo_calendarios():
     """Resumo de todos os calendários"""
     if 'resumo_calendario' not in available_models:
@@ -106,27 +128,30 @@ def resumo_calendarios():
         return redirect(url_for('relatorio.index'))
     
     try:
-        dados = available_models['resumo_calendario'].query.all()
-        return render_template('relatorios/resumo_calendarios.html', dados=dados)
+        snapshot = snapshot_do_relatorio('resumo_calendario')
+        dados = _linhas_visao('resumo_calendario', snapshot)
+        return render_template('relatorios/resumo_calendarios.html', dados=dados, snapshot=snapshot)
     except Exception as e:
         flash(f"Erro ao acessar a visão: {str(e)}", "danger")
         return redirect(url_for('relatorio.index'))
 
 @relatorio_bp.route('/feriados-dias-letivos')
+@condicional(etag_global)
 def feriados_dias_letivos():
     """Feriados que caem em dias letivos"""
-    if 'feriados_dias_letivos' not in available_models:
+    if not relatorio_disponivel('feriados_dias_letivos'):
         flash("Esta visão não está disponível no SQLite. Para usar este relatório, configure um banco de dados PostgreSQL.", "danger")
         return redirect(url_for('relatorio.index'))
     
     try:
-        dados = available_models['feriados_dias_letivos'].query.all()
+        dados = _linhas_visao('feriados_dias_letivos')
         return render_template('relatorios/feriados_dias_letivos.html', dados=dados)
     except Exception as e:
         flash(f"Erro ao acessar a visão: {str(e)}", "danger")
         return redirect(url_for('relatorio.index'))
 
 @relatorio_bp.route('/eventos-futuros')
+@condicional(etag_global)
 def eventos_futuros():
     """Eventos futuros de calendários ativos"""
     if 'eventos_futuros' not in available_models:
@@ -134,41 +159,45 @@ def eventos_futuros():
         return redirect(url_for('relatorio.index'))
     
     try:
-        eventos = available_models['eventos_futuros'].query.all()
+        eventos = _linhas_visao('eventos_futuros')
         return render_template('relatorios/eventos_futuros.html', eventos=eventos)
     except Exception as e:
         flash(f"Erro ao acessar a visão: {str(e)}", "danger")
         return redirect(url_for('relatorio.index'))
 
 @relatorio_bp.route('/feriados-ano')
+@condicional(etag_global)
 def feriados_ano():
     """Feriados do ano atual"""
-    if 'feriados_ano' not in available_models:
+    if not relatorio_disponivel('feriados_ano'):
         flash("Esta visão não está disponível no SQLite. Para usar este relatório, configure um banco de dados PostgreSQL.", "danger")
         return redirect(url_for('relatorio.index'))
     
     try:
-        feriados = available_models['feriados_ano'].query.all()
+        feriados = _linhas_visao('feriados_ano')
         return render_template('relatorios/feriados_ano.html', feriados=feriados)
     except Exception as e:
         flash(f"Erro ao acessar a visão: {str(e)}", "danger")
         return redirect(url_for('relatorio.index'))
 
 @relatorio_bp.route('/dias-por-periodo')
+@condicional(etag_relatorios)
 def dias_por_periodo():
     """Contagem de dias letivos por período"""
-    if 'dias_por_periodo' not in available_models:
+    if not relatorio_disponivel('dias_por_periodo'):
         flash("Esta visão não está disponível no SQLite. Para usar este relatório, configure um banco de dados PostgreSQL.", "danger")
         return redirect(url_for('relatorio.index'))
     
     try:
-        dados = available_models['dias_por_periodo'].query.all()
-        return render_template('relatorios/dias_por_periodo.html', dados=dados)
+        snapshot = snapshot_do_relatorio('dias_por_periodo')
+        dados = _linhas_visao('dias_por_periodo', snapshot)
+        return render_template('relatorios/dias_por_periodo.html', dados=dados, snapshot=snapshot)
     except Exception as e:
         flash(f"Erro ao acessar a visão: {str(e)}", "danger")
         return redirect(url_for('relatorio.index'))
 
 @relatorio_bp.route('/utilizacao-funcao/<int:id_periodo>')
+@condicional(etag_global)
 def utilizacao_funcao(id_periodo):
     """Exemplo de utilização direta de uma função PostgreSQL"""
     # Verificar se estamos usando PostgreSQL
@@ -197,6 +226,7 @@ def utilizacao_funcao(id_periodo):
         })
 
 @relatorio_bp.route('/total-eventos/<int:id_categoria>')
+@condicional(etag_global)
 def total_eventos(id_categoria):
     """Contagem de eventos usando função PostgreSQL"""
     # Verificar se estamos usando PostgreSQL
@@ -230,6 +260,7 @@ def total_eventos(id_categoria):
         })
 
 @relatorio_bp.route('/status-calendario/<int:id_calendario>')
+@condicional(etag_calendario)
 def status_calendario(id_calendario):
     """Verifica se um calendário está ativo"""
     # Verificar se estamos usando PostgreSQL
@@ -263,23 +294,91 @@ def status_calendario(id_calendario):
             "esta_ativo": None
         })
 
+def _consulta_eventos_ativos_alternativo():
+    """Eventos futuros das categorias cujo período está em andamento, em calendários ativos"""
+    hoje = date.today()
+    return (select(Eventos.id_evento, Eventos.titulo, Eventos.datainicio, Eventos.datafim,
+                   Eventos.local, CategoriaCalendario.nome.label('categoria'))
+            .join(CategoriaCalendario, Eventos.id_categoria == CategoriaCalendario.id_categoria)
+            .join(Calendario, CategoriaCalendario.id_calendario == Calendario.id_calendario)
+            .join(Periodo, CategoriaCalendario.id_periodo == Periodo.id_periodo)
+            .where(Calendario.ativo == True)
+            .where(Periodo.datainicial <= hoje, Periodo.datafinal >= hoje)
+            .where(Eventos.datainicio >= hoje)
+            .order_by(Eventos.datainicio, Eventos.id_evento))
+
 # Rota alternativa para SQLite que implementa consulta de eventos ativos diretamente
 @relatorio_bp.route('/eventos-ativos-alternativo')
+@condicional(etag_global)
 def eventos_ativos_alternativo():
     """Implementação alternativa de eventos ativos para SQLite"""
-    from datetime import date
-    from app.models.models import Eventos
+    def consultar():
+        return [SimpleNamespace(id_evento=e.id_evento, titulo=e.titulo, datainicio=e.datainicio,
+                                datafim=e.datafim, local=e.local,
+                                categoria=SimpleNamespace(nome=e.categoria))
+                for e in db.session.execute(_consulta_eventos_ativos_alternativo())]
+    
+    eventos = em_cache_global('relatorios', 'eventos_ativos_alternativo', consultar)
+    
+    return render_template('relatorios/eventos_ativos_alternativo.html', eventos=eventos)
+
+def _fonte_exportacao(nome):
+    """
+    Colunas e linhas de um relatório para exportação. Consultas ao banco são lidas
+    em lotes (yield_per; cursor do lado do servidor no PostgreSQL); relatórios
+    calculados em Python já chegam agregados (uma linha por categoria ou período).
+    """
+    opcoes = {'yield_per': LINHAS_POR_BLOCO}
+    if nome == 'eventos_ativos_alternativo':
+        consulta = _consulta_eventos_ativos_alternativo()
+        return consulta.selected_columns.keys(), db.session.execute(consulta, execution_options=opcoes)
+    
+    snapshot = snapshot_do_relatorio(nome)
+    if _usar_motor(nome) and not snapshot:
+        return COLUNAS_RELATORIOS[nome], calcular_relatorio(nome)
     
-    # Consulta equivalente usando SQLAlchemy
-    eventos = (db.session.query(Eventos)
-               .join(CategoriaCalendario, Eventos.id_categoria == CategoriaCalendario.id_categoria)
-               .join(Calendario, CategoriaCalendario.id_calendario == Calendario.id_calendario)
-               .join(Periodo, CategoriaCalendario.id_periodo == Periodo.id_periodo)
-               .filter(Calendario.ativo == True)
-               .filter(date.today() >= Periodo.datainicial)
-               .filter(date.today() <= Periodo.datafinal)
-               .filter(Eventos.datainicio >= date.today())
-               .order_by(Eventos.datainicio)
-               .all())
+    modelo = available_models[nome]
+    colunas = [coluna.key for coluna in inspect(modelo).column_attrs]
+    consulta = consulta_materializada(nome, colunas) if snapshot else select(*[getattr(modelo, c) for c in colunas])
+    return colunas, db.session.execute(consulta, execution_options=opcoes)
+
+@relatorio_bp.route('/api/<nome>')
+@condicional(etag_relatorios)
+def api(nome):
+    """Linhas de um relatório em JSON, com filtros, ordenação, campos e cursor (ex.: /relatorios/api/eventos-futuros)"""
+    nome = nome.replace('-', '_')
+    if not relatorio_disponivel(nome):
+        return jsonify({'erro': f"Relatório '{nome}' não disponível"}), 404
+    
+    snapshot = snapshot_do_relatorio(nome)
+    em_memoria = bool(snapshot) or _usar_motor(nome) or nome in SEM_CHAVE_UNICA
+    colunas = (COLUNAS_RELATORIOS[nome] if _usar_motor(nome) and not snapshot
+               else [coluna.key for coluna in inspect(available_models[nome]).column_attrs])
+    
+    try:
+        campos, filtros, chave, descendente = ler_parametros(nome, colunas, request.args)
+        argumentos = (filtros, chave, descendente, request.args.get('cursor'), por_pagina(request.args.get('por_pagina')))
+        if em_memoria:
+            itens, proximo_cursor = pagina_lista(_linhas_visao(nome, snapshot), *argumentos)
+        else:
+            itens, proximo_cursor = pagina_consulta(available_models[nome], *argumentos)
+    except ParametroInvalido as e:
+        return jsonify({'erro': str(e)}), 400
+    
+    return jsonify({
+        'relatorio': nome,
+        'campos': campos,
+        'itens': [item_json(linha, campos) for linha in itens],
+        'proximo_cursor': proximo_cursor,
+    })
+
+@relatorio_bp.route('/<nome>.<any(csv, ndjson):formato>')
+@condicional(etag_relatorios)
+def exportar(nome, formato):
+    """Exporta um relatório em CSV ou NDJSON (ex.: /relatorios/dias-letivos.csv)"""
+    nome = nome.replace('-', '_')
+    if not (relatorio_disponivel(nome) or nome == 'eventos_ativos_alternativo'):
+        abort(404)
     
-    return render_template('relatorios/eventos_ativos_alternativo.html', eventos=eventos)
\ No newline at end of file
+    colunas, linhas = _fonte_exportacao(nome)
+    return resposta_exportacao(nome, formato, colunas, linhas)
@@ -2,12 +2,14 @@ from flask import Blueprint, render_template, redirect, url_for, flash, request
 from app import db
 from app.models.models import TipoCalendario
 from app.forms import TipoCalendarioForm
+from sqlalchemy.orm import selectinload
 
 tipo_calendario_bp = Blueprint('tipo_calendario', __name__, url_prefix='/tipos')
 
 @tipo_calendario_bp.route('/')
 def listar():
-    tipos = TipoCalendario.query.all()
+    # A listagem mostra quantos calendários cada tipo tem
+    tipos = TipoCalendario.query.options(selectinload(TipoCalendario.calendarios)).all()
     return render_template('tipos/listar.html', tipos=tipos)
 
 @tipo_calendario_bp.route('/novo', methods=['GET', 'POST'])
@@ -1,6 +1,8 @@
 from flask_wtf import FlaskForm
 from wtforms import StringField, DateField, IntegerField, BooleanField, SelectField, TextAreaField, SubmitField
-from wtforms.validators import DataRequired, Length, NumberRange, Optional
+from wtforms.validators import DataRequired, Length, NumberRange, Optional, Regexp, ValidationError
+
+from app.services.recorrencia import datas_excecao
 
 class PeriodoForm(FlaskForm):
     descricao = StringField('Descrição', validators=[DataRequired(), Length(max=30)])
@@ -40,4 +42,15 @@ class EventoForm(FlaskForm):
     datafim = DateField('Data Final', format='%Y-%m-%d', validators=[DataRequired()])
     dia_todo = BooleanField('Dia Todo', default=False)
     local = StringField('Local', validators=[Length(max=100)])
-    submit = SubmitField('Salvar')
\ No newline at end of file
+    recorrenciadias = StringField('Repetir nos Dias da Semana', validators=[
+        Optional(), Length(max=7), Regexp(r'^[1-7]+$', message='Use apenas os dígitos de 1 (Segunda) a 7 (Domingo).')])
+    recorrenciaintervalo = IntegerField('Repetir a Cada (semanas)', validators=[Optional(), NumberRange(min=1)])
+    recorrenciacontagem = IntegerField('Número de Ocorrências', validators=[Optional(), NumberRange(min=1)])
+    recorrenciaexcecoes = StringField('Datas Sem Ocorrência', validators=[Optional()])
+    submit = SubmitField('Salvar')
+    
+    def validate_recorrenciaexcecoes(self, field):
+        try:
+            datas_excecao(field.data)
+        except ValueError:
+            raise ValidationError('Informe as datas no formato AAAA-MM-DD, separadas por vírgula.')
\ No newline at end of file
@@ -1,6 +1,8 @@
 from datetime import datetime, timedelta
 import calendar
 from app import db
+from app.services.dias import contar_dias_validos, mascara_dias_semana
+from app.services.recorrencia import eh_recorrente, expandir_ocorrencias, ultima_ocorrencia
 
 class Periodo(db.Model):
     __tablename__ = 'periodo'
@@ -31,6 +33,10 @@ class TipoCalendario(db.Model):
 
 class Calendario(db.Model):
     __tablename__ = 'calendario'
+    __table_args__ = (
+        # Calendários ativos (main.index, visões) e ordenação por ano (vw_resumo_calendario)
+        db.Index('ix_calendario_ativo_ano', 'ativo', 'ano'),
+    )
     
     id_calendario = db.Column(db.Integer, primary_key=True)
     id_tipo = db.Column(db.Integer, db.ForeignKey('tipocalendario.id_tipo'), nullable=False)
@@ -48,6 +54,11 @@ class Calendario(db.Model):
 
 class CategoriaCalendario(db.Model):
     __tablename__ = 'categoriacalendario'
+    __table_args__ = (
+        # Categorias de um calendário / de um período, já com o id para as junções com eventos
+        db.Index('ix_categoriacalendario_calendario', 'id_calendario', 'id_categoria'),
+        db.Index('ix_categoriacalendario_periodo', 'id_periodo', 'id_categoria'),
+    )
     
     id_categoria = db.Column(db.Integer, primary_key=True)
     id_calendario = db.Column(db.Integer, db.ForeignKey('calendario.id_calendario'), nullable=False)
@@ -60,46 +71,34 @@ class CategoriaCalendario(db.Model):
     
     # Relacionamentos
     eventos = db.relationship('Eventos', backref='categoria', lazy=True)
+    contagem = db.relationship('ContagemCategoria', uselist=False, lazy=True, cascade='all, delete-orphan')
     
     def __repr__(self):
         return f'<CategoriaCalendario {self.nome}>'
     
     def calcular_dias_validos(self, inicio, fim):
         """Calcula os dias válidos entre as datas, considerando apenas os dias da semana permitidos"""
-        dias_validos = 0
-        dias_semana_permitidos = [int(d) for d in self.diassemanasvalidos] if self.diassemanasvalidos else []
-        
-        # Ajuste para formato de dia da semana do Python (0=Segunda, 6=Domingo)
-        dias_ajustados = [(d % 7) for d in dias_semana_permitidos]
-        
-        data_atual = inicio
-        while data_atual <= fim:
-            # Na semana do Python, 0 é segunda-feira e 6 é domingo
-            dia_semana = data_atual.weekday()
-            if dia_semana in dias_ajustados:
-                dias_validos += 1
-            data_atual += timedelta(days=1)
-            
-        return dias_validos
+        return contar_dias_validos(inicio, fim, mascara_dias_semana(self.diassemanasvalidos))
     
     def atualizar_contagem_dias(self):
         """Atualiza a contagem total de dias com base nos eventos associados"""
         if not self.habilitacaocontagem:
             return 0
             
-        total_dias = 0
-        dias_contados = set()  # Para evitar contar o mesmo dia duas vezes
-        
-        for evento in self.eventos:
-            data_atual = evento.datainicio
-            while data_atual <= evento.datafim:
-                # Verificar se o dia da semana é válido
-                if self.diassemanasvalidos and str(data_atual.isoweekday()) in self.diassemanasvalidos:
-                    dias_contados.add(data_atual.strftime('%Y-%m-%d'))
-                data_atual += timedelta(days=1)
-                
-        total_dias = len(dias_contados)
+        # popcount(ocupação & máscara dos dias da semana), somado ano a ano
+        from app.services.ocupacao import contar_dias_mapas, mapas_categoria
+        total_dias = contar_dias_mapas(mapas_categoria(self.id_categoria), mascara_dias_semana(self.diassemanasvalidos))
         return total_dias
+    
+    def dias_validos_registrados(self):
+        """Retorna a contagem de dias válidos mantida em ContagemCategoria, sem percorrer os eventos"""
+        if not self.habilitacaocontagem:
+            return 0
+        
+        # Categorias ainda sem contador (ex.: dados anteriores à tabela) usam o cálculo completo
+        if self.contagem is None:
+            return self.atualizar_contagem_dias()
+        return self.contagem.diasvalidos
 
 class Eventos(db.Model):
     __tablename__ = 'eventos'
@@ -113,5 +112,69 @@ class Eventos(db.Model):
     dia_todo = db.Column(db.Boolean, default=False)
     local = db.Column(db.String(100))
     
+    # Regra de recorrência (ver app.services.recorrencia); datainicio/datafim delimitam a série
+    recorrenciadias = db.Column(db.String(7))
+    recorrenciaintervalo = db.Column(db.Integer)
+    recorrenciacontagem = db.Column(db.Integer)
+    recorrenciaexcecoes = db.Column(db.Text)
+    
+    __table_args__ = (
+        # Eventos de uma categoria por período (feeds, relatórios, conflitos, contadores)
+        db.Index('ix_eventos_categoria_periodo', 'id_categoria', 'datainicio', 'datafim',
+                 postgresql_include=['id_evento']),
+        # Eventos recentes/próximos (main.index), visões filtradas por data e a
+        # paginação por chave (datainicio, id_evento) da listagem de eventos
+        db.Index('ix_eventos_datainicio_id', 'datainicio', 'id_evento'),
+        # Conflitos no escopo 'local' (app.services.conflitos.normalizar_local)
+        db.Index('ix_eventos_local_normalizado', db.func.lower(db.func.trim(local))),
+    )
+    
+    def __repr__(self):
+        return f'<Evento {self.titulo}>'
+    
+    @property
+    def recorrente(self):
+        return eh_recorrente(self)
+    
+    def ocorrencias(self, inicio=None, fim=None):
+        """Gera as ocorrências (inicio, fim) do evento dentro da janela, sem materializar a série"""
+        return expandir_ocorrencias(self, inicio, fim)
+    
+    def ajustar_fim_recorrencia(self):
+        """Com número de ocorrências definido, encerra a série na data da última ocorrência"""
+        if self.recorrente and self.recorrenciacontagem:
+            ultima = ultima_ocorrencia(self)
+            if ultima:
+                self.datafim = ultima
+
+class VersaoCalendario(db.Model):
+    __tablename__ = 'versaocalendario'
+    
+    id_calendario = db.Column(db.Integer, db.ForeignKey('calendario.id_calendario', ondelete='CASCADE'), primary_key=True)
+    versao = db.Column(db.Integer, nullable=False, default=1)
+    atualizadoem = db.Column(db.DateTime, default=datetime.now)
+    
+    def __repr__(self):
+        return f'<VersaoCalendario {self.id_calendario}: v{self.versao}>'
+
+class ContagemCategoria(db.Model):
+    __tablename__ = 'contagemcategoria'
+    
+    id_categoria = db.Column(db.Integer, db.ForeignKey('categoriacalendario.id_categoria', ondelete='CASCADE'), primary_key=True)
+    diasvalidos = db.Column(db.Integer, nullable=False, default=0)
+    totaleventos = db.Column(db.Integer, nullable=False, default=0)
+    atualizadoem = db.Column(db.DateTime, default=datetime.now)
+    
+    def __repr__(self):
+        return f'<ContagemCategoria {self.id_categoria}: {self.diasvalidos} dias>'
+
+class OcupacaoCategoria(db.Model):
+    __tablename__ = 'ocupacaocategoria'
+    
+    id_categoria = db.Column(db.Integer, db.ForeignKey('categoriacalendario.id_categoria', ondelete='CASCADE'), primary_key=True)
+    ano = db.Column(db.Integer, primary_key=True)
+    mapa = db.Column(db.LargeBinary, nullable=False)  # 366 bits: bit i = i-ésimo dia do ano
+    diasocupados = db.Column(db.Integer, nullable=False, default=0)
+    
     def __repr__(self):
-        return f'<Evento {self.titulo}>'
\ No newline at end of file
+        return f'<OcupacaoCategoria {self.id_categoria}/{self.ano}: {self.diasocupados} dias>'
\ No newline at end of file
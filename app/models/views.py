@@ -1,17 +1,35 @@
+"""
+Modelos das visões de relatório (criadas por 'flask init-advanced-features').
+
+As classes são definidas sempre, sem consultar o banco na importação; quais delas
+podem ser usadas depende das visões que existem no banco da aplicação, o que é
+resolvido no primeiro uso por registro_visoes (uma consulta ao catálogo por engine).
+As visões têm metadados próprios para que db.create_all() não crie tabelas com os
+seus nomes.
+"""
+import threading
+import weakref
+from collections.abc import Mapping
+
+from sqlalchemy import MetaData, text
+
 from app import db
-from sqlalchemy import inspect
-
-# Verificar o tipo de banco de dados
-def is_sqlite():
-    """Verifica se o banco de dados atual é SQLite"""
-    try:
-        engine_name = db.engine.name
-        return engine_name == 'sqlite'
-    except:
-        # Fallback para SQLite em caso de erro
-        return True
-
-class EventosAtivosHoje(db.Model):
+
+
+metadata_visoes = MetaData()
+
+
+class Visao(db.Model):
+    __abstract__ = True
+
+    def __init_subclass__(cls, **kwargs):
+        # Definido antes do mapeamento: o Flask-SQLAlchemy só troca o metadata
+        # de classes que não declaram o seu
+        cls.metadata = metadata_visoes
+        super().__init_subclass__(**kwargs)
+
+
+class EventosAtivosHoje(Visao):
     __tablename__ = 'vw_eventos_ativos_hoje'
     __table_args__ = {'info': {'is_view': True}}
     
@@ -24,7 +42,7 @@ class EventosAtivosHoje(db.Model):
     categoria = db.Column(db.String)
 
 
-class ResumoCalendario(db.Model):
+class ResumoCalendario(Visao):
     __tablename__ = 'vw_resumo_calendario'
     __table_args__ = {'info': {'is_view': True}}
     
@@ -39,7 +57,7 @@ class ResumoCalendario(db.Model):
     totaleventos = db.Column(db.Integer)
 
 
-class EventosFuturosAtivos(db.Model):
+class EventosFuturosAtivos(Visao):
     __tablename__ = 'vw_eventos_futuros_ativos'
     __table_args__ = {'info': {'is_view': True}}
     
@@ -50,45 +68,120 @@ class EventosFuturosAtivos(db.Model):
     calendario = db.Column(db.String)
     categoria = db.Column(db.String)
 
-# Estas views só serão carregadas se estiver usando PostgreSQL
-if not is_sqlite():
-    class DiasLetivos(db.Model):
-        __tablename__ = 'vw_dias_letivos'
-        __table_args__ = {'info': {'is_view': True}}
-        
-        periodo = db.Column(db.String, primary_key=True)
-        calendario = db.Column(db.String, primary_key=True)
-        categoria = db.Column(db.String, primary_key=True)
-        dias_planejados = db.Column(db.Integer)
-        dias_com_eventos = db.Column(db.Integer)
-        eventos_ultimos_30_dias = db.Column(db.Integer)
-
-
-    class FeriadosDiasLetivos(db.Model):
-        __tablename__ = 'vw_feriados_dias_letivos'
-        __table_args__ = {'info': {'is_view': True}}
-        
-        feriado = db.Column(db.String, primary_key=True)
-        data = db.Column(db.Date, primary_key=True)
-        dia_semana = db.Column(db.String)
-        periodo = db.Column(db.String)
-        categoria_afetada = db.Column(db.String)
-
-
-    class FeriadosDoAno(db.Model):
-        __tablename__ = 'vw_feriados_do_ano'
-        __table_args__ = {'info': {'is_view': True}}
-        
-        id_evento = db.Column(db.Integer, primary_key=True)
-        feriado = db.Column(db.String)
-        datainicio = db.Column(db.Date)
-        datafim = db.Column(db.Date)
-        calendario = db.Column(db.String)
-
-
-    class DiasLetivosPorPeriodo(db.Model):
-        __tablename__ = 'vw_dias_letivos_por_periodo'
-        __table_args__ = {'info': {'is_view': True}}
-        
-        periodo = db.Column(db.String, primary_key=True)
-        total_dias_letivos = db.Column(db.Integer)
\ No newline at end of file
+
+# Visões que só existem no PostgreSQL
+class DiasLetivos(Visao):
+    __tablename__ = 'vw_dias_letivos'
+    __table_args__ = {'info': {'is_view': True}}
+
+    periodo = db.Column(db.String, primary_key=True)
+    calendario = db.Column(db.String, primary_key=True)
+    categoria = db.Column(db.String, primary_key=True)
+    dias_planejados = db.Column(db.Integer)
+    dias_com_eventos = db.Column(db.Integer)
+    eventos_ultimos_30_dias = db.Column(db.Integer)
+
+
+class FeriadosDiasLetivos(Visao):
+    __tablename__ = 'vw_feriados_dias_letivos'
+    __table_args__ = {'info': {'is_view': True}}
+
+    feriado = db.Column(db.String, primary_key=True)
+    data = db.Column(db.Date, primary_key=True)
+    dia_semana = db.Column(db.String)
+    periodo = db.Column(db.String)
+    categoria_afetada = db.Column(db.String)
+
+
+class FeriadosDoAno(Visao):
+    __tablename__ = 'vw_feriados_do_ano'
+    __table_args__ = {'info': {'is_view': True}}
+
+    id_evento = db.Column(db.Integer, primary_key=True)
+    feriado = db.Column(db.String)
+    datainicio = db.Column(db.Date)
+    datafim = db.Column(db.Date)
+    calendario = db.Column(db.String)
+
+
+class DiasLetivosPorPeriodo(Visao):
+    __tablename__ = 'vw_dias_letivos_por_periodo'
+    __table_args__ = {'info': {'is_view': True}}
+
+    periodo = db.Column(db.String, primary_key=True)
+    total_dias_letivos = db.Column(db.Integer)
+
+
+# Relatório -> modelo da visão
+MODELOS_VISOES = {
+    'eventos_ativos': EventosAtivosHoje,
+    'resumo_calendario': ResumoCalendario,
+    'eventos_futuros': EventosFuturosAtivos,
+    'dias_letivos': DiasLetivos,
+    'feriados_dias_letivos': FeriadosDiasLetivos,
+    'feriados_ano': FeriadosDoAno,
+    'dias_por_periodo': DiasLetivosPorPeriodo,
+}
+
+# Uma consulta lista as visões (e, no PostgreSQL, as visões materializadas) do banco
+CONSULTAS_CATALOGO = {
+    'postgresql': """
+        SELECT viewname FROM pg_views WHERE schemaname = ANY (current_schemas(false))
+        UNION ALL
+        SELECT matviewname FROM pg_matviews WHERE schemaname = ANY (current_schemas(false))
+    """,
+    'sqlite': "SELECT name FROM sqlite_master WHERE type = 'view'",
+}
+
+
+class RegistroVisoes:
+    """Catálogo de visões de cada engine, consultado no primeiro uso e guardado até esquecer()"""
+
+    def __init__(self):
+        self._catalogos = weakref.WeakKeyDictionary()
+        self._trava = threading.Lock()
+
+    def catalogo(self, engine=None):
+        """Nomes das visões existentes no banco do engine (padrão: o da aplicação atual)"""
+        engine = engine or db.engine
+        catalogo = self._catalogos.get(engine)
+        if catalogo is None:
+            consulta = CONSULTAS_CATALOGO.get(engine.dialect.name)
+            if consulta is None:
+                catalogo = frozenset()
+            else:
+                with engine.connect() as conexao:
+                    catalogo = frozenset(conexao.execute(text(consulta)).scalars())
+            with self._trava:
+                self._catalogos[engine] = catalogo
+        return catalogo
+
+    def modelos(self, engine=None):
+        """Relatório -> modelo, apenas das visões que existem no banco"""
+        catalogo = self.catalogo(engine)
+        return {nome: modelo for nome, modelo in MODELOS_VISOES.items()
+                if modelo.__tablename__ in catalogo}
+
+    def esquecer(self):
+        """Descarta os catálogos (ex.: depois de 'flask init-advanced-features' criar as visões)"""
+        with self._trava:
+            self._catalogos.clear()
+
+
+registro_visoes = RegistroVisoes()
+
+
+class ModelosDisponiveis(Mapping):
+    """Dicionário somente leitura dos modelos de visão disponíveis no banco da aplicação atual"""
+
+    def __getitem__(self, nome):
+        return registro_visoes.modelos()[nome]
+
+    def __iter__(self):
+        return iter(registro_visoes.modelos())
+
+    def __len__(self):
+        return len(registro_visoes.modelos())
+
+
+modelos_disponiveis = ModelosDisponiveis()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark da latência de acerto dos backends de cache (memoria x arquivos).
+
+Mede, para cada backend:
+- obter(): leitura direta de uma entrada real (os eventos formatados do maior calendário);
+- a rota evento.eventos_calendario (XHR) pelo cliente de teste do Flask, com o cache
+  quente, comparada com o cache desativado (tamanho 0).
+
+Usa o banco configurado (rode 'python app/scripts/seed_data.py' antes se estiver vazio).
+
+Uso:
+    python app/scripts/benchmark_cache.py [--repeticoes N]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy import func
+
+from app import create_app, db
+from app.models.models import CategoriaCalendario, Eventos
+from app.services.cache import BACKENDS, criar_cache
+
+
+def percentis(amostras):
+    """(p50, p95) em milissegundos"""
+    ordenadas = sorted(amostras)
+    p95 = ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * 0.95))]
+    return statistics.median(ordenadas) * 1000, p95 * 1000
+
+
+def medir(funcao, repeticoes):
+    amostras = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        amostras.append(time.perf_counter() - inicio)
+    return percentis(amostras)
+
+
+def maior_calendario():
+    """Id do calendário com mais eventos"""
+    return (db.session.query(CategoriaCalendario.id_calendario)
+            .join(Eventos, Eventos.id_categoria == CategoriaCalendario.id_categoria)
+            .group_by(CategoriaCalendario.id_calendario)
+            .order_by(func.count(Eventos.id_evento).desc())
+            .limit(1)
+            .scalar())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Latência de acerto dos backends de cache')
+    parser.add_argument('--repeticoes', type=int, default=2000)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        id_calendario = maior_calendario()
+        if id_calendario is None:
+            print("❌ Nenhum evento no banco. Execute 'python app/scripts/seed_data.py' primeiro.")
+            sys.exit(1)
+
+        from app.controllers.evento_routes import _eventos_formatados
+        payload = _eventos_formatados(id_calendario)
+        print(f"Banco: {db.engine.name} | Calendário: {id_calendario} | Eventos formatados: {len(payload)}")
+
+    cliente = app.test_client()
+    url = f'/eventos/calendario/{id_calendario}'
+    cabecalhos = {'X-Requested-With': 'XMLHttpRequest'}
+
+    print(f"\n{'Backend':10s} {'obter p50':>12s} {'obter p95':>12s} {'rota p50':>12s} {'rota p95':>12s}")
+    with tempfile.TemporaryDirectory() as diretorio:
+        for nome in BACKENDS:
+            cache = criar_cache(nome, diretorio=diretorio, tamanho_maximo=64, ttl=3600)
+            chave = (f'calendario:{id_calendario}', 1, 'eventos')
+            cache.guardar(chave, payload)
+            obter = medir(lambda: cache.obter(chave), args.repeticoes)
+
+            app.extensions['cache'] = cache
+            cliente.get(url, headers=cabecalhos)  # aquece o cache
+            rota = medir(lambda: cliente.get(url, headers=cabecalhos), max(args.repeticoes // 10, 1))
+            print(f"{nome:10s} {obter[0]:10.3f}ms {obter[1]:10.3f}ms {rota[0]:10.3f}ms {rota[1]:10.3f}ms")
+            cache.limpar()
+
+    app.extensions['cache'] = criar_cache('memoria', tamanho_maximo=0)
+    rota = medir(lambda: cliente.get(url, headers=cabecalhos), max(args.repeticoes // 10, 1))
+    print(f"{'sem cache':10s} {'-':>12s} {'-':>12s} {rota[0]:10.3f}ms {rota[1]:10.3f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""
+Benchmark da inserção em lote de eventos com verificação de conflito de local (PostgreSQL).
+
+Compara o gatilho antigo (impedir_conflito_local_eventos, que faz um EXISTS sem índice
+a cada linha) com o que a migração c81e4b27d6a0 instala: a restrição EXCLUDE USING gist
+parcial (eventos não recorrentes) e o gatilho de restrição adiado
+trigger_conflito_local_recorrente. As duas variantes são o SQL da própria migração
+(downgrade() e upgrade()), executado numa tabela eventos própria, num schema temporário
+que é o único no search_path e é removido no final; as tabelas da aplicação não são
+tocadas. Cada lote é confirmado, já que a verificação adiada roda no COMMIT.
+
+Uso:
+    DATABASE_URL=postgresql://... python app/scripts/benchmark_conflito_local.py [--eventos N] [--locais N] [--lote N] [--recorrentes F]
+"""
+import argparse
+import importlib.util
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, RAIZ)
+
+from alembic.operations import Operations
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import text
+
+from app import create_app, db
+
+SCHEMA = 'benchmark_conflito_local'
+
+MIGRACAO = os.path.join(RAIZ, 'migrations', 'versions', 'c81e4b27d6a0_restricao_de_exclusao_local_periodo.py')
+
+# Colunas de eventos usadas pela restrição e pelos gatilhos (as funções usam eventos%ROWTYPE)
+TABELA = """
+CREATE TABLE eventos (
+    id_evento SERIAL PRIMARY KEY,
+    titulo VARCHAR(100) NOT NULL,
+    datainicio DATE NOT NULL,
+    datafim DATE NOT NULL,
+    local VARCHAR(100),
+    recorrenciadias VARCHAR(20),
+    recorrenciaintervalo INTEGER,
+    recorrenciacontagem INTEGER,
+    recorrenciaexcecoes TEXT
+)
+"""
+
+
+def carregar_migracao():
+    """Módulo da migração que cria a restrição de exclusão e o gatilho adiado"""
+    especificacao = importlib.util.spec_from_file_location('migracao_conflito_local', MIGRACAO)
+    modulo = importlib.util.module_from_spec(especificacao)
+    especificacao.loader.exec_module(modulo)
+    return modulo
+
+
+def aplicar(conexao, passo):
+    """Executa upgrade() ou downgrade() da migração na conexão (no schema do benchmark)"""
+    with Operations.context(MigrationContext.configure(conexao)):
+        passo()
+
+
+def gerar_eventos(total, total_locais, recorrentes, semente=42):
+    """
+    Gera eventos sem conflitos: em cada local as reservas são sequenciais. Uma fração
+    'recorrentes' repete-se nos dias úteis dentro do próprio intervalo.
+    """
+    aleatorio = random.Random(semente)
+    proxima_data = {i: date(2020, 1, 1) + timedelta(days=aleatorio.randint(0, 30)) for i in range(total_locais)}
+    eventos = []
+    for i in range(total):
+        local = aleatorio.randrange(total_locais)
+        inicio = proxima_data[local]
+        fim = inicio + timedelta(days=aleatorio.randint(0, 2))
+        proxima_data[local] = fim + timedelta(days=aleatorio.randint(1, 3))
+        eventos.append({'titulo': f'Evento {i}', 'datainicio': inicio, 'datafim': fim, 'local': f'Sala {local}',
+                        'recorrenciadias': '12345' if aleatorio.random() < recorrentes else None})
+    aleatorio.shuffle(eventos)
+    return eventos
+
+
+def medir_insercao(conexao, eventos, lote):
+    """Insere os eventos em lotes, confirmando cada um, e retorna os segundos gastos"""
+    inserir = text("INSERT INTO eventos (titulo, datainicio, datafim, local, recorrenciadias) "
+                   "VALUES (:titulo, :datainicio, :datafim, :local, :recorrenciadias)")
+    inicio = time.perf_counter()
+    for i in range(0, len(eventos), lote):
+        conexao.execute(inserir, eventos[i:i + lote])
+        conexao.commit()
+    return time.perf_counter() - inicio
+
+
+def conflito_rejeitado(conexao, evento):
+    """Confirma que um evento conflitante é rejeitado pela variante (inclusive pela verificação adiada)"""
+    try:
+        with conexao.begin_nested():
+            conexao.execute(text("INSERT INTO eventos (titulo, datainicio, datafim, local) "
+                                 "VALUES ('Conflito', :datainicio, :datafim, :local)"), evento)
+            conexao.execute(text("SET CONSTRAINTS ALL IMMEDIATE"))
+        return False
+    except Exception:
+        return True
+    finally:
+        conexao.rollback()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do conflito de local: gatilho x restrição GiST')
+    parser.add_argument('--eventos', type=int, default=100_000)
+    parser.add_argument('--locais', type=int, default=200)
+    parser.add_argument('--lote', type=int, default=1000, help='Linhas por INSERT em lote')
+    parser.add_argument('--recorrentes', type=float, default=0.05, help='Fração de eventos recorrentes')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if db.engine.name != 'postgresql':
+            print("❌ Este benchmark precisa de PostgreSQL (defina DATABASE_URL e USE_SQLITE=False).")
+            sys.exit(1)
+
+        migracao = carregar_migracao()
+        eventos = gerar_eventos(args.eventos, args.locais, args.recorrentes)
+        recorrente = next(e for e in eventos if e['recorrenciadias'])
+        print(f"Eventos: {args.eventos} | Locais: {args.locais} | Lote: {args.lote} | "
+              f"Recorrentes: {args.recorrentes:.0%}")
+
+        variantes = [('Gatilho antigo (EXISTS sem índice)', migracao.downgrade),
+                     ('EXCLUDE parcial + gatilho adiado', migracao.upgrade)]
+
+        with db.engine.connect() as conexao:
+            conexao.execute(text("CREATE EXTENSION IF NOT EXISTS btree_gist"))
+            conexao.commit()
+            try:
+                for descricao, passo in variantes:
+                    conexao.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+                    conexao.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+                    # Só o schema do benchmark no search_path: a tabela e as funções da migração são
+                    # criadas e resolvidas nele, e os DROP ... IF EXISTS não alcançam os da aplicação
+                    conexao.execute(text(f"SET search_path TO {SCHEMA}"))
+                    conexao.execute(text(TABELA))
+                    aplicar(conexao, passo)
+                    conexao.commit()
+
+                    segundos = medir_insercao(conexao, eventos, args.lote)
+                    # Um sem recorrência sobre outro, e um no dia útil de um recorrente
+                    rejeitou = all(conflito_rejeitado(conexao, e) for e in (eventos[0], recorrente))
+                    print(f"{descricao:36s} {segundos:10.2f} s  {args.eventos / segundos:12.0f} linhas/s  "
+                          f"conflitos rejeitados: {'sim' if rejeitou else 'NÃO'}")
+            finally:
+                conexao.rollback()
+                conexao.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+                conexao.execute(text("SET search_path TO DEFAULT"))
+                conexao.commit()
+
+
+if __name__ == '__main__':
+    main()
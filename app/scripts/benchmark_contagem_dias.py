@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark da contagem de dias válidos por categoria.
+
+Compara o algoritmo antigo (um conjunto de strings com cada dia de cada evento)
+com a união de intervalos de app.services.dias, em categorias com eventos
+longos e sobrepostos. Não precisa de banco de dados.
+
+Uso:
+    python app/scripts/benchmark_contagem_dias.py [--categorias N] [--eventos N]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.services.dias import contar_dias_validos_uniao, mascara_dias_semana
+
+DIAS_SEMANA_OPCOES = ['12345', '123456', '1234567', '246', '135', '6', '7']
+
+
+def contagem_antiga(intervalos, diassemanasvalidos):
+    """Reproduz o algoritmo original de CategoriaCalendario.atualizar_contagem_dias"""
+    dias_contados = set()
+    for inicio, fim in intervalos:
+        data_atual = inicio
+        while data_atual <= fim:
+            if diassemanasvalidos and str(data_atual.isoweekday()) in diassemanasvalidos:
+                dias_contados.add(data_atual.strftime('%Y-%m-%d'))
+            data_atual += timedelta(days=1)
+    return len(dias_contados)
+
+
+def contagem_nova(intervalos, diassemanasvalidos):
+    """Contagem por união de intervalos"""
+    return contar_dias_validos_uniao(intervalos, mascara_dias_semana(diassemanasvalidos))
+
+
+def gerar_categorias(total_categorias, eventos_por_categoria, semente=42):
+    """Gera categorias sintéticas com eventos longos e sobrepostos ao longo de alguns anos"""
+    aleatorio = random.Random(semente)
+    inicio_base = date(2020, 1, 1)
+    categorias = []
+    for _ in range(total_categorias):
+        diassemanasvalidos = aleatorio.choice(DIAS_SEMANA_OPCOES)
+        intervalos = []
+        for _ in range(eventos_por_categoria):
+            inicio = inicio_base + timedelta(days=aleatorio.randint(0, 5 * 365))
+            fim = inicio + timedelta(days=aleatorio.randint(0, 180))
+            intervalos.append((inicio, fim))
+        categorias.append((diassemanasvalidos, intervalos))
+    return categorias
+
+
+def medir(funcao, categorias):
+    """Executa a função em todas as categorias e retorna (resultados, segundos)"""
+    inicio = time.perf_counter()
+    resultados = [funcao(intervalos, dias) for dias, intervalos in categorias]
+    return resultados, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark da contagem de dias válidos')
+    parser.add_argument('--categorias', type=int, default=200)
+    parser.add_argument('--eventos', type=int, default=50, help='Eventos por categoria')
+    args = parser.parse_args()
+
+    categorias = gerar_categorias(args.categorias, args.eventos)
+    total_dias = sum((fim - inicio).days + 1 for _, intervalos in categorias for inicio, fim in intervalos)
+    print(f"Categorias: {args.categorias} | Eventos: {args.categorias * args.eventos} | Dias-evento: {total_dias}")
+
+    antigos, tempo_antigo = medir(contagem_antiga, categorias)
+    novos, tempo_novo = medir(contagem_nova, categorias)
+
+    divergencias = sum(1 for a, n in zip(antigos, novos) if a != n)
+    print(f"Algoritmo antigo (conjunto de dias):  {tempo_antigo * 1000:10.2f} ms")
+    print(f"União de intervalos:                  {tempo_novo * 1000:10.2f} ms")
+    if tempo_novo > 0:
+        print(f"Ganho: {tempo_antigo / tempo_novo:.1f}x")
+
+    if divergencias:
+        print(f"❌ {divergencias} categorias com contagens divergentes!")
+        sys.exit(1)
+    print("✅ Resultados idênticos em todas as categorias")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Mede o tempo de inicialização da aplicação: importar o pacote app e executar
+create_app(), cada repetição num processo Python novo (sem módulos em cache),
+e o tempo da primeira requisição à página de relatórios.
+
+Usa o banco configurado pelas variáveis de ambiente (USE_SQLITE / DATABASE_URL).
+
+Uso:
+    python app/scripts/benchmark_inicializacao.py [--repeticoes N]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Executado em cada processo filho
+MEDICAO = """
+import json, time
+inicio = time.perf_counter()
+from app import create_app
+importacao = time.perf_counter()
+app = create_app()
+fabrica = time.perf_counter()
+app.test_client().get('/relatorios/')
+requisicao = time.perf_counter()
+print(json.dumps({'importacao': importacao - inicio, 'create_app': fabrica - importacao,
+                  'primeira_requisicao': requisicao - fabrica}))
+"""
+
+
+def medir_processo():
+    saida = subprocess.run([sys.executable, '-c', MEDICAO], cwd=RAIZ, capture_output=True,
+                           text=True, check=True).stdout
+    return json.loads(saida.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tempo de inicialização da aplicação')
+    parser.add_argument('--repeticoes', type=int, default=10)
+    args = parser.parse_args()
+
+    amostras = [medir_processo() for _ in range(args.repeticoes)]
+    print(f"{'Etapa':22s} {'p50':>10s} {'máx':>10s}")
+    for etapa in ('importacao', 'create_app', 'primeira_requisicao'):
+        valores = [a[etapa] * 1000 for a in amostras]
+        print(f"{etapa:22s} {statistics.median(valores):8.1f}ms {max(valores):8.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark das visões de relatório: visão comum (vw_*) x visão materializada (mv_*).
+
+Para cada relatório de VISOES_MATERIALIZADAS mede a consulta completa, na mesma
+ordem usada pela página, contra a visão comum e contra a materializada, e o tempo
+de REFRESH MATERIALIZED VIEW CONCURRENTLY de cada uma. Só funciona no PostgreSQL,
+depois de 'flask init-advanced-features' (e, para números realistas, de um banco
+populado).
+
+Uso:
+    python app/scripts/benchmark_relatorios.py [--repeticoes N]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy import text
+
+from app import create_app, db
+from app.services.relatorios_materializados import (
+    VISOES_MATERIALIZADAS, atualizar_relatorios, materializadas_disponiveis
+)
+
+# Visão comum de origem de cada visão materializada
+VISOES_ORIGINAIS = {
+    'mv_resumo_calendario': 'vw_resumo_calendario',
+    'mv_dias_letivos': 'vw_dias_letivos',
+    'mv_dias_letivos_por_periodo': 'vw_dias_letivos_por_periodo',
+}
+
+
+def percentis(amostras):
+    """(p50, p95) em milissegundos"""
+    ordenadas = sorted(amostras)
+    p95 = ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * 0.95))]
+    return statistics.median(ordenadas) * 1000, p95 * 1000
+
+
+def medir(sql, repeticoes):
+    amostras = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        db.session.execute(text(sql)).all()
+        amostras.append(time.perf_counter() - inicio)
+    db.session.rollback()
+    return percentis(amostras)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Visões comuns x materializadas dos relatórios')
+    parser.add_argument('--repeticoes', type=int, default=200)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if db.engine.name != 'postgresql':
+            print("❌ Este benchmark requer PostgreSQL.")
+            sys.exit(1)
+        if not materializadas_disponiveis():
+            print("❌ Nenhuma visão materializada. Execute 'flask init-advanced-features' primeiro.")
+            sys.exit(1)
+
+        print(f"{'Relatório':20s} {'Linhas':>7s} {'vw p50':>10s} {'vw p95':>10s} {'mv p50':>10s} {'mv p95':>10s} {'Ganho':>7s}")
+        for relatorio, (materializada, ordem) in VISOES_MATERIALIZADAS.items():
+            if materializada not in materializadas_disponiveis():
+                continue
+            original = VISOES_ORIGINAIS[materializada]
+            linhas = db.session.execute(text(f"SELECT COUNT(*) FROM {original}")).scalar()
+            comum = medir(f"SELECT * FROM {original} ORDER BY {ordem}", args.repeticoes)
+            snapshot = medir(f"SELECT * FROM {materializada} ORDER BY {ordem}", args.repeticoes)
+            print(f"{relatorio:20s} {linhas:7d} {comum[0]:8.3f}ms {comum[1]:8.3f}ms "
+                  f"{snapshot[0]:8.3f}ms {snapshot[1]:8.3f}ms {comum[0] / snapshot[0]:6.1f}x")
+
+        tempos = atualizar_relatorios()
+        if tempos is None:
+            print("\n⏳ Outra atualização em andamento; tempo de refresh não medido.")
+            return
+        print(f"\n{'Refresh concorrente':20s}")
+        for visao, segundos in tempos:
+            print(f"  {visao:30s} {segundos * 1000:8.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
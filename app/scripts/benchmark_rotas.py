@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Benchmark das rotas mais acessadas em várias escalas de dados.
+
+Para cada banco (SQLite em memória, SQLite em arquivo, SQLite em arquivo com o
+perfil de desempenho e, opcionalmente, um PostgreSQL local) e cada escala
+(número aproximado de eventos), cria a aplicação com uma subclasse de
+ConfigTeste, popula o banco com o gerador de app.scripts.dados_sinteticos e
+mede, pelo cliente de teste do Flask:
+- latência p50/p95 de cada rota (resposta lida por inteiro, inclusive as exportações);
+- número de consultas SQL por requisição (app.services.consultas);
+- pico de memória Python alocada durante uma requisição (tracemalloc, numa
+  passada separada para não distorcer os tempos) e o pico de RSS do processo.
+
+Rotas que respondem 404 no banco medido (ex.: relatórios sem a visão
+correspondente) ficam de fora, listadas em 'indisponiveis'; as que respondem com
+outro status fora de 2xx (redirecionamento, erro) entram marcadas com 'erro',
+sem tempos, e não são comparadas.
+
+O cache de páginas fica desligado (--cache liga) para que toda requisição chegue
+ao banco. O resultado pode ser gravado em JSON (--saida) e comparado com uma
+execução anterior (--comparar).
+
+ATENÇÃO: no PostgreSQL os dados do banco indicado são substituídos.
+
+Uso:
+    python app/scripts/benchmark_rotas.py [--bancos sqlite-memoria,sqlite-arquivo]
+        [--escalas 1000,10000,100000] [--repeticoes N] [--postgres URL]
+        [--saida resultado.json] [--comparar anterior.json]
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import sqlalchemy
+from sqlalchemy import func, select
+
+from app import create_app, db
+from app.config import ConfigTeste
+from app.models.models import CategoriaCalendario, Eventos
+from app.models.views import MODELOS_VISOES
+from app.scripts.dados_sinteticos import gerar_dados_sinteticos
+from app.services.consultas import contar_consultas
+from app.services.sessao import engines_da_aplicacao
+
+BANCOS = ('sqlite-memoria', 'sqlite-arquivo', 'sqlite-desempenho', 'postgresql')
+
+XHR = {'X-Requested-With': 'XMLHttpRequest'}
+
+# (nome, URL, cabeçalhos); as rotas de relatorio_bp são acrescentadas a partir do url_map
+ROTAS = [
+    ('main.index', '/', {}),
+    ('evento.listar', '/eventos/', {}),
+    ('evento.eventos_calendario', '/eventos/calendario/{calendario}', {}),
+    ('evento.eventos_calendario (XHR)', '/eventos/calendario/{calendario}', XHR),
+    ('evento.relatorio_calendario', '/eventos/relatorio/{calendario}', {}),
+    ('categoria.visualizar', '/categorias/visualizar/{categoria}', {}),
+]
+
+# Argumentos das rotas de relatórios -> chave de ids_referencia()
+ARGUMENTOS_IDS = {'id_calendario': 'calendario', 'id_categoria': 'categoria', 'id_periodo': 'periodo'}
+
+
+def parametros_escala(eventos):
+    """(campi, anos) do gerador sintético para chegar perto do número de eventos pedido"""
+    anos = 1 if eventos <= 2000 else 5 if eventos <= 20000 else 10
+    # O gerador cria cerca de 1.000 eventos por campus e ano
+    return max(1, round(eventos / (1000 * anos))), anos
+
+
+def percentis(amostras):
+    """(p50, p95) em milissegundos"""
+    ordenadas = sorted(amostras)
+    p95 = ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * 0.95))]
+    return statistics.median(ordenadas) * 1000, p95 * 1000
+
+
+def rotas_relatorios(app):
+    """Todas as rotas de relatorio_bp; as de relatório por nome, uma vez por relatório"""
+    rotas = []
+    for regra in sorted(app.url_map.iter_rules(), key=lambda r: r.rule):
+        if not regra.endpoint.startswith('relatorio.') or 'GET' not in regra.methods:
+            continue
+        if 'nome' in regra.arguments:
+            nomes = list(MODELOS_VISOES)
+            if regra.endpoint == 'relatorio.exportar':
+                nomes.append('eventos_ativos_alternativo')
+            for nome in nomes:
+                argumentos = {'nome': nome.replace('_', '-'), 'formato': 'csv'}
+                url = regra.build(argumentos, append_unknown=False)[1]
+                rotas.append((f'{regra.endpoint} ({nome})', url, {}))
+        else:
+            # <int:id_calendario> -> {calendario}, preenchido com ids_referencia()
+            url = regra.rule
+            for argumento in regra.arguments:
+                url = url.replace(f'<int:{argumento}>', '{' + ARGUMENTOS_IDS[argumento] + '}')
+            rotas.append((regra.endpoint, url, {}))
+    return rotas
+
+
+def ids_referencia():
+    """Calendário e categoria com mais eventos e período com mais categorias"""
+    calendario = db.session.execute(
+        select(CategoriaCalendario.id_calendario)
+        .join(Eventos, Eventos.id_categoria == CategoriaCalendario.id_categoria)
+        .group_by(CategoriaCalendario.id_calendario)
+        .order_by(func.count(Eventos.id_evento).desc()).limit(1)
+    ).scalar()
+    categoria = db.session.execute(
+        select(Eventos.id_categoria).group_by(Eventos.id_categoria)
+        .order_by(func.count(Eventos.id_evento).desc()).limit(1)
+    ).scalar()
+    periodo = db.session.execute(
+        select(CategoriaCalendario.id_periodo).group_by(CategoriaCalendario.id_periodo)
+        .order_by(func.count(CategoriaCalendario.id_categoria).desc()).limit(1)
+    ).scalar()
+    return {'calendario': calendario, 'categoria': categoria, 'periodo': periodo}
+
+
+def config_banco(banco, diretorio, args):
+    """Subclasse de ConfigTeste para o banco pedido"""
+    atributos = {
+        'PROPAGATE_EXCEPTIONS': False,  # erros viram 500 e entram no resultado
+        'CACHE_TAMANHO': 64 if args.cache else 0,
+    }
+    if banco != 'sqlite-memoria':
+        atributos['SQLALCHEMY_DATABASE_URI'] = (
+            args.postgres if banco == 'postgresql' else f"sqlite:///{os.path.join(diretorio, 'benchmark.db')}")
+    if banco == 'sqlite-desempenho':
+        atributos['SQLITE_DESEMPENHO'] = True
+    return type('ConfigBenchmark', (ConfigTeste,), atributos)
+
+
+def requisitar(app, cliente, url, cabecalhos):
+    """Uma requisição com a resposta lida por inteiro; retorna (status, segundos, consultas)"""
+    with app.app_context():
+        with contar_consultas() as consultas:
+            inicio = time.perf_counter()
+            resposta = cliente.get(url, headers=cabecalhos)
+            resposta.get_data()
+            segundos = time.perf_counter() - inicio
+            resposta.close()
+    return resposta.status_code, segundos, consultas.total
+
+
+def medida_valida(rota):
+    """Linha com tempos de uma resposta 2xx (JSONs antigos não têm o campo 'erro')"""
+    return not rota.get('erro') and 200 <= rota['status'] < 300
+
+
+def pico_memoria(app, cliente, url, cabecalhos):
+    """Pico de memória Python (KiB) alocada durante uma requisição"""
+    tracemalloc.start()
+    try:
+        requisitar(app, cliente, url, cabecalhos)
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def executar(banco, eventos_alvo, args):
+    diretorio = tempfile.mkdtemp(prefix='benchmark_rotas_')
+    campi, anos = parametros_escala(eventos_alvo)
+    app = create_app(config_banco(banco, diretorio, args))
+    app.logger.disabled = True
+    try:
+        with app.app_context():
+            db.create_all()
+            inicio = time.perf_counter()
+            gerar_dados_sinteticos(campi, anos, semente=args.semente)
+            carga = time.perf_counter() - inicio
+            total_eventos = db.session.execute(select(func.count(Eventos.id_evento))).scalar()
+            ids = ids_referencia()
+
+        cliente = app.test_client()
+        rotas, indisponiveis = [], []
+        for nome, modelo_url, cabecalhos in ROTAS + rotas_relatorios(app):
+            url = modelo_url.format(**ids)
+            # A primeira requisição também conta como aquecimento
+            status = requisitar(app, cliente, url, cabecalhos)[0]
+            if status == 404:
+                indisponiveis.append(nome)
+                continue
+            for _ in range(args.aquecimento - 1):
+                requisitar(app, cliente, url, cabecalhos)
+            amostras, consultas = [], 0
+            for _ in range(args.repeticoes):
+                if not 200 <= status < 300:
+                    break
+                status, segundos, consultas = requisitar(app, cliente, url, cabecalhos)
+                amostras.append(segundos)
+            if not 200 <= status < 300:
+                rotas.append({'rota': nome, 'url': url, 'status': status, 'erro': True})
+                continue
+            p50, p95 = percentis(amostras)
+            rotas.append({
+                'rota': nome, 'url': url, 'status': status,
+                'p50_ms': round(p50, 3), 'p95_ms': round(p95, 3),
+                'consultas': consultas,
+                'pico_memoria_kb': round(pico_memoria(app, cliente, url, cabecalhos), 1),
+            })
+        return {
+            'banco': banco, 'eventos_alvo': eventos_alvo, 'eventos': total_eventos,
+            'campi': campi, 'anos': anos, 'carga_s': round(carga, 2), 'ids': ids,
+            'rotas': rotas, 'indisponiveis': indisponiveis,
+            # ru_maxrss: KiB no Linux, bytes no macOS
+            'pico_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            // (1024 if sys.platform == 'darwin' else 1),
+        }
+    finally:
+        with app.app_context():
+            db.session.remove()
+            for engine in engines_da_aplicacao():
+                engine.dispose()
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+
+def imprimir(execucao, anterior=None):
+    print(f"\n== {execucao['banco']}: {execucao['eventos']} eventos "
+          f"({execucao['campi']} campi x {execucao['anos']} anos, carga em {execucao['carga_s']} s) ==")
+    cabecalho = f"{'Rota':52s} {'Status':>6s} {'p50':>10s} {'p95':>10s} {'Consultas':>9s} {'Memória':>10s}"
+    print(cabecalho + (f" {'p50 antes':>10s} {'Variação':>8s}" if anterior else ''))
+    for rota in execucao['rotas']:
+        if not medida_valida(rota):
+            print(f"{rota['rota']:52s} {rota['status']:6d} {'erro':>10s}")
+            continue
+        linha = (f"{rota['rota']:52s} {rota['status']:6d} {rota['p50_ms']:8.2f}ms {rota['p95_ms']:8.2f}ms "
+                 f"{rota['consultas']:9d} {rota['pico_memoria_kb']:8.0f}KB")
+        if anterior and rota['rota'] in anterior and medida_valida(anterior[rota['rota']]):
+            antes = anterior[rota['rota']]['p50_ms']
+            linha += f" {antes:8.2f}ms {(rota['p50_ms'] - antes) / antes * 100 if antes else 0:+7.1f}%"
+        print(linha)
+    if execucao.get('indisponiveis'):
+        print(f"Indisponíveis neste banco (404): {', '.join(execucao['indisponiveis'])}")
+
+
+def carregar_anterior(caminho):
+    """(banco, eventos_alvo) -> {rota: resultado} de um JSON gravado com --saida"""
+    with open(caminho, encoding='utf-8') as arquivo:
+        dados = json.load(arquivo)
+    return {(e['banco'], e['eventos_alvo']): {r['rota']: r for r in e['rotas']} for e in dados['execucoes']}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Latência, consultas e memória das rotas em várias escalas')
+    parser.add_argument('--bancos', default='sqlite-memoria,sqlite-arquivo',
+                        help=f"Lista separada por vírgulas, entre: {', '.join(BANCOS)}")
+    parser.add_argument('--escalas', default='1000,10000,100000', help='Números aproximados de eventos')
+    parser.add_argument('--repeticoes', type=int, default=10)
+    parser.add_argument('--aquecimento', type=int, default=2, help='Requisições descartadas antes das medidas')
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--cache', action='store_true', help='Liga o cache de páginas')
+    parser.add_argument('--postgres', default=os.environ.get('BENCHMARK_DATABASE_URL'),
+                        help='URL do PostgreSQL (padrão: BENCHMARK_DATABASE_URL); os dados são substituídos')
+    parser.add_argument('--saida', help='Grava o resultado em JSON')
+    parser.add_argument('--comparar', help='JSON de uma execução anterior para comparar o p50')
+    args = parser.parse_args()
+
+    bancos = [b.strip() for b in args.bancos.split(',') if b.strip()]
+    desconhecidos = [b for b in bancos if b not in BANCOS]
+    if desconhecidos:
+        parser.error(f"Bancos desconhecidos: {', '.join(desconhecidos)}")
+    if 'postgresql' in bancos and not args.postgres:
+        parser.error('Informe --postgres (ou BENCHMARK_DATABASE_URL) para medir o PostgreSQL')
+    escalas = [int(e) for e in args.escalas.split(',') if e.strip()]
+    anteriores = carregar_anterior(args.comparar) if args.comparar else {}
+
+    resultado = {
+        'gerado_em': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(), 'sqlalchemy': sqlalchemy.__version__,
+        'repeticoes': args.repeticoes, 'aquecimento': args.aquecimento,
+        'semente': args.semente, 'cache': args.cache, 'execucoes': [],
+    }
+    for banco in bancos:
+        for eventos_alvo in escalas:
+            execucao = executar(banco, eventos_alvo, args)
+            resultado['execucoes'].append(execucao)
+            imprimir(execucao, anteriores.get((banco, eventos_alvo)))
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            json.dump(resultado, arquivo, ensure_ascii=False, indent=2)
+        print(f"\n📄 Resultado gravado em {args.saida}")
+
+
+if __name__ == '__main__':
+    main()
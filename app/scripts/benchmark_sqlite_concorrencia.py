@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Benchmark de leituras e gravações concorrentes no SQLite, com e sem o perfil de
+desempenho (SQLITE_DESEMPENHO, ver app.services.perfil_sqlite).
+
+Para cada perfil, numa cópia do mesmo banco populado por seed_data (em um
+diretório temporário), N processos leitores pedem páginas de leitura pelo cliente
+de teste do Flask enquanto M processos gravam lotes de eventos, um COMMIT por lote
+(como uma importação em massa), durante o tempo pedido. Processos, e não threads,
+para que os leitores disputem o banco e não o GIL. Num lote grande o journal padrão
+(rollback) esgota o cache de páginas e bloqueia o arquivo inteiro até o COMMIT, e os
+leitores esperam; no WAL eles seguem lendo. Mede leituras e eventos gravados por
+segundo, p50/p95/máximo das leituras e as requisições que falharam (ex.: 'database
+is locked'). O cache de páginas fica desligado para que cada leitura chegue ao banco.
+
+Uso:
+    python app/scripts/benchmark_sqlite_concorrencia.py [--segundos S] [--leitores N] [--gravadores M]
+        [--lote EVENTOS]
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# Os processos filhos reimportam este módulo: herdam o diretório pelo ambiente
+DIRETORIO = os.environ.get('BENCHMARK_SQLITE_DIRETORIO') or tempfile.mkdtemp(prefix='benchmark_sqlite_')
+os.environ['BENCHMARK_SQLITE_DIRETORIO'] = DIRETORIO
+BANCO_BASE = os.path.join(DIRETORIO, 'base.db')
+
+# Config é lida na importação: o banco populado por seed_data é o do diretório temporário
+os.environ['USE_SQLITE'] = 'True'
+os.environ['SQLITE_PATH'] = BANCO_BASE
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app import create_app, db
+from app.config import Config
+from app.models.models import CategoriaCalendario
+
+PAGINAS_LEITURA = ['/eventos/', '/calendarios/', '/relatorios/eventos-ativos-alternativo']
+
+# Lote gerado dentro do SQLite (como uma importação em massa): a transação fica no
+# banco, e não no Python, do início ao COMMIT
+GERAR_LOTE = text("""
+    WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < :lote)
+    INSERT INTO eventos (id_categoria, titulo, datainicio, datafim, dia_todo)
+    SELECT :id_categoria, :prefixo || i, '2025-05-05', '2025-05-05', 1 FROM n
+""")
+
+
+def percentis(amostras):
+    """(p50, p95, máximo) em milissegundos"""
+    if not amostras:
+        return 0.0, 0.0, 0.0
+    ordenadas = sorted(amostras)
+    p95 = ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * 0.95))]
+    return statistics.median(ordenadas) * 1000, p95 * 1000, ordenadas[-1] * 1000
+
+
+def arquivo_perfil(desempenho):
+    return os.path.join(DIRETORIO, f"perfil_{'desempenho' if desempenho else 'padrao'}.db")
+
+
+def criar_app_perfil(desempenho):
+    """Aplicação sobre a cópia do banco base do perfil"""
+    config = type('ConfigBenchmark', (Config,), {
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{arquivo_perfil(desempenho)}',
+        'SQLITE_DESEMPENHO': desempenho,
+        'WTF_CSRF_ENABLED': False,
+        'CACHE_TAMANHO': 0,
+        'RELATORIOS_ATRASO_ATUALIZACAO': -1,
+    })
+    return create_app(config)
+
+
+def ler(desempenho, indice, segundos, largada, resultados):
+    """Processo leitor: pede as páginas de leitura em sequência até o fim do tempo"""
+    cliente = criar_app_perfil(desempenho).test_client()
+    latencias, falhas = [], 0
+    largada.wait()
+    fim = time.perf_counter() + segundos
+    while time.perf_counter() < fim:
+        inicio = time.perf_counter()
+        resposta = cliente.get(PAGINAS_LEITURA[(indice + len(latencias)) % len(PAGINAS_LEITURA)])
+        latencias.append(time.perf_counter() - inicio)
+        if resposta.status_code >= 500:
+            falhas += 1
+    resultados.put(('leitura', latencias, falhas))
+
+
+def gravar(desempenho, indice, segundos, largada, resultados, lote):
+    """Processo gravador: grava lotes de eventos, um COMMIT por lote, até o fim do tempo"""
+    app = criar_app_perfil(desempenho)
+    with app.app_context():
+        id_categoria = db.session.query(CategoriaCalendario.id_categoria).limit(1).scalar()
+        gravacoes, falhas = 0, 0
+        largada.wait()
+        fim = time.perf_counter() + segundos
+        while time.perf_counter() < fim:
+            try:
+                db.session.execute(GERAR_LOTE, {'id_categoria': id_categoria, 'lote': lote,
+                                                'prefixo': f'Benchmark {indice}-{gravacoes}-'})
+                db.session.commit()
+                gravacoes += lote
+            except OperationalError:
+                db.session.rollback()
+                falhas += 1
+    resultados.put(('gravacao', gravacoes, falhas))
+
+
+def executar(desempenho, segundos, leitores, gravadores, lote):
+    """Roda leitores e gravadores numa cópia nova do banco base (o modo WAL fica gravado no arquivo)"""
+    shutil.copyfile(BANCO_BASE, arquivo_perfil(desempenho))
+    contexto = multiprocessing.get_context('spawn')
+    # Todos começam juntos, depois de criar a aplicação
+    largada = contexto.Barrier(leitores + gravadores)
+    resultados = contexto.Queue()
+    processos = ([contexto.Process(target=ler, args=(desempenho, i, segundos, largada, resultados))
+                  for i in range(leitores)] +
+                 [contexto.Process(target=gravar, args=(desempenho, i, segundos, largada, resultados, lote))
+                  for i in range(gravadores)])
+    for processo in processos:
+        processo.start()
+
+    latencias, gravacoes, falhas = [], 0, {'leitura': 0, 'gravacao': 0}
+    for _ in processos:
+        tipo, valor, falhas_processo = resultados.get()
+        falhas[tipo] += falhas_processo
+        if tipo == 'leitura':
+            latencias.extend(valor)
+        else:
+            gravacoes += valor
+    for processo in processos:
+        processo.join()
+    return len(latencias), gravacoes, percentis(latencias), falhas
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Leituras e gravações concorrentes no SQLite')
+    parser.add_argument('--segundos', type=float, default=10)
+    parser.add_argument('--leitores', type=int, default=4)
+    parser.add_argument('--gravadores', type=int, default=1)
+    parser.add_argument('--lote', type=int, default=100000, help='eventos por transação de gravação')
+    args = parser.parse_args()
+
+    from app.scripts.seed_data import seed_database
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+    seed_database()
+    with app.app_context():
+        db.engine.dispose()
+
+    print(f"Leitores: {args.leitores} | Gravadores: {args.gravadores} | {args.segundos:g} s por perfil")
+    print(f"{'Perfil':12s} {'Leituras/s':>11s} {'Gravações/s':>12s} {'p50':>10s} {'p95':>10s} {'Máx':>10s} "
+          f"{'Falhas (l/g)':>13s}")
+    try:
+        for desempenho in (False, True):
+            leituras, gravacoes, (p50, p95, maximo), falhas = executar(
+                desempenho, args.segundos, args.leitores, args.gravadores, args.lote)
+            print(f"{'desempenho' if desempenho else 'padrão':12s} {leituras / args.segundos:11.1f} "
+                  f"{gravacoes / args.segundos:12.1f} {p50:8.2f}ms {p95:8.2f}ms {maximo:8.2f}ms "
+                  f"{falhas['leitura']:>6d}/{falhas['gravacao']:<6d}")
+    finally:
+        shutil.rmtree(DIRETORIO, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
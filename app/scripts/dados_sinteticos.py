@@ -0,0 +1,342 @@
+"""
+Gerador de dados sintéticos em volume para testes de carga ('flask seed-db --scale N --years Y').
+
+Substitui os dados do banco por uma instituição com N campi ao longo de Y anos:
+- 4 períodos por ano (semestres, recesso e férias), compartilhados pelos calendários;
+- 8 tipos de calendário por campus (graduação, pós, técnico, EaD, especialização,
+  institucional, eventos e extensão) e um calendário por tipo e ano;
+- categorias por semestre com máscaras de dias da semana, contagem de dias e feriados
+  (fixos e móveis, a partir da Páscoa);
+- cerca de 1.000 eventos por campus e ano: aulas, provas, reuniões recorrentes,
+  palestras e congressos, com locais alocados sem conflito de sala.
+
+A geração é determinística para a mesma semente (ids explícitos, um único gerador
+aleatório percorrido sempre na mesma ordem). As linhas são inseridas em lotes, sem
+passar pela sessão do ORM: no SQLite um INSERT compilado uma vez e executado com
+executemany (um insert().values() com centenas de linhas gasta mais tempo
+compilando o SQL do que o banco gravando), no PostgreSQL com COPY; os contadores,
+os mapas de ocupação e as versões dos calendários são reconstruídos no final, como
+em 'flask recompute-counts'.
+
+No PostgreSQL com os gatilhos de 'flask init-advanced-features' instalados, cada
+linha do COPY ainda passa por eles; para cargas grandes, gere os dados antes.
+"""
+import csv
+import io
+import random
+import time
+from datetime import date, datetime, timedelta
+from itertools import islice
+
+from sqlalchemy import delete, insert, text
+
+from app import db
+from app.models.models import (
+    Calendario, CategoriaCalendario, Eventos, Periodo, TipoCalendario, VersaoCalendario
+)
+
+# Linhas por executemany (SQLite) e por COPY (PostgreSQL)
+LINHAS_POR_LOTE = 5000
+LINHAS_POR_COPY = 20000
+
+# (nome, dias da semana válidos, total de dias, contagem habilitada, como gerar os eventos)
+CATEGORIAS_ENSINO = [
+    ('Aulas Regulares', '12345', 100, True, 'aulas'),
+    ('Provas', '12345', 10, True, 'provas'),
+    ('Feriados', '1234567', None, False, 'feriados'),
+    ('Reuniões', '12345', None, False, 'reunioes'),
+]
+CATEGORIAS_INSTITUCIONAL = [
+    ('Reuniões', '12345', None, False, 'reunioes'),
+    ('Feriados', '1234567', None, False, 'feriados'),
+    ('Prazos', '12345', None, False, 'avulsos'),
+]
+CATEGORIAS_EVENTOS = [
+    ('Palestras', '12345', None, False, 'avulsos'),
+    ('Congressos', '1234567', None, False, 'congressos'),
+    ('Oficinas', '123456', None, False, 'avulsos'),
+]
+
+# (prefixo da sigla, nome, categorias de cada semestre, dias de aula)
+TIPOS = [
+    ('GR', 'Graduação', CATEGORIAS_ENSINO, '12345'),
+    ('PG', 'Pós-Graduação', CATEGORIAS_ENSINO, '12345'),
+    ('TE', 'Técnico', CATEGORIAS_ENSINO, '123456'),
+    ('EA', 'EaD', CATEGORIAS_ENSINO, '1234567'),
+    ('ES', 'Especialização', CATEGORIAS_ENSINO, '56'),
+    ('IN', 'Institucional', CATEGORIAS_INSTITUCIONAL, None),
+    ('EV', 'Eventos Acadêmicos', CATEGORIAS_EVENTOS, None),
+    ('EX', 'Extensão', CATEGORIAS_EVENTOS, None),
+]
+
+DISCIPLINAS = [
+    'Cálculo I', 'Cálculo II', 'Álgebra Linear', 'Física Geral', 'Química Orgânica',
+    'Estatística', 'Programação', 'Banco de Dados', 'Redes', 'Sistemas Operacionais',
+    'Metodologia Científica', 'Ética', 'Economia', 'Direito Constitucional', 'Anatomia',
+    'Bioquímica', 'Literatura', 'História do Brasil', 'Geografia', 'Inglês Instrumental',
+]
+TEMAS = [
+    'Colegiado', 'Planejamento', 'Núcleo Docente', 'Congregação', 'Pesquisa',
+    'Extensão', 'Avaliação Institucional', 'Estágios', 'Laboratórios', 'Biblioteca',
+]
+CORES = [
+    '#3788d8', '#d81b60', '#8e24aa', '#4caf50', '#ff9800', '#607d8b',
+    '#00897B', '#DB4437', '#AB47BC', '#795548', '#455A64', '#4285F4',
+]
+
+FERIADOS_FIXOS = [
+    (1, 1, 'Confraternização Universal'), (4, 21, 'Tiradentes'), (5, 1, 'Dia do Trabalho'),
+    (9, 7, 'Independência do Brasil'), (10, 12, 'Nossa Senhora Aparecida'), (11, 2, 'Finados'),
+    (11, 15, 'Proclamação da República'), (11, 20, 'Consciência Negra'), (12, 25, 'Natal'),
+]
+
+
+def pascoa(ano):
+    """Domingo de Páscoa (algoritmo de Meeus/Jones/Butcher, calendário gregoriano)"""
+    a, b, c = ano % 19, ano // 100, ano % 100
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mes, dia = divmod(h + l - 7 * m + 114, 31)
+    return date(ano, mes, dia + 1)
+
+
+def feriados(ano):
+    """Feriados nacionais do ano: (nome, início, fim), com o Carnaval de segunda a terça"""
+    domingo = pascoa(ano)
+    lista = [(nome, date(ano, mes, dia), date(ano, mes, dia)) for mes, dia, nome in FERIADOS_FIXOS]
+    lista += [
+        ('Carnaval', domingo - timedelta(days=48), domingo - timedelta(days=47)),
+        ('Sexta-feira Santa', domingo - timedelta(days=2), domingo - timedelta(days=2)),
+        ('Corpus Christi', domingo + timedelta(days=60), domingo + timedelta(days=60)),
+    ]
+    return sorted(lista, key=lambda feriado: feriado[1])
+
+
+def periodos_do_ano(ano):
+    """(descrição, início, fim, é semestre letivo)"""
+    return [
+        (f'1º Semestre {ano}', date(ano, 2, 1), date(ano, 7, 15), True),
+        (f'Recesso Julho {ano}', date(ano, 7, 16), date(ano, 7, 31), False),
+        (f'2º Semestre {ano}', date(ano, 8, 1), date(ano, 12, 20), True),
+        (f'Férias Verão {ano}', date(ano, 12, 21), date(ano + 1, 1, 31), False),
+    ]
+
+
+def _dias_da_semana(inicio, fim, dias):
+    """Datas entre inicio e fim cujo dia da semana (1=Segunda ... 7=Domingo) está em 'dias'"""
+    return [inicio + timedelta(days=n) for n in range((fim - inicio).days + 1)
+            if str((inicio + timedelta(days=n)).isoweekday()) in dias]
+
+
+def _alocar_local(ocupacao, campus, espaco, inicio, fim):
+    """Primeiro espaço do campus livre em todos os dias do intervalo (sem conflito de local)"""
+    dias = [inicio + timedelta(days=n) for n in range((fim - inicio).days + 1)]
+    numero = 1
+    while any((campus, espaco, numero, dia) in ocupacao for dia in dias):
+        numero += 1
+    ocupacao.update((campus, espaco, numero, dia) for dia in dias)
+    return f'Campus {campus} - {espaco} {numero}'
+
+
+def gerar_estrutura(escala, anos, ano_inicial, aleatorio):
+    """
+    Períodos, tipos, calendários e categorias, com ids explícitos.
+    Retorna as linhas de cada tabela e, para cada categoria, o que a geração de eventos precisa.
+    """
+    periodos, tipos, calendarios, categorias, geracao = [], [], [], [], []
+    semestres = {}
+    for ano in range(ano_inicial, ano_inicial + anos):
+        for descricao, inicio, fim, letivo in periodos_do_ano(ano):
+            periodos.append({'id_periodo': len(periodos) + 1, 'descricao': descricao,
+                             'datainicial': inicio, 'datafinal': fim})
+            if letivo:
+                semestres.setdefault(ano, []).append(periodos[-1])
+
+    for campus in range(1, escala + 1):
+        for prefixo, nome, _, _ in TIPOS:
+            tipos.append({'id_tipo': len(tipos) + 1, 'sigla': f'{prefixo}{campus:02d}',
+                          'nome': f'{nome} - Campus {campus}'[:30]})
+
+    ano_final = ano_inicial + anos - 1
+    for ano in range(ano_inicial, ano_inicial + anos):
+        for campus in range(1, escala + 1):
+            for indice, (prefixo, nome, modelos, dias_aula) in enumerate(TIPOS):
+                id_calendario = len(calendarios) + 1
+                calendarios.append({
+                    'id_calendario': id_calendario,
+                    'id_tipo': (campus - 1) * len(TIPOS) + indice + 1,
+                    'nome': f'{nome} C{campus:02d} {ano}'[:30],
+                    'ano': ano, 'datainicio': date(ano, 1, 1), 'datafim': date(ano, 12, 31),
+                    'ativo': ano == ano_final,
+                })
+                for periodo in semestres[ano]:
+                    for nome_categoria, dias, total_dias, contagem, tipo_geracao in modelos:
+                        if tipo_geracao == 'aulas':
+                            dias = dias_aula
+                        categorias.append({
+                            'id_categoria': len(categorias) + 1, 'id_calendario': id_calendario,
+                            'id_periodo': periodo['id_periodo'], 'nome': nome_categoria,
+                            'corassociada': aleatorio.choice(CORES), 'totaldias': total_dias,
+                            'diassemanasvalidos': dias, 'habilitacaocontagem': contagem,
+                        })
+                        geracao.append((categorias[-1], periodo, campus, ano, tipo_geracao))
+    return periodos, tipos, calendarios, categorias, geracao
+
+
+def gerar_eventos(geracao, aleatorio):
+    """Gera as linhas de eventos, categoria por categoria, sem manter a lista em memória"""
+    id_evento = 0
+    ocupacao, ano_ocupacao = set(), None
+
+    for categoria, periodo, campus, ano, tipo_geracao in geracao:
+        # Locais só conflitam dentro do mesmo ano: a ocupação das salas é descartada a cada ano
+        if ano != ano_ocupacao:
+            ocupacao, ano_ocupacao = set(), ano
+
+        inicio, fim = periodo['datainicial'], periodo['datafinal']
+        dias_validos = _dias_da_semana(inicio, fim, categoria['diassemanasvalidos'])
+        uteis = _dias_da_semana(inicio, fim, '12345')
+        eventos = []
+
+        def evento(titulo, datainicio, datafim, local=None, descricao=None, **recorrencia):
+            eventos.append({
+                'id_categoria': categoria['id_categoria'], 'titulo': titulo[:100],
+                'descricao': descricao, 'datainicio': datainicio, 'datafim': datafim,
+                'dia_todo': datainicio == datafim, 'local': local,
+                'recorrenciadias': recorrencia.get('dias'),
+                'recorrenciaintervalo': recorrencia.get('intervalo'),
+                'recorrenciacontagem': None, 'recorrenciaexcecoes': None,
+            })
+
+        def avulso(titulo, dia):
+            evento(titulo, dia, dia, _alocar_local(ocupacao, campus, 'Sala', dia, dia))
+
+        if tipo_geracao == 'aulas':
+            evento(f"Período Letivo - {periodo['descricao']}", dias_validos[0], dias_validos[-1],
+                   descricao='Aulas regulares do semestre')
+            for numero in range(1, aleatorio.randint(50, 70) + 1):
+                avulso(f'{aleatorio.choice(DISCIPLINAS)} - Aula {numero}', aleatorio.choice(dias_validos))
+        elif tipo_geracao == 'provas':
+            for titulo, semana in (('Avaliação P1', 9), ('Avaliação P2', -3)):
+                segunda = uteis[0] + timedelta(weeks=semana) if semana > 0 else uteis[-1] + timedelta(weeks=semana)
+                segunda -= timedelta(days=segunda.weekday())
+                evento(titulo, segunda, segunda + timedelta(days=4), descricao='Semana de avaliações')
+            for numero in range(1, aleatorio.randint(4, 8) + 1):
+                avulso(f'Prova de {aleatorio.choice(DISCIPLINAS)} {numero}', aleatorio.choice(uteis))
+        elif tipo_geracao == 'feriados':
+            for nome, datainicio, datafim in feriados(ano):
+                if inicio <= datainicio and datafim <= fim:
+                    evento(nome, datainicio, datafim, descricao='Feriado nacional')
+        elif tipo_geracao == 'reunioes':
+            evento('Reunião semanal', uteis[0], uteis[-1], descricao='Reunião periódica',
+                   dias=aleatorio.choice('12345'), intervalo=aleatorio.choice([1, 2]))
+            for numero in range(1, aleatorio.randint(5, 10) + 1):
+                avulso(f'Reunião de {aleatorio.choice(TEMAS)} {numero}', aleatorio.choice(uteis))
+        elif tipo_geracao == 'avulsos':
+            for numero in range(1, aleatorio.randint(10, 20) + 1):
+                avulso(f"{categoria['nome']} - {aleatorio.choice(TEMAS)} {numero}", aleatorio.choice(dias_validos))
+        elif tipo_geracao == 'congressos':
+            for numero in range(1, aleatorio.randint(2, 4) + 1):
+                datainicio = aleatorio.choice(dias_validos[:-4])
+                datafim = datainicio + timedelta(days=aleatorio.randint(1, 3))
+                evento(f'Congresso de {aleatorio.choice(TEMAS)} {numero}', datainicio, datafim,
+                       _alocar_local(ocupacao, campus, 'Auditório', datainicio, datafim))
+
+        for linha in eventos:
+            id_evento += 1
+            yield {'id_evento': id_evento, **linha}
+
+
+def _lotes(linhas, tamanho):
+    linhas = iter(linhas)
+    while True:
+        lote = list(islice(linhas, tamanho))
+        if not lote:
+            return
+        yield lote
+
+
+def _copiar(conexao, tabela, lote):
+    """COPY ... FROM STDIN (formato CSV: campo vazio sem aspas é NULL)"""
+    colunas = list(lote[0])
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows([linha[c] for c in colunas] for linha in lote)
+    buffer.seek(0)
+    cursor = conexao.connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {tabela.name} ({', '.join(colunas)}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+
+
+def inserir_em_lotes(conexao, tabela, linhas):
+    """Insere as linhas (qualquer iterável de dicts); retorna (total de linhas, segundos)"""
+    inicio = time.perf_counter()
+    total = 0
+    if conexao.dialect.name == 'postgresql':
+        for lote in _lotes(linhas, LINHAS_POR_COPY):
+            _copiar(conexao, tabela, lote)
+            total += len(lote)
+    else:
+        for lote in _lotes(linhas, LINHAS_POR_LOTE):
+            conexao.execute(insert(tabela), lote)
+            total += len(lote)
+    return total, time.perf_counter() - inicio
+
+
+def _limpar(conexao):
+    tabelas = list(reversed(db.metadata.sorted_tables))
+    if conexao.dialect.name == 'postgresql':
+        # TRUNCATE não passa pelas regras ON DELETE (ex.: impedir_delete_periodo_utilizado)
+        conexao.execute(text(f"TRUNCATE {', '.join(t.name for t in tabelas)} RESTART IDENTITY CASCADE"))
+    else:
+        for tabela in tabelas:
+            conexao.execute(delete(tabela))
+
+
+def _ajustar_sequencias(conexao, modelos):
+    """Com ids explícitos, as sequências do PostgreSQL precisam continuar do maior id"""
+    if conexao.dialect.name != 'postgresql':
+        return
+    for modelo in modelos:
+        tabela = modelo.__table__
+        coluna = tabela.primary_key.columns.values()[0].name
+        conexao.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{tabela.name}', '{coluna}'), "
+            f"COALESCE((SELECT MAX({coluna}) FROM {tabela.name}), 0) + 1, false)"
+        ))
+
+
+def gerar_dados_sinteticos(escala, anos, semente=42, ano_inicial=2025):
+    """
+    Substitui os dados do banco pelo conjunto sintético.
+    Retorna [(tabela, linhas, segundos)], incluindo a reconstrução dos contadores.
+    """
+    from app.services.contagem import recalcular_todas_contagens
+
+    aleatorio = random.Random(semente)
+    periodos, tipos, calendarios, categorias, geracao = gerar_estrutura(escala, anos, ano_inicial, aleatorio)
+
+    conexao = db.session.connection()
+    _limpar(conexao)
+    resultados = []
+    for modelo, linhas in ((Periodo, periodos), (TipoCalendario, tipos), (Calendario, calendarios),
+                           (CategoriaCalendario, categorias), (Eventos, gerar_eventos(geracao, aleatorio))):
+        resultados.append((modelo.__tablename__, *inserir_em_lotes(conexao, modelo.__table__, linhas)))
+    _ajustar_sequencias(conexao, (Periodo, TipoCalendario, Calendario, CategoriaCalendario, Eventos))
+
+    agora = datetime.now()
+    resultados.append((VersaoCalendario.__tablename__, *inserir_em_lotes(
+        conexao, VersaoCalendario.__table__,
+        ({'id_calendario': c['id_calendario'], 'versao': 1, 'atualizadoem': agora} for c in calendarios))))
+
+    # Contadores de dias e mapas de ocupação a partir dos eventos inseridos (faz o commit)
+    inicio = time.perf_counter()
+    recalcular_todas_contagens()
+    resultados.append(('contagemcategoria + ocupacaocategoria', len(categorias), time.perf_counter() - inicio))
+    return resultados
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Mostra os planos de execução (EXPLAIN) das consultas mais frequentes da aplicação.
+
+As consultas são montadas como nas rotas (main.index, evento_routes, relatorio_routes)
+e nas visões vw_*, e explicadas no banco configurado: EXPLAIN no PostgreSQL,
+EXPLAIN QUERY PLAN no SQLite. Rode depois de mudar índices ou consultas e compare
+a saída para ver regressões (ex.: um "Seq Scan"/"SCAN eventos" que antes usava índice).
+
+Uso:
+    python app/scripts/explicar_consultas.py [--analyze]
+"""
+import argparse
+import os
+import sys
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy import desc, func, inspect, text
+
+from app import create_app, db
+from app.models.models import Calendario, CategoriaCalendario, Eventos, Periodo
+from app.services.paginacao import POR_PAGINA_PADRAO, depois_de
+
+VISOES = [
+    'vw_eventos_ativos_hoje', 'vw_dias_letivos', 'vw_resumo_calendario', 'vw_feriados_dias_letivos',
+    'vw_eventos_futuros_ativos', 'vw_feriados_do_ano', 'vw_dias_letivos_por_periodo',
+]
+
+
+def consultas_frequentes():
+    """Lista (descrição, consulta) com valores de exemplo tirados do próprio banco"""
+    hoje = date.today()
+    id_calendario = db.session.query(func.min(Calendario.id_calendario)).scalar() or 1
+    id_categoria = db.session.query(func.min(CategoriaCalendario.id_categoria)).scalar() or 1
+    inicio, fim = date(hoje.year, 1, 1), date(hoje.year, 12, 31)
+
+    return [
+        ('main.index: calendários ativos',
+         Calendario.query.filter_by(ativo=True)),
+        ('main.index: categorias de um calendário',
+         CategoriaCalendario.query.filter_by(id_calendario=id_calendario)),
+        ('main.index: eventos de uma categoria',
+         Eventos.query.filter_by(id_categoria=id_categoria)),
+        ('main.index: eventos recentes',
+         Eventos.query.order_by(desc(Eventos.datainicio)).limit(5)),
+        ('main.index: eventos próximos',
+         Eventos.query.filter(Eventos.datainicio >= hoje).order_by(Eventos.datainicio).limit(10)),
+        ('evento.listar: página por chave (datainicio, id_evento)',
+         Eventos.query.filter(depois_de([Eventos.datainicio, Eventos.id_evento], [inicio, 0]))
+         .order_by(Eventos.datainicio, Eventos.id_evento).limit(POR_PAGINA_PADRAO + 1)),
+        ('evento.eventos_calendario: eventos das categorias do calendário',
+         Eventos.query.filter(Eventos.id_categoria.in_(
+             db.session.query(CategoriaCalendario.id_categoria).filter_by(id_calendario=id_calendario)))),
+        ('evento.relatorio_calendario: eventos da categoria por data',
+         Eventos.query.filter_by(id_categoria=id_categoria).order_by(Eventos.datainicio)),
+        ('evento.verificar_conflitos: sobreposição na categoria',
+         Eventos.query.filter(Eventos.id_categoria == id_categoria,
+                              Eventos.datainicio <= fim, Eventos.datafim >= inicio)),
+        ('conflitos (escopo local): sobreposição no local',
+         Eventos.query.filter(func.lower(func.trim(Eventos.local)) == 'sala 101',
+                              Eventos.datainicio <= fim, Eventos.datafim >= inicio)),
+        ('relatorio.eventos_ativos_alternativo',
+         db.session.query(Eventos)
+         .join(CategoriaCalendario, Eventos.id_categoria == CategoriaCalendario.id_categoria)
+         .join(Calendario, CategoriaCalendario.id_calendario == Calendario.id_calendario)
+         .join(Periodo, CategoriaCalendario.id_periodo == Periodo.id_periodo)
+         .filter(Calendario.ativo == True)
+         .filter(hoje >= Periodo.datainicial)
+         .filter(hoje <= Periodo.datafinal)
+         .filter(Eventos.datainicio >= hoje)
+         .order_by(Eventos.datainicio)),
+    ]
+
+
+def explicar(sql, analyze=False):
+    """Retorna as linhas do plano de execução de um SQL"""
+    if db.engine.name == 'postgresql':
+        prefixo = 'EXPLAIN (ANALYZE, BUFFERS) ' if analyze else 'EXPLAIN '
+        return [linha[0] for linha in db.session.execute(text(prefixo + sql))]
+    linhas = db.session.execute(text('EXPLAIN QUERY PLAN ' + sql)).all()
+    return [f"{'  ' * (linha[1] != 0)}{linha[-1]}" for linha in linhas]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Planos de execução das consultas frequentes')
+    parser.add_argument('--analyze', action='store_true', help='PostgreSQL: executa as consultas (EXPLAIN ANALYZE)')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        print(f"Banco: {db.engine.name}")
+
+        for descricao, consulta in consultas_frequentes():
+            sql = str(consulta.statement.compile(db.engine, compile_kwargs={'literal_binds': True}))
+            print(f"\n=== {descricao}")
+            for linha in explicar(sql, args.analyze):
+                print(f"  {linha}")
+
+        visoes = set(inspect(db.engine).get_view_names())
+        for visao in VISOES:
+            if visao not in visoes:
+                print(f"\n=== {visao}: visão não existe (execute 'flask init-advanced-features')")
+                continue
+            print(f"\n=== {visao}")
+            for linha in explicar(f"SELECT * FROM {visao}", args.analyze):
+                print(f"  {linha}")
+
+
+if __name__ == '__main__':
+    main()
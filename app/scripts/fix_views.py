@@ -7,12 +7,15 @@ from sqlalchemy import create_engine, text, inspect
 from sqlalchemy.exc import SQLAlchemyError
 from dotenv import load_dotenv
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from app.config import caminho_sqlite
+
 def get_connection_string():
     """Obter string de conexão do banco de dados"""
     load_dotenv()
     if os.environ.get('USE_SQLITE', 'False').lower() == 'true':
-        db_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 
-                              'instance', 'calendario_academico.db')
+        # O mesmo arquivo que a aplicação usa (app.config.caminho_sqlite)
+        db_path = caminho_sqlite()
         conn_string = f'sqlite:///{db_path}'
         db_type = 'sqlite'
         direct_path = db_path
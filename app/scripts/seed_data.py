@@ -1,5 +1,5 @@
 from app import create_app, db
-from app.models.models import Periodo, TipoCalendario, Calendario, CategoriaCalendario, Eventos
+from app.models.models import Periodo, TipoCalendario, Calendario, CategoriaCalendario, Eventos, ContagemCategoria, OcupacaoCategoria, VersaoCalendario
 from datetime import datetime, timedelta
 from sqlalchemy.exc import SQLAlchemyError
 
@@ -9,7 +9,10 @@ def seed_database():
         try:
             # Limpar dados existentes
             Eventos.query.delete()
+            ContagemCategoria.query.delete()
+            OcupacaoCategoria.query.delete()
             CategoriaCalendario.query.delete()
+            VersaoCalendario.query.delete()
             Calendario.query.delete()
             TipoCalendario.query.delete()
             Periodo.query.delete()
@@ -31,15 +31,8 @@ def setup_db_features():
 def clean_sqlite_views():
     """Remove manualmente as views existentes do SQLite."""
     try:
-        # Obter o caminho do arquivo do banco de dados
-        db_path = db.engine.url.database
-        if db_path.startswith('/'):
-            # Caminho absoluto
-            file_path = db_path
-        else:
-            # Caminho relativo
-            base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-            file_path = os.path.join(base_dir, db_path)
+        # Caminho absoluto do arquivo do banco (app.config.caminho_sqlite)
+        file_path = db.engine.url.database
             
         logger.info(f"Conectando diretamente ao SQLite em: {file_path}")
         
@@ -99,6 +92,8 @@ def setup_postgresql_features():
         """))
         
         # 2. Total de Dias Letivos
+        # Os dias com eventos vêm dos mapas de ocupação (ocupacaocategoria.diasocupados),
+        # sem varrer a tabela de eventos com COUNT(DISTINCT)
         db.session.execute(text("""
         CREATE OR REPLACE VIEW vw_dias_letivos AS
         SELECT 
@@ -106,22 +101,30 @@ def setup_postgresql_features():
             c.nome AS calendario,
             cc.nome AS categoria,
             cc.totaldias AS dias_planejados,
-            COUNT(DISTINCT e.datainicio) AS dias_com_eventos,
-            SUM(CASE WHEN e.datainicio BETWEEN CURRENT_DATE - 30 AND CURRENT_DATE THEN 1 ELSE 0 END) AS eventos_ultimos_30_dias
+            COALESCE((
+                SELECT SUM(o.diasocupados)
+                FROM ocupacaocategoria o
+                WHERE o.id_categoria = cc.id_categoria
+            ), 0) AS dias_com_eventos,
+            (
+                SELECT COUNT(*)
+                FROM eventos e
+                WHERE e.id_categoria = cc.id_categoria
+                  AND e.datainicio BETWEEN CURRENT_DATE - 30 AND CURRENT_DATE
+            ) AS eventos_ultimos_30_dias,
+            -- Identificam a linha e a ordenam na visão materializada mv_dias_letivos
+            cc.id_categoria,
+            p.datainicial
         FROM 
             periodo p
         JOIN 
             categoriacalendario cc ON p.id_periodo = cc.id_periodo
         JOIN 
             calendario c ON cc.id_calendario = c.id_calendario
-        LEFT JOIN 
-            eventos e ON cc.id_categoria = e.id_categoria
         WHERE 
             cc.habilitacaocontagem = true
             AND cc.nome NOT LIKE '%Feriados%'
             AND cc.nome NOT LIKE '%Recessos%'
-        GROUP BY 
-            p.descricao, c.nome, cc.nome, cc.totaldias, p.datainicial
         ORDER BY 
             c.nome, p.datainicial;
         """))
@@ -392,35 +395,353 @@ def setup_postgresql_features():
         """))
         
         # 4. Impedir conflito local eventos
+        # Eventos não recorrentes: restrição de exclusão GiST (indexada e segura sob concorrência).
+        # Eventos recorrentes: gatilho que compara as ocorrências, apoiado por um índice GiST.
+        # O gatilho é de restrição, adiado para o COMMIT: linhas gravadas no mesmo flush
+        # (ou no mesmo comando) já se enxergam quando a verificação roda.
         db.session.execute(text("""
-        CREATE OR REPLACE FUNCTION impedir_conflito_local_eventos()
+        CREATE EXTENSION IF NOT EXISTS btree_gist;
+        
+        DROP TRIGGER IF EXISTS trigger_impedir_conflito_local ON eventos;
+        DROP FUNCTION IF EXISTS impedir_conflito_local_eventos();
+        
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'excl_eventos_local_periodo') THEN
+                ALTER TABLE eventos ADD CONSTRAINT excl_eventos_local_periodo
+                EXCLUDE USING gist (local WITH =, daterange(datainicio, datafim, '[]') WITH &&)
+                WHERE (local IS NOT NULL AND COALESCE(recorrenciadias, '') = '');
+            END IF;
+        END $$;
+        
+        CREATE INDEX IF NOT EXISTS ix_eventos_local_recorrentes
+        ON eventos USING gist (local, daterange(datainicio, datafim, '[]'))
+        WHERE local IS NOT NULL AND COALESCE(recorrenciadias, '') <> '';
+        
+        CREATE OR REPLACE FUNCTION impedir_conflito_local_recorrente()
         RETURNS TRIGGER AS $$
+        DECLARE
+            atual eventos%ROWTYPE;
+            conflito BOOLEAN;
         BEGIN
-          IF EXISTS (
-            SELECT 1
-            FROM eventos e
-            WHERE 
-              e.local IS NOT NULL
-              AND e.local = NEW.local
-              AND e.id_evento <> COALESCE(NEW.id_evento, -1)
-              AND e.datainicio <= NEW.datafim
-              AND e.datafim >= NEW.datainicio
-          ) THEN
+          -- Verificação adiada: vale a versão atual da linha (pode ter mudado ou sido removida
+          -- depois do comando que enfileirou o gatilho)
+          SELECT * INTO atual FROM eventos WHERE id_evento = NEW.id_evento;
+          IF NOT FOUND OR atual.local IS NULL THEN
+            RETURN NULL;
+          END IF;
+          
+          IF COALESCE(atual.recorrenciadias, '') = '' THEN
+            -- Não recorrente: o conflito com outro não recorrente é barrado pela restrição de
+            -- exclusão, então só os recorrentes do local são consultados (índice parcial
+            -- ix_eventos_local_recorrentes). A trava compartilhada não serializa os não
+            -- recorrentes entre si, só com as gravações de recorrentes do mesmo local
+            PERFORM pg_advisory_xact_lock_shared(hashtext('eventos.local'), hashtext(atual.local));
+            conflito := EXISTS (
+              SELECT 1
+              FROM eventos e
+              WHERE
+                e.local = atual.local
+                AND COALESCE(e.recorrenciadias, '') <> ''
+                AND daterange(e.datainicio, e.datafim, '[]') && daterange(atual.datainicio, atual.datafim, '[]')
+                AND EXISTS (
+                  SELECT 1
+                  FROM dias_do_evento(e.datainicio, e.datafim, e.recorrenciadias, e.recorrenciaintervalo,
+                                      e.recorrenciacontagem, e.recorrenciaexcecoes) AS d
+                  WHERE d BETWEEN atual.datainicio AND atual.datafim
+                )
+            );
+          ELSE
+            -- Recorrente: trava exclusiva do local e comparação com todos os eventos dele
+            PERFORM pg_advisory_xact_lock(hashtext('eventos.local'), hashtext(atual.local));
+            conflito := EXISTS (
+              SELECT 1
+              FROM eventos e
+              WHERE
+                e.local = atual.local
+                AND e.id_evento <> atual.id_evento
+                AND daterange(e.datainicio, e.datafim, '[]') && daterange(atual.datainicio, atual.datafim, '[]')
+                -- Eventos recorrentes só conflitam se alguma ocorrência cair no mesmo dia
+                AND EXISTS (
+                  SELECT 1
+                  FROM dias_do_evento(e.datainicio, e.datafim, e.recorrenciadias, e.recorrenciaintervalo,
+                                      e.recorrenciacontagem, e.recorrenciaexcecoes) AS d
+                  WHERE d IN (SELECT dias_do_evento(atual.datainicio, atual.datafim, atual.recorrenciadias,
+                                                    atual.recorrenciaintervalo, atual.recorrenciacontagem,
+                                                    atual.recorrenciaexcecoes))
+                )
+            );
+          END IF;
+
+          IF conflito THEN
             RAISE EXCEPTION 'Conflito detectado: já existe um evento agendado nesse local e período.';
           END IF;
-          RETURN NEW;
+          RETURN NULL;
         END;
         $$ LANGUAGE plpgsql;
         
-        DROP TRIGGER IF EXISTS trigger_impedir_conflito_local ON eventos;
-        CREATE TRIGGER trigger_impedir_conflito_local
-        BEFORE INSERT OR UPDATE ON eventos
+        DROP TRIGGER IF EXISTS trigger_conflito_local_recorrente ON eventos;
+        CREATE CONSTRAINT TRIGGER trigger_conflito_local_recorrente
+        AFTER INSERT OR UPDATE OF local, datainicio, datafim, recorrenciadias, recorrenciaintervalo,
+                                  recorrenciacontagem, recorrenciaexcecoes ON eventos
+        DEFERRABLE INITIALLY DEFERRED
         FOR EACH ROW
-        EXECUTE FUNCTION impedir_conflito_local_eventos();
+        WHEN (NEW.local IS NOT NULL)
+        EXECUTE FUNCTION impedir_conflito_local_recorrente();
+        """))
+        
+        # 5. Manter os contadores de dias por categoria (tabela contagemcategoria)
+        # Gatilhos por comando (FOR EACH STATEMENT) com tabelas de transição: um INSERT,
+        # UPDATE ou DELETE de várias linhas (como os do insertmanyvalues do SQLAlchemy)
+        # aplica de uma vez a variação de todas as linhas, recontando só os dias das
+        # janelas de datas que elas tocam.
+        db.session.execute(text("""
+        -- Dias cobertos por um evento, respeitando a regra de recorrência (ver app/services/recorrencia.py):
+        -- dias da semana (ISO), semanas a cada 'intervalo' a partir da semana do início, no máximo
+        -- 'contagem' ocorrências (as exceções contam) e sem as datas de 'excecoes'
+        CREATE OR REPLACE FUNCTION dias_do_evento(inicio DATE, fim DATE, dias TEXT, intervalo INTEGER,
+                                                  contagem INTEGER, excecoes TEXT)
+        RETURNS SETOF DATE AS $$
+            SELECT serie.d
+            FROM (
+                SELECT inicio + i AS d, row_number() OVER (ORDER BY i) AS numero
+                FROM generate_series(0, fim - inicio) AS i
+                WHERE COALESCE(dias, '') = ''
+                   OR (POSITION(EXTRACT(ISODOW FROM inicio + i)::INTEGER::TEXT IN dias) > 0
+                       -- semanas desde a segunda-feira da semana do início
+                       AND ((i + EXTRACT(ISODOW FROM inicio)::INTEGER - 1) / 7)
+                           % GREATEST(COALESCE(intervalo, 1), 1) = 0)
+            ) AS serie
+            WHERE COALESCE(dias, '') = ''
+               OR ((COALESCE(contagem, 0) <= 0 OR serie.numero <= contagem)
+                   AND NOT (serie.d::TEXT = ANY(regexp_split_to_array(COALESCE(excecoes, ''), '[[:space:],;]+'))));
+        $$ LANGUAGE sql IMMUTABLE;
+        
+        -- Versões anteriores: variação calculada linha a linha
+        DROP TRIGGER IF EXISTS trg_contagem_eventos ON eventos;
+        DROP FUNCTION IF EXISTS dias_exclusivos_evento(eventos);
+        DROP FUNCTION IF EXISTS dias_exclusivos_evento(INTEGER, INTEGER, DATE, DATE);
+        DROP FUNCTION IF EXISTS aplicar_variacao_contagem(INTEGER, INTEGER, INTEGER);
+        
+        -- Caminho lento: recalcula do zero os contadores das categorias (sem contador prévio,
+        -- ou quando os dias válidos da categoria mudam)
+        CREATE OR REPLACE FUNCTION recalcular_contagem_categorias(ids INTEGER[])
+        RETURNS VOID AS $$
+            INSERT INTO contagemcategoria (id_categoria, diasvalidos, totaleventos, atualizadoem)
+            SELECT
+                cc.id_categoria,
+                (SELECT COUNT(DISTINCT d)
+                 FROM eventos e
+                 CROSS JOIN LATERAL dias_do_evento(e.datainicio, e.datafim, e.recorrenciadias,
+                                                   e.recorrenciaintervalo, e.recorrenciacontagem,
+                                                   e.recorrenciaexcecoes) AS d
+                 WHERE e.id_categoria = cc.id_categoria
+                   AND POSITION(EXTRACT(ISODOW FROM d)::INTEGER::TEXT IN COALESCE(cc.diassemanasvalidos, '')) > 0),
+                (SELECT COUNT(*) FROM eventos e WHERE e.id_categoria = cc.id_categoria),
+                NOW()
+            FROM categoriacalendario cc
+            WHERE cc.id_categoria = ANY(ids)
+            ON CONFLICT (id_categoria) DO UPDATE
+            SET diasvalidos = EXCLUDED.diasvalidos,
+                totaleventos = EXCLUDED.totaleventos,
+                atualizadoem = EXCLUDED.atualizadoem;
+        $$ LANGUAGE sql;
+        
+        CREATE OR REPLACE FUNCTION recalcular_contagem_categoria(id_cat INTEGER)
+        RETURNS VOID AS $$
+            SELECT recalcular_contagem_categorias(ARRAY[id_cat]);
+        $$ LANGUAGE sql;
+        
+        -- Variação dos contadores causada por um comando, olhando só as janelas de datas das
+        -- linhas alteradas (o mesmo cálculo de _variacao_dias em app/services/contagem.py).
+        -- O estado posterior é a tabela (o comando já foi aplicado); o anterior é ela sem as
+        -- linhas novas, mais as antigas. Cada dia válido de uma janela conta como coberto
+        -- antes e/ou depois, e a variação é a diferença entre as duas contagens.
+        CREATE OR REPLACE FUNCTION aplicar_variacao_contagem(antigos eventos[], novos eventos[])
+        RETURNS VOID AS $$
+        DECLARE
+            sem_contador INTEGER[];
+        BEGIN
+            UPDATE contagemcategoria c
+            SET diasvalidos = c.diasvalidos + v.dias,
+                totaleventos = c.totaleventos + v.eventos,
+                atualizadoem = NOW()
+            FROM (
+                WITH alterados AS (
+                    SELECT a.*, -1 AS sinal FROM unnest(antigos) AS a
+                    UNION ALL
+                    SELECT n.*, 1 AS sinal FROM unnest(novos) AS n
+                ),
+                janelas AS (
+                    SELECT DISTINCT a.id_categoria, a.datainicio, a.datafim, cc.diassemanasvalidos
+                    FROM alterados a
+                    JOIN categoriacalendario cc ON cc.id_categoria = a.id_categoria
+                ),
+                dias_janelas AS (
+                    SELECT DISTINCT j.id_categoria, j.datainicio + i AS d
+                    FROM janelas j
+                    CROSS JOIN LATERAL generate_series(0, j.datafim - j.datainicio) AS i
+                    WHERE POSITION(EXTRACT(ISODOW FROM j.datainicio + i)::INTEGER::TEXT
+                                   IN COALESCE(j.diassemanasvalidos, '')) > 0
+                ),
+                estados AS MATERIALIZED (
+                    -- Linhas atuais que tocam alguma janela (pelo índice de categoria e período): valem
+                    -- depois e, se não são novas, antes. Repetições não mudam o bool_or abaixo
+                    SELECT e.id_categoria, e.datainicio, e.datafim, e.recorrenciadias, e.recorrenciaintervalo,
+                           e.recorrenciacontagem, e.recorrenciaexcecoes,
+                           TRUE AS depois, e.id_evento <> ALL(ARRAY(SELECT n.id_evento FROM unnest(novos) AS n)) AS antes
+                    FROM janelas j
+                    JOIN eventos e ON e.id_categoria = j.id_categoria
+                                  AND e.datainicio <= j.datafim AND e.datafim >= j.datainicio
+                    UNION ALL
+                    SELECT a.id_categoria, a.datainicio, a.datafim, a.recorrenciadias, a.recorrenciaintervalo,
+                           a.recorrenciacontagem, a.recorrenciaexcecoes, FALSE, TRUE
+                    FROM unnest(antigos) AS a
+                ),
+                cobertura AS (
+                    SELECT dj.id_categoria, dj.d, bool_or(s.depois) AS depois, bool_or(s.antes) AS antes
+                    FROM estados s
+                    CROSS JOIN LATERAL dias_do_evento(s.datainicio, s.datafim, s.recorrenciadias,
+                                                      s.recorrenciaintervalo, s.recorrenciacontagem,
+                                                      s.recorrenciaexcecoes) AS dia
+                    JOIN dias_janelas dj ON dj.id_categoria = s.id_categoria AND dj.d = dia
+                    GROUP BY dj.id_categoria, dj.d
+                ),
+                variacao_dias AS (
+                    SELECT id_categoria, SUM(depois::INTEGER - antes::INTEGER) AS dias
+                    FROM cobertura
+                    GROUP BY id_categoria
+                )
+                SELECT t.id_categoria, t.eventos, COALESCE(vd.dias, 0) AS dias
+                FROM (SELECT id_categoria, SUM(sinal) AS eventos FROM alterados GROUP BY id_categoria) AS t
+                LEFT JOIN variacao_dias vd ON vd.id_categoria = t.id_categoria
+            ) AS v
+            WHERE c.id_categoria = v.id_categoria;
+            
+            -- Sem contador prévio não há base para a variação: recalcula do zero
+            sem_contador := ARRAY(
+                SELECT DISTINCT a.id_categoria
+                FROM unnest(antigos || novos) AS a
+                WHERE NOT EXISTS (SELECT 1 FROM contagemcategoria c WHERE c.id_categoria = a.id_categoria)
+            );
+            IF cardinality(sem_contador) > 0 THEN
+                PERFORM recalcular_contagem_categorias(sem_contador);
+            END IF;
+        END;
+        $$ LANGUAGE plpgsql
+        -- O plano não depende do conteúdo das linhas: planejar a cada comando custaria mais que executá-lo
+        SET plan_cache_mode = force_generic_plan;
+        
+        -- Cada gatilho abaixo declara só as tabelas de transição do seu comando
+        CREATE OR REPLACE FUNCTION manter_contagem_eventos()
+        RETURNS TRIGGER AS $$
+        DECLARE
+            -- Linhas das tabelas de transição como eventos[] (atribuídas, não passadas como record[])
+            linhas_antigas eventos[] := '{}';
+            linhas_novas eventos[] := '{}';
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                linhas_novas := ARRAY(SELECT n FROM novos n);
+            ELSIF TG_OP = 'DELETE' THEN
+                linhas_antigas := ARRAY(SELECT a FROM antigos a);
+            ELSE
+                -- Só as linhas em que a categoria, as datas ou a regra de recorrência mudaram
+                linhas_antigas := ARRAY(
+                    SELECT a FROM antigos a JOIN novos n ON n.id_evento = a.id_evento
+                    WHERE (a.id_categoria, a.datainicio, a.datafim, a.recorrenciadias, a.recorrenciaintervalo,
+                           a.recorrenciacontagem, a.recorrenciaexcecoes) IS DISTINCT FROM
+                          (n.id_categoria, n.datainicio, n.datafim, n.recorrenciadias, n.recorrenciaintervalo,
+                           n.recorrenciacontagem, n.recorrenciaexcecoes));
+                linhas_novas := ARRAY(
+                    SELECT n FROM novos n
+                    WHERE n.id_evento = ANY(SELECT (a).id_evento FROM unnest(linhas_antigas) AS a));
+            END IF;
+            
+            IF cardinality(linhas_antigas) + cardinality(linhas_novas) > 0 THEN
+                PERFORM aplicar_variacao_contagem(linhas_antigas, linhas_novas);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+        
+        DROP TRIGGER IF EXISTS trg_contagem_eventos_insert ON eventos;
+        CREATE TRIGGER trg_contagem_eventos_insert
+        AFTER INSERT ON eventos
+        REFERENCING NEW TABLE AS novos
+        FOR EACH STATEMENT
+        EXECUTE FUNCTION manter_contagem_eventos();
+        
+        DROP TRIGGER IF EXISTS trg_contagem_eventos_update ON eventos;
+        CREATE TRIGGER trg_contagem_eventos_update
+        AFTER UPDATE ON eventos
+        REFERENCING OLD TABLE AS antigos NEW TABLE AS novos
+        FOR EACH STATEMENT
+        EXECUTE FUNCTION manter_contagem_eventos();
+        
+        DROP TRIGGER IF EXISTS trg_contagem_eventos_delete ON eventos;
+        CREATE TRIGGER trg_contagem_eventos_delete
+        AFTER DELETE ON eventos
+        REFERENCING OLD TABLE AS antigos
+        FOR EACH STATEMENT
+        EXECUTE FUNCTION manter_contagem_eventos();
+        
+        CREATE OR REPLACE FUNCTION manter_contagem_categoria()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            PERFORM recalcular_contagem_categoria(NEW.id_categoria);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+        
+        DROP TRIGGER IF EXISTS trg_contagem_categoria ON categoriacalendario;
+        CREATE TRIGGER trg_contagem_categoria
+        AFTER INSERT OR UPDATE OF diassemanasvalidos ON categoriacalendario
+        FOR EACH ROW
+        EXECUTE FUNCTION manter_contagem_categoria();
         """))
         
         logger.info("Gatilhos criados com sucesso!")
         
+        # --- VISÕES MATERIALIZADAS ---
+        # Cópias dos relatórios de agregação mais pesados, atualizadas com
+        # REFRESH MATERIALIZED VIEW CONCURRENTLY (ver app/services/relatorios_materializados.py).
+        # O índice único de cada uma é exigido pelo refresh concorrente.
+        logger.info("Criando visões materializadas...")
+        
+        db.session.execute(text("""
+        CREATE TABLE IF NOT EXISTS snapshotrelatorio (
+            visao VARCHAR(63) PRIMARY KEY,
+            atualizadoem TIMESTAMP NOT NULL
+        );
+        
+        CREATE MATERIALIZED VIEW IF NOT EXISTS mv_resumo_calendario AS
+        SELECT * FROM vw_resumo_calendario;
+        CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_resumo_calendario ON mv_resumo_calendario (id_calendario);
+        
+        -- Versão anterior de mv_dias_letivos, com a consulta da visão copiada: recriada a partir dela
+        DO $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM pg_matviews
+                       WHERE matviewname = 'mv_dias_letivos' AND definition NOT LIKE '%vw_dias_letivos%') THEN
+                DROP MATERIALIZED VIEW mv_dias_letivos;
+            END IF;
+        END $$;
+        CREATE MATERIALIZED VIEW IF NOT EXISTS mv_dias_letivos AS
+        SELECT * FROM vw_dias_letivos;
+        CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_dias_letivos ON mv_dias_letivos (id_categoria);
+        
+        CREATE MATERIALIZED VIEW IF NOT EXISTS mv_dias_letivos_por_periodo AS
+        SELECT * FROM vw_dias_letivos_por_periodo;
+        CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_dias_letivos_por_periodo ON mv_dias_letivos_por_periodo (periodo);
+        
+        INSERT INTO snapshotrelatorio (visao, atualizadoem)
+        SELECT matviewname, CURRENT_TIMESTAMP FROM pg_matviews
+        WHERE matviewname IN ('mv_resumo_calendario', 'mv_dias_letivos', 'mv_dias_letivos_por_periodo')
+        ON CONFLICT (visao) DO NOTHING;
+        """))
+        
+        logger.info("Visões materializadas criadas com sucesso!")
+        
         db.session.commit()
         logger.info("✅ Configuração dos recursos avançados do PostgreSQL concluída com sucesso!")
         
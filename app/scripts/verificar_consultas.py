@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Verifica o número de consultas SQL de cada página (detecção de N+1).
+
+Popula um banco SQLite temporário com os dados de exemplo, acessa cada rota pelo
+cliente de teste do Flask contando as consultas (app.services.consultas) e repete
+depois de multiplicar categorias e eventos. Falha se alguma rota passar do máximo
+definido em LIMITES ou se o número de consultas crescer junto com os dados.
+O cache das páginas é desativado para que toda requisição vá ao banco.
+
+Uso:
+    python app/scripts/verificar_consultas.py [--verbose]
+"""
+import argparse
+import os
+import sys
+import tempfile
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# Máximo de consultas por rota ({id} é trocado por um id existente)
+LIMITES = {
+    '/': 3,
+    '/eventos/': 4,
+    '/eventos/api': 3,
+    '/eventos/novo': 4,
+    '/eventos/editar/{evento}': 5,
+    '/eventos/calendario/{calendario}': 6,
+    '/eventos/calendario/{calendario} (XHR)': 6,
+    '/eventos/calendario/{calendario}/feed': 6,
+    '/eventos/calendario/{calendario}/feed?formato=compacto': 6,
+    '/eventos/relatorio/{calendario}': 7,
+    '/eventos/conflitos/{calendario}': 6,
+    '/eventos/conflitos/{calendario}.json?escopo=local': 6,
+    '/categorias/': 4,
+    '/categorias/novo': 5,
+    '/categorias/visualizar/{categoria}': 7,
+    '/calendarios/': 4,
+    '/calendarios/visualizar/{calendario}': 5,
+    '/calendarios/copiar/{calendario}': 5,
+    '/periodos/': 4,
+    '/tipos/': 4,
+    '/relatorios/eventos-ativos-alternativo': 5,
+    '/relatorios/dias-letivos': 6,
+    '/relatorios/feriados-dias-letivos': 5,
+    '/relatorios/feriados-ano': 5,
+    '/relatorios/dias-por-periodo': 5,
+}
+
+
+def multiplicar_dados(vezes=3):
+    """Cria cópias das categorias e dos eventos de cada calendário"""
+    from app import db
+    from app.models.models import CategoriaCalendario, Eventos
+
+    for categoria in CategoriaCalendario.query.all():
+        for i in range(vezes):
+            copia = CategoriaCalendario(
+                id_calendario=categoria.id_calendario, id_periodo=categoria.id_periodo,
+                nome=f'{categoria.nome} {i}', corassociada=f'#{i:02d}{categoria.id_categoria:04d}'[:7],
+                totaldias=categoria.totaldias, diassemanasvalidos=categoria.diassemanasvalidos,
+                habilitacaocontagem=categoria.habilitacaocontagem
+            )
+            db.session.add(copia)
+            db.session.flush()
+            for evento in categoria.eventos:
+                for j in range(vezes):
+                    deslocamento = timedelta(days=j)
+                    db.session.add(Eventos(
+                        id_categoria=copia.id_categoria, titulo=f'{evento.titulo} {j}',
+                        datainicio=evento.datainicio + deslocamento, datafim=evento.datafim + deslocamento,
+                        dia_todo=evento.dia_todo
+                    ))
+    db.session.commit()
+
+
+def medir_rotas(app):
+    """Número de consultas de cada rota de LIMITES"""
+    from app.models.models import Calendario, CategoriaCalendario, Eventos
+    from app.models.views import registro_visoes
+    from app.services.consultas import contar_consultas
+
+    with app.app_context():
+        # O catálogo de visões é consultado uma vez por processo, não por rota
+        registro_visoes.catalogo()
+        ids = {
+            'calendario': Calendario.query.first().id_calendario,
+            'categoria': CategoriaCalendario.query.first().id_categoria,
+            'evento': Eventos.query.first().id_evento,
+        }
+
+    cliente = app.test_client()
+    resultado = {}
+    for rota in LIMITES:
+        url = rota.replace(' (XHR)', '').format(**ids)
+        cabecalhos = {'X-Requested-With': 'XMLHttpRequest'} if rota.endswith('(XHR)') else {}
+        with app.app_context():
+            with contar_consultas() as consultas:
+                resposta = cliente.get(url, headers=cabecalhos)
+        resultado[rota] = (resposta.status_code, consultas.total, consultas.sql)
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Verifica o número de consultas SQL por página')
+    parser.add_argument('--verbose', action='store_true', help='Mostra as consultas das rotas reprovadas')
+    args = parser.parse_args()
+
+    diretorio = tempfile.mkdtemp()
+    os.environ['USE_SQLITE'] = 'False'
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(diretorio, 'consultas.db')}"
+    os.environ['CACHE_TAMANHO'] = '0'
+
+    from app import create_app, db
+    from app.scripts.seed_data import seed_database
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+    seed_database()
+
+    antes = medir_rotas(app)
+    with app.app_context():
+        multiplicar_dados()
+    depois = medir_rotas(app)
+
+    falhas = 0
+    print(f"{'Rota':58s} {'Status':>6s} {'Dados':>6s} {'x3':>6s} {'Máx':>5s}")
+    for rota, limite in LIMITES.items():
+        status, total_antes, _ = antes[rota]
+        _, total_depois, sql = depois[rota]
+        ok = status == 200 and total_antes == total_depois and total_depois <= limite
+        falhas += not ok
+        print(f"{'✅' if ok else '❌'} {rota:56s} {status:6d} {total_antes:6d} {total_depois:6d} {limite:5d}")
+        if not ok and args.verbose:
+            for consulta in sql:
+                print(f"      {' '.join(consulta.split())[:150]}")
+
+    if falhas:
+        print(f"\n❌ {falhas} rota(s) com consultas acima do limite ou crescendo com os dados")
+        sys.exit(1)
+    print("\n✅ Todas as rotas com número constante de consultas")
+
+
+if __name__ == '__main__':
+    main()
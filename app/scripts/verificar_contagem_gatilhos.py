@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Confere, no PostgreSQL, os gatilhos que mantêm os contadores de dias por categoria
+(contagemcategoria, ver scripts/setup.py) em comandos de várias linhas.
+
+Popula o banco indicado com o conjunto sintético (app.scripts.dados_sinteticos),
+instala os recursos de 'flask init-advanced-features' e, numa categoria com dias
+válidos, executa num único comando cada passo: um INSERT de eventos que se
+sobrepõem entre si e aos existentes (inclusive recorrentes), um UPDATE que desloca
+e alonga parte deles e troca outros de categoria e um DELETE de todos. Também
+grava eventos pela sessão do ORM, que o SQLAlchemy envia num único INSERT de
+várias linhas (insertmanyvalues). Depois de cada passo os contadores são
+comparados com o cálculo completo de recalcular_todas_contagens(); falha se algum
+divergir.
+
+ATENÇÃO: os dados do banco indicado são substituídos.
+
+Uso:
+    python app/scripts/verificar_contagem_gatilhos.py [--postgres URL]
+"""
+import argparse
+import os
+import sys
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy import delete, func, insert, select, update
+
+from app import create_app, db
+from app.config import ConfigTeste
+from app.models.models import CategoriaCalendario, Eventos
+from app.scripts.dados_sinteticos import gerar_dados_sinteticos
+from app.scripts.setup import setup_postgresql_features
+from app.services.contagem import recalcular_todas_contagens
+
+tabela_eventos = Eventos.__table__
+
+PREFIXO = 'Verificação de contagem'
+
+
+def categorias_de_teste():
+    """Duas categorias com dias válidos, a primeira com o maior número de eventos"""
+    return db.session.execute(
+        select(CategoriaCalendario.id_categoria)
+        .join(Eventos, Eventos.id_categoria == CategoriaCalendario.id_categoria)
+        .where(func.coalesce(CategoriaCalendario.diassemanasvalidos, '') != '')
+        .group_by(CategoriaCalendario.id_categoria)
+        .order_by(func.count(Eventos.id_evento).desc()).limit(2)
+    ).scalars().all()
+
+
+def eventos_sobrepostos(id_categoria, inicio):
+    """Eventos que se sobrepõem entre si e, nos primeiros dias depois de 'inicio', aos já existentes"""
+    def evento(numero, deslocamento, duracao, **recorrencia):
+        return {
+            'id_categoria': id_categoria, 'titulo': f'{PREFIXO} {numero}', 'dia_todo': True,
+            'datainicio': inicio + timedelta(days=deslocamento),
+            'datafim': inicio + timedelta(days=deslocamento + duracao),
+            'recorrenciadias': None, 'recorrenciaintervalo': None,
+            'recorrenciacontagem': None, 'recorrenciaexcecoes': None, **recorrencia,
+        }
+
+    return [
+        evento(1, 0, 10),
+        evento(2, 5, 10),
+        evento(3, 5, 10),
+        evento(4, 8, 0),
+        evento(5, 0, 60, recorrenciadias='135', recorrenciaintervalo=2),
+        evento(6, 3, 60, recorrenciadias='24', recorrenciacontagem=7,
+               recorrenciaexcecoes=(inicio + timedelta(days=10)).isoformat()),
+    ]
+
+
+def conferir(passo):
+    """Compara os contadores mantidos pelos gatilhos com o cálculo completo (e os reconstrói)"""
+    divergencias = recalcular_todas_contagens()
+    for d in divergencias:
+        print(f"   Categoria {d['id_categoria']} ({d['nome']}): gatilhos {d['armazenado']}, "
+              f"cálculo completo {d['calculado']}")
+    print(f"{'✅' if not divergencias else '❌'} {passo}")
+    return len(divergencias)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Contadores de dias mantidos pelos gatilhos do PostgreSQL')
+    parser.add_argument('--postgres', default=os.environ.get('DATABASE_URL'),
+                        help='URL do PostgreSQL (padrão: DATABASE_URL); os dados são substituídos')
+    args = parser.parse_args()
+    if not (args.postgres or '').startswith('postgresql'):
+        parser.error('Informe a URL de um PostgreSQL em --postgres (ou DATABASE_URL)')
+
+    app = create_app(type('ConfigVerificacao', (ConfigTeste,), {'SQLALCHEMY_DATABASE_URI': args.postgres}))
+    falhas = 0
+    with app.app_context():
+        db.create_all()
+        gerar_dados_sinteticos(1, 1)
+        setup_postgresql_features()
+        falhas += conferir('Contadores após a carga')
+
+        id_categoria, outra_categoria = categorias_de_teste()
+        # Começa antes do fim do último evento: parte dos dias já está coberta, parte não
+        ultimo_dia = db.session.execute(
+            select(func.max(Eventos.datafim)).where(Eventos.id_categoria == id_categoria)).scalar()
+        inicio = ultimo_dia - timedelta(days=5)
+        conexao = db.session.connection()
+
+        conexao.execute(insert(tabela_eventos).values(eventos_sobrepostos(id_categoria, inicio)))
+        db.session.commit()
+        falhas += conferir('INSERT de vários eventos sobrepostos')
+
+        inseridos = tabela_eventos.c.titulo.like(f'{PREFIXO}%')
+        conexao = db.session.connection()
+        conexao.execute(update(tabela_eventos).where(inseridos, tabela_eventos.c.titulo.in_(
+            [f'{PREFIXO} 1', f'{PREFIXO} 5'])).values(
+            datainicio=tabela_eventos.c.datainicio + 3, datafim=tabela_eventos.c.datafim + 9))
+        db.session.commit()
+        falhas += conferir('UPDATE de datas em vários eventos')
+
+        conexao = db.session.connection()
+        conexao.execute(update(tabela_eventos).where(inseridos, tabela_eventos.c.titulo.in_(
+            [f'{PREFIXO} 2', f'{PREFIXO} 6'])).values(id_categoria=outra_categoria))
+        db.session.commit()
+        falhas += conferir('UPDATE de categoria em vários eventos')
+
+        conexao = db.session.connection()
+        conexao.execute(delete(tabela_eventos).where(inseridos))
+        db.session.commit()
+        falhas += conferir('DELETE de vários eventos sobrepostos')
+
+        db.session.add_all([Eventos(**dados) for dados in eventos_sobrepostos(id_categoria, inicio)])
+        db.session.commit()
+        falhas += conferir('Eventos gravados pela sessão (insertmanyvalues)')
+
+        Eventos.query.filter(Eventos.titulo.like(f'{PREFIXO}%')).delete(synchronize_session=False)
+        db.session.commit()
+        falhas += conferir('DELETE em massa pela sessão')
+
+    if falhas:
+        print(f"\n❌ {falhas} contador(es) divergente(s)")
+        sys.exit(1)
+    print("\n✅ Contadores dos gatilhos iguais ao cálculo completo")
+
+
+if __name__ == '__main__':
+    main()
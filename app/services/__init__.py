@@ -0,0 +1 @@
+# Este arquivo pode estar vazio
\ No newline at end of file
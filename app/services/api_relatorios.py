@@ -0,0 +1,161 @@
+"""
+API JSON dos relatórios: filtros por coluna, ordenação, seleção de campos e
+paginação por cursor (mesmo esquema de app.services.paginacao).
+
+Parâmetros da query string:
+    campos=a,b        colunas devolvidas (padrão: todas)
+    ordenar=col|-col  coluna de ordenação, entre as de ORDENACAO do relatório
+    cursor=...        continuação devolvida em proximo_cursor
+    por_pagina=n      tamanho da página (limitado a POR_PAGINA_MAXIMO)
+    <coluna>=valor    filtro de igualdade em qualquer coluna do relatório
+
+Relatórios lidos de visões do banco são paginados no SQL (WHERE por chave +
+LIMIT, sobre colunas indexadas das tabelas de origem); os calculados em Python,
+os lidos de um snapshot e os sem coluna que identifique a linha já estão em
+memória (uma linha por categoria, período ou calendário) e são paginados na
+lista, com a posição da linha como último desempate.
+"""
+from datetime import date
+
+from sqlalchemy import select
+
+from app import db
+from app.services.exportacao import valor_json
+from app.services.paginacao import CursorInvalido, codificar_cursor, decodificar_cursor, depois_de, ordem_nulos
+
+PARAMETROS_RESERVADOS = {'campos', 'ordenar', 'cursor', 'por_pagina'}
+
+# Relatório -> (colunas de desempate, colunas que podem ser usadas em ?ordenar=)
+# Nas visões de eventos a ordenação usa o índice (datainicio, id_evento) de eventos
+ORDENACAO = {
+    'eventos_ativos': (('id_evento',), ('datainicio', 'id_evento')),
+    'eventos_futuros': (('id_evento',), ('datainicio', 'id_evento')),
+    'feriados_ano': (('id_evento',), ('datainicio', 'id_evento')),
+    'resumo_calendario': (('id_calendario',), ('id_calendario', 'ano')),
+    'dias_letivos': (('calendario', 'periodo', 'categoria'), ('calendario', 'periodo', 'categoria')),
+    'feriados_dias_letivos': (('data', 'feriado', 'categoria_afetada'), ('data', 'feriado')),
+    'dias_por_periodo': (('periodo',), ('periodo',)),
+}
+
+# Relatórios em que as colunas de desempate não identificam a linha: um feriado se repete
+# para cada categoria de aulas do período, e nomes de calendário e categoria podem se
+# repetir. São paginados sempre em memória, desempatados pela posição da linha
+SEM_CHAVE_UNICA = {'dias_letivos', 'feriados_dias_letivos'}
+
+# Tipo Python das colunas que não são texto (para filtros e cursores)
+TIPOS_COLUNAS = {
+    'id_evento': int, 'id_calendario': int, 'ano': int,
+    'datainicio': date, 'datafim': date, 'data': date,
+    'ativo': bool,
+    'totalcategorias': int, 'totaleventos': int, 'dias_planejados': int,
+    'dias_com_eventos': int, 'eventos_ultimos_30_dias': int, 'total_dias_letivos': int,
+}
+
+
+class ParametroInvalido(ValueError):
+    pass
+
+
+def converter(coluna, valor):
+    """Converte o texto da query string para o tipo da coluna"""
+    tipo = TIPOS_COLUNAS.get(coluna, str)
+    try:
+        if tipo is date:
+            return date.fromisoformat(valor)
+        if tipo is bool:
+            if valor.lower() not in ('true', 'false', '1', '0'):
+                raise ValueError(valor)
+            return valor.lower() in ('true', '1')
+        return tipo(valor)
+    except ValueError:
+        raise ParametroInvalido(f"Valor inválido para '{coluna}': {valor}")
+
+
+def ler_parametros(nome, colunas, argumentos):
+    """Campos, filtros, chave de ordenação e direção pedidos na query string"""
+    colunas = list(colunas)
+    campos = colunas
+    if argumentos.get('campos'):
+        campos = [c.strip() for c in argumentos['campos'].split(',') if c.strip()]
+        desconhecidos = [c for c in campos if c not in colunas]
+        if desconhecidos:
+            raise ParametroInvalido(f"Campos inexistentes: {', '.join(desconhecidos)}")
+
+    filtros = {}
+    for coluna, valor in argumentos.items():
+        if coluna in PARAMETROS_RESERVADOS:
+            continue
+        if coluna not in colunas:
+            raise ParametroInvalido(f"Filtro em coluna inexistente: {coluna}")
+        filtros[coluna] = converter(coluna, valor)
+
+    unica, ordenaveis = ORDENACAO[nome]
+    ordenar = argumentos.get('ordenar') or ordenaveis[0]
+    descendente = ordenar.startswith('-')
+    ordenar = ordenar.lstrip('-')
+    if ordenar not in ordenaveis:
+        raise ParametroInvalido(f"Ordenação permitida apenas por: {', '.join(ordenaveis)}")
+    chave = [ordenar] + [c for c in unica if c != ordenar]
+    return campos, filtros, chave, descendente
+
+
+def ler_cursor(cursor, chave, tipos_extras=()):
+    """Chave da última linha da página anterior, com o tipo de cada coluna (None sem cursor)"""
+    try:
+        return decodificar_cursor(cursor, [TIPOS_COLUNAS.get(c, str) for c in chave] + list(tipos_extras))
+    except CursorInvalido:
+        raise ParametroInvalido(f"Cursor inválido: {cursor}")
+
+
+def pagina_consulta(modelo, filtros, chave, descendente, cursor, limite):
+    """Uma página de uma visão do banco (modelo de app.models.views), paginada no SQL"""
+    colunas_chave = [getattr(modelo, c) for c in chave]
+    consulta = select(modelo).where(*[getattr(modelo, c) == v for c, v in filtros.items()])
+
+    valores = ler_cursor(cursor, chave)
+    if valores is not None:
+        consulta = consulta.where(depois_de(colunas_chave, valores, descendente))
+    ordem = [ordem_nulos(c, descendente) for c in colunas_chave]
+    linhas = db.session.execute(consulta.order_by(*ordem).limit(limite + 1)).scalars().all()
+    return _cortar(linhas, lambda linha: [getattr(linha, c) for c in chave], limite)
+
+
+def pagina_lista(linhas, filtros, chave, descendente, cursor, limite):
+    """
+    Uma página de linhas já em memória, com os mesmos filtros da versão SQL. A
+    posição da linha na lista completa entra no fim da chave (e do cursor), para
+    que linhas iguais nas colunas da chave não se percam entre as páginas.
+    """
+    def valores(posicao_linha):
+        posicao, linha = posicao_linha
+        return tuple(_comparavel(getattr(linha, c)) for c in chave) + (posicao,)
+
+    linhas = [(i, l) for i, l in enumerate(linhas) if all(getattr(l, c) == v for c, v in filtros.items())]
+    linhas.sort(key=valores, reverse=descendente)
+
+    inicio = ler_cursor(cursor, chave, tipos_extras=(int,))
+    if inicio is not None:
+        inicio = tuple(_comparavel(v) for v in inicio[:-1]) + (inicio[-1],)
+        if descendente:
+            linhas = [p for p in linhas if valores(p) < inicio]
+        else:
+            linhas = [p for p in linhas if valores(p) > inicio]
+    itens, proximo_cursor = _cortar(linhas[:limite + 1],
+                                    lambda p: [getattr(p[1], c) for c in chave] + [p[0]], limite)
+    return [linha for _, linha in itens], proximo_cursor
+
+
+def _comparavel(valor):
+    """Permite ordenar valores nulos (vêm antes de todos os outros)"""
+    return (valor is not None, valor if valor is not None else 0)
+
+
+def _cortar(linhas, valores_chave, limite):
+    if len(linhas) <= limite:
+        return linhas, None
+    linhas = linhas[:limite]
+    return linhas, codificar_cursor(valores_chave(linhas[-1]))
+
+
+def item_json(linha, campos):
+    return {c: valor_json(getattr(linha, c)) for c in campos}
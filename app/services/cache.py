@@ -0,0 +1,303 @@
+"""
+Cache dos dados montados para as páginas de leitura (calendários, painel e relatórios).
+
+Há dois backends com a mesma interface:
+- 'memoria': dicionário LRU por processo; o mais rápido, mas cada worker tem o seu;
+- 'arquivos': um arquivo por entrada num diretório local, compartilhado por todos os
+  workers do mesmo servidor. Gravações usam arquivo temporário + os.replace (atômico),
+  então um leitor nunca vê uma entrada pela metade.
+
+As chaves são tuplas (grupo, ...) que sempre incluem a versão dos dados
+(app.services.versoes), lida do banco a cada requisição. Uma gravação feita em
+qualquer processo muda a versão e as entradas antigas simplesmente deixam de ser
+usadas: é isso que garante a invalidação entre processos. As rotas de escrita
+também invalidam os grupos afetados para liberar o espaço na hora.
+O tamanho é limitado (descarta a entrada usada há mais tempo) e cada entrada expira
+depois de um TTL.
+"""
+import hashlib
+import os
+import pickle
+import shutil
+import tempfile
+import time
+import uuid
+from collections import OrderedDict
+from datetime import date
+from threading import Lock
+
+from flask import current_app
+
+from app.services.versoes import versao_calendario, versao_global
+
+TAMANHO_PADRAO = 64
+TTL_PADRAO = 300  # segundos
+
+# Grupos que dependem de todos os calendários: invalidados junto com qualquer um deles
+GRUPOS_GLOBAIS = ('painel', 'relatorios')
+
+_AUSENTE = object()
+
+
+class CacheMemoria:
+    """Dicionário limitado com descarte LRU, expiração por TTL e contadores de uso"""
+
+    nome = 'memoria'
+
+    def __init__(self, tamanho_maximo=TAMANHO_PADRAO, ttl=TTL_PADRAO, relogio=time.monotonic):
+        self.tamanho_maximo = tamanho_maximo
+        self.ttl = ttl
+        self.relogio = relogio
+        self._entradas = OrderedDict()  # chave -> (expira_em, valor)
+        self._trava = Lock()
+        self.acertos = 0
+        self.faltas = 0
+        self.descartes = 0
+        self.expiracoes = 0
+
+    def obter(self, chave, padrao=None):
+        with self._trava:
+            entrada = self._entradas.get(chave, _AUSENTE)
+            if entrada is not _AUSENTE and entrada[0] <= self.relogio():
+                del self._entradas[chave]
+                self.expiracoes += 1
+                entrada = _AUSENTE
+            if entrada is _AUSENTE:
+                self.faltas += 1
+                return padrao
+            self._entradas.move_to_end(chave)
+            self.acertos += 1
+            return entrada[1]
+
+    def guardar(self, chave, valor, ttl=None):
+        if self.tamanho_maximo <= 0:
+            return
+        with self._trava:
+            self._entradas[chave] = (self.relogio() + (ttl or self.ttl), valor)
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.tamanho_maximo:
+                self._entradas.popitem(last=False)
+                self.descartes += 1
+
+    def obter_ou_calcular(self, chave, calcular, ttl=None):
+        valor = self.obter(chave, _AUSENTE)
+        if valor is _AUSENTE:
+            valor = calcular()
+            self.guardar(chave, valor, ttl)
+        return valor
+
+    def invalidar(self, grupo):
+        """Remove as entradas do grupo; retorna quantas foram removidas"""
+        with self._trava:
+            chaves = [chave for chave in self._entradas if chave[0] == grupo]
+            for chave in chaves:
+                del self._entradas[chave]
+            return len(chaves)
+
+    def limpar(self):
+        with self._trava:
+            self._entradas.clear()
+
+    def total_entradas(self):
+        return len(self._entradas)
+
+    def estatisticas(self):
+        consultas = self.acertos + self.faltas
+        return {
+            'backend': self.nome,
+            'entradas': self.total_entradas(),
+            'tamanho_maximo': self.tamanho_maximo,
+            'ttl': self.ttl,
+            'acertos': self.acertos,
+            'faltas': self.faltas,
+            'descartes': self.descartes,
+            'expiracoes': self.expiracoes,
+            'taxa_acerto': round(self.acertos / consultas, 4) if consultas else None,
+        }
+
+
+class CacheArquivos(CacheMemoria):
+    """
+    Cache em arquivos, compartilhado entre processos: diretorio/<grupo>/<sha1 da chave>.cache.
+    O horário de modificação do arquivo é atualizado a cada acerto e serve de base
+    para o descarte LRU. Os contadores de acertos/faltas são do processo atual.
+
+    Contar as entradas exige listar todos os diretórios, então o descarte não roda a
+    cada gravação: a cada 'folga' gravações do processo o cache volta a ter no máximo
+    tamanho_maximo - folga + 1 entradas, e até o próximo descarte as gravações deste
+    processo não passam do limite (com vários processos ele é aproximado).
+    """
+
+    nome = 'arquivos'
+
+    def __init__(self, diretorio, tamanho_maximo=TAMANHO_PADRAO, ttl=TTL_PADRAO, relogio=time.time):
+        super().__init__(tamanho_maximo, ttl, relogio)
+        self.diretorio = diretorio
+        self.folga = max(1, tamanho_maximo // 8)
+        self._gravacoes = 0  # desde o último descarte
+        os.makedirs(diretorio, exist_ok=True)
+
+    def _diretorio_grupo(self, grupo):
+        return os.path.join(self.diretorio, hashlib.sha1(str(grupo).encode()).hexdigest()[:16])
+
+    def _caminho(self, chave):
+        nome = hashlib.sha1(repr(chave).encode()).hexdigest()
+        return os.path.join(self._diretorio_grupo(chave[0]), nome + '.cache')
+
+    def obter(self, chave, padrao=None):
+        caminho = self._caminho(chave)
+        try:
+            with open(caminho, 'rb') as arquivo:
+                expira_em, valor = pickle.load(arquivo)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            self.faltas += 1
+            return padrao
+
+        if expira_em <= self.relogio():
+            self._remover(caminho)
+            self.expiracoes += 1
+            self.faltas += 1
+            return padrao
+
+        try:
+            os.utime(caminho)
+        except OSError:
+            pass
+        self.acertos += 1
+        return valor
+
+    def guardar(self, chave, valor, ttl=None):
+        if self.tamanho_maximo <= 0:
+            return
+        caminho = self._caminho(chave)
+        descritor, temporario = tempfile.mkstemp(dir=self.diretorio, suffix='.tmp')
+        try:
+            with os.fdopen(descritor, 'wb') as arquivo:
+                pickle.dump((self.relogio() + (ttl or self.ttl), valor), arquivo, protocol=pickle.HIGHEST_PROTOCOL)
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+            os.replace(temporario, caminho)
+        except OSError:
+            # Outro processo invalidou o grupo no meio da gravação: a entrada é descartada
+            self._remover(temporario)
+            return
+        self._gravacoes += 1
+        if self._gravacoes >= self.folga:
+            self._gravacoes = 0
+            self._descartar_excesso()
+
+    def _arquivos(self):
+        """Lista (mtime, caminho) de todas as entradas gravadas"""
+        arquivos = []
+        for grupo in os.scandir(self.diretorio):
+            if not grupo.is_dir() or grupo.name.startswith('.'):
+                continue
+            try:
+                for entrada in os.scandir(grupo.path):
+                    if entrada.name.endswith('.cache'):
+                        arquivos.append((entrada.stat().st_mtime, entrada.path))
+            except OSError:
+                continue
+        return arquivos
+
+    def _descartar_excesso(self):
+        arquivos = self._arquivos()
+        excesso = len(arquivos) - (self.tamanho_maximo - self.folga + 1)
+        if excesso <= 0:
+            return
+        for _, caminho in sorted(arquivos)[:excesso]:
+            if self._remover(caminho):
+                self.descartes += 1
+
+    @staticmethod
+    def _remover(caminho):
+        try:
+            os.remove(caminho)
+            return True
+        except OSError:
+            return False
+
+    def invalidar(self, grupo):
+        """
+        Remove o grupo renomeando o diretório (atômico) antes de apagá-lo: a partir
+        do rename nenhum processo encontra mais as entradas antigas
+        """
+        origem = self._diretorio_grupo(grupo)
+        lixo = os.path.join(self.diretorio, f'.lixo-{uuid.uuid4().hex}')
+        try:
+            os.rename(origem, lixo)
+        except OSError:
+            return 0
+        total = sum(1 for nome in os.listdir(lixo) if nome.endswith('.cache'))
+        shutil.rmtree(lixo, ignore_errors=True)
+        return total
+
+    def limpar(self):
+        for entrada in os.scandir(self.diretorio):
+            if entrada.is_dir():
+                shutil.rmtree(entrada.path, ignore_errors=True)
+            else:
+                self._remover(entrada.path)
+
+    def total_entradas(self):
+        return len(self._arquivos())
+
+    def estatisticas(self):
+        estatisticas = super().estatisticas()
+        estatisticas['diretorio'] = self.diretorio
+        return estatisticas
+
+
+BACKENDS = {
+    CacheMemoria.nome: CacheMemoria,
+    CacheArquivos.nome: CacheArquivos,
+}
+
+
+def criar_cache(backend, **opcoes):
+    """Instancia o backend de cache pelo nome ('memoria' ou 'arquivos')"""
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de cache inválido: {backend}. Opções: {', '.join(BACKENDS)}")
+    if backend != CacheArquivos.nome:
+        opcoes.pop('diretorio', None)
+    return BACKENDS[backend](**opcoes)
+
+
+def configurar_cache(app):
+    """Cria o cache da aplicação conforme a configuração e o guarda em app.extensions"""
+    app.extensions['cache'] = criar_cache(
+        app.config.get('CACHE_BACKEND', CacheMemoria.nome),
+        diretorio=app.config.get('CACHE_DIRETORIO') or os.path.join(app.instance_path, 'cache'),
+        tamanho_maximo=app.config.get('CACHE_TAMANHO', TAMANHO_PADRAO),
+        ttl=app.config.get('CACHE_TTL', TTL_PADRAO),
+    )
+
+
+def cache_atual():
+    return current_app.extensions['cache']
+
+
+def em_cache_calendario(id_calendario, tipo, calcular):
+    """
+    Retorna o dado 'tipo' do calendário, calculando-o só quando não está em cache
+    para a versão atual. Calendários ainda sem carimbo de versão não são guardados.
+    """
+    versao = versao_calendario(id_calendario)
+    if versao is None:
+        return calcular()
+    return cache_atual().obter_ou_calcular((f'calendario:{id_calendario}', versao, tipo), calcular)
+
+
+def em_cache_global(grupo, tipo, calcular, ttl=None):
+    """
+    Como em_cache_calendario, para dados que dependem de todos os calendários e da
+    data de hoje (painel inicial, relatórios). 'ttl' substitui o TTL padrão do cache.
+    """
+    chave = (grupo, versao_global(), date.today().isoformat(), tipo)
+    return cache_atual().obter_ou_calcular(chave, calcular, ttl)
+
+
+def invalidar_calendario(*ids_calendario):
+    """Descarta tudo o que está em cache para os calendários informados e os dados globais"""
+    cache = cache_atual()
+    total = sum(cache.invalidar(f'calendario:{id_calendario}') for id_calendario in set(ids_calendario))
+    return total + sum(cache.invalidar(grupo) for grupo in GRUPOS_GLOBAIS)
@@ -0,0 +1,180 @@
+"""
+Detecção de conflitos entre eventos em lote.
+
+Os eventos são carregados uma única vez, agrupados pelo escopo (mesma categoria,
+mesmo calendário ou mesmo local) e percorridos em ordem de início mantendo um heap
+com os eventos "ainda abertos" (ordenados pela data final). Cada evento só é comparado
+com os abertos, que sempre se sobrepõem a ele no período: O(n log n + k), onde k é o
+número de pares encontrados.
+
+Para eventos recorrentes o período é apenas o limite da série, então os pares
+candidatos ainda são confirmados ocorrência a ocorrência (app.services.recorrencia).
+"""
+import heapq
+from itertools import count
+
+from sqlalchemy import and_, func
+
+from app import db
+from app.models.models import Eventos, CategoriaCalendario
+from app.services.dias import como_data
+from app.services.recorrencia import eh_recorrente, ocorrencias_se_sobrepoem
+
+# Mensagem do gatilho de eventos recorrentes e da restrição de exclusão (ver scripts/setup.py)
+MENSAGEM_CONFLITO_LOCAL = 'Conflito detectado: já existe um evento agendado nesse local e período.'
+RESTRICAO_CONFLITO_LOCAL = 'excl_eventos_local_periodo'
+
+ESCOPOS = {
+    'categoria': 'Mesma categoria',
+    'calendario': 'Mesmo calendário',
+    'local': 'Mesmo local',
+}
+
+
+def normalizar_local(local):
+    """Local comparável (sem espaços nas pontas e sem diferenciar maiúsculas); None se vazio"""
+    return (local or '').strip().lower() or None
+
+
+def eh_conflito_local(erro):
+    """Verifica se um erro do banco veio da restrição (ou do gatilho) de conflito de local"""
+    original = getattr(erro, 'orig', None)
+    diagnostico = getattr(original, 'diag', None)
+    if getattr(diagnostico, 'constraint_name', None) == RESTRICAO_CONFLITO_LOCAL:
+        return True
+    return MENSAGEM_CONFLITO_LOCAL in str(original)
+
+
+def validar_escopo(escopo):
+    if escopo not in ESCOPOS:
+        raise ValueError(f'Escopo de conflito inválido: {escopo}')
+    return escopo
+
+
+def _chave_escopo(escopo, calendario_por_categoria):
+    if escopo == 'categoria':
+        return lambda evento: evento.id_categoria
+    if escopo == 'calendario':
+        return lambda evento: calendario_por_categoria.get(evento.id_categoria)
+    return lambda evento: normalizar_local(evento.local)
+
+
+def _se_sobrepoem(a, b):
+    if not eh_recorrente(a) and not eh_recorrente(b):
+        return True  # já garantido pela varredura
+    return ocorrencias_se_sobrepoem(a, b)
+
+
+def varrer_conflitos(eventos, chave):
+    """
+    Gera os pares (anterior, evento) de eventos com a mesma chave cujos períodos
+    (e ocorrências) se sobrepõem. Eventos com chave None são ignorados.
+    """
+    grupos = {}
+    for evento in eventos:
+        valor = chave(evento)
+        if valor is not None:
+            grupos.setdefault(valor, []).append(evento)
+
+    desempate = count()  # evita comparar eventos quando as datas finais empatam
+    for grupo in grupos.values():
+        grupo.sort(key=lambda e: (como_data(e.datainicio), como_data(e.datafim)))
+        abertos = []
+        for evento in grupo:
+            inicio = como_data(evento.datainicio)
+            while abertos and abertos[0][0] < inicio:
+                heapq.heappop(abertos)
+            for _, _, anterior in abertos:
+                if _se_sobrepoem(anterior, evento):
+                    yield anterior, evento
+            heapq.heappush(abertos, (como_data(evento.datafim), next(desempate), evento))
+
+
+def _calendario_por_categoria(id_calendario):
+    """Categorias de um único calendário, mapeadas para ele (as dos outros ficam de fora)"""
+    return dict(db.session.query(CategoriaCalendario.id_categoria, CategoriaCalendario.id_calendario)
+                .filter(CategoriaCalendario.id_calendario == id_calendario).all())
+
+
+def conflitos_calendario(id_calendario, escopo='categoria'):
+    """
+    Todos os pares de eventos conflitantes de um calendário no escopo informado.
+    No escopo 'local' também entram eventos de outros calendários no mesmo local.
+    """
+    validar_escopo(escopo)
+    calendario_por_categoria = _calendario_por_categoria(id_calendario)
+    ids_categorias = list(calendario_por_categoria)
+
+    eventos = Eventos.query.filter(Eventos.id_categoria.in_(ids_categorias)).all()
+
+    if escopo == 'local' and eventos:
+        locais = {normalizar_local(e.local) for e in eventos} - {None}
+        inicio = min(e.datainicio for e in eventos)
+        fim = max(e.datafim for e in eventos)
+        if locais:
+            eventos += Eventos.query.filter(
+                ~Eventos.id_categoria.in_(ids_categorias),
+                func.lower(func.trim(Eventos.local)).in_(locais),
+                and_(Eventos.datainicio <= fim, Eventos.datafim >= inicio)
+            ).all()
+
+    ids_do_calendario = set(ids_categorias)
+    return [
+        (a, b) for a, b in varrer_conflitos(eventos, _chave_escopo(escopo, calendario_por_categoria))
+        if a.id_categoria in ids_do_calendario or b.id_categoria in ids_do_calendario
+    ]
+
+
+def conflitos_do_evento(evento, escopo='categoria', evento_id=None):
+    """
+    Eventos que conflitam com 'evento' (novo ou em edição) no escopo informado,
+    carregando os candidatos com uma única consulta.
+    """
+    validar_escopo(escopo)
+    calendario_por_categoria = {}
+    query = Eventos.query.filter(
+        Eventos.datainicio <= evento.datafim,
+        Eventos.datafim >= evento.datainicio
+    )
+
+    if escopo == 'categoria':
+        query = query.filter(Eventos.id_categoria == evento.id_categoria)
+    elif escopo == 'calendario':
+        id_calendario = db.session.query(CategoriaCalendario.id_calendario).filter_by(
+            id_categoria=evento.id_categoria).scalar()
+        query = query.join(CategoriaCalendario).filter(CategoriaCalendario.id_calendario == id_calendario)
+        calendario_por_categoria = _calendario_por_categoria(id_calendario)
+    else:
+        local = normalizar_local(evento.local)
+        if local is None:
+            return []
+        query = query.filter(func.lower(func.trim(Eventos.local)) == local)
+
+    if evento_id:
+        query = query.filter(Eventos.id_evento != evento_id)
+
+    chave = _chave_escopo(escopo, calendario_por_categoria)
+    return [b if a is evento else a
+            for a, b in varrer_conflitos(query.all() + [evento], chave)
+            if a is evento or b is evento]
+
+
+def resumo_conflito(a, b):
+    """Representação de um par conflitante para o relatório e a API JSON"""
+    def dados(evento):
+        return {
+            'id': evento.id_evento,
+            'titulo': evento.titulo,
+            'inicio': como_data(evento.datainicio).isoformat(),
+            'fim': como_data(evento.datafim).isoformat(),
+            'local': evento.local or '',
+            'categoria_id': evento.id_categoria,
+            'recorrente': eh_recorrente(evento),
+        }
+
+    return {
+        'evento_a': dados(a),
+        'evento_b': dados(b),
+        'inicio': max(como_data(a.datainicio), como_data(b.datainicio)).isoformat(),
+        'fim': min(como_data(a.datafim), como_data(b.datafim)).isoformat(),
+    }
@@ -0,0 +1,55 @@
+"""
+Contagem das consultas SQL executadas num trecho de código.
+
+Usado para verificar que as páginas executam um número constante de consultas
+(sem carregamentos preguiçosos N+1), ver app/scripts/verificar_consultas.py:
+
+    with contar_consultas() as consultas:
+        cliente.get('/eventos/')
+    assert consultas.total <= 3, consultas.sql
+"""
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app.services.sessao import engines_da_aplicacao
+
+
+class RegistroConsultas:
+    def __init__(self):
+        self.sql = []
+
+    @property
+    def total(self):
+        return len(self.sql)
+
+    def _registrar(self, conexao, cursor, sql, parametros, contexto, executemany):
+        self.sql.append(sql)
+
+
+@contextmanager
+def contar_consultas(engine=None):
+    """Registra as consultas enviadas ao banco (a todos os engines da aplicação) enquanto o bloco executa"""
+    engines = [engine] if engine is not None else engines_da_aplicacao()
+    registro = RegistroConsultas()
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', registro._registrar)
+    try:
+        yield registro
+    finally:
+        for engine in engines:
+            event.remove(engine, 'before_cursor_execute', registro._registrar)
+
+
+class ExcessoDeConsultas(AssertionError):
+    pass
+
+
+@contextmanager
+def no_maximo(limite, descricao='', engine=None):
+    """Como contar_consultas, mas falha se o bloco executar mais de 'limite' consultas"""
+    with contar_consultas(engine) as registro:
+        yield registro
+    if registro.total > limite:
+        consultas = '\n'.join(f'  {sql}' for sql in registro.sql)
+        raise ExcessoDeConsultas(f'{descricao}: {registro.total} consultas (máximo {limite})\n{consultas}')
@@ -0,0 +1,274 @@
+"""
+Manutenção incremental dos contadores de dias por categoria (tabela contagemcategoria).
+
+No SQLite (e demais bancos sem gatilhos) os contadores são atualizados por um
+evento after_flush da sessão do SQLAlchemy. No PostgreSQL quem faz esse trabalho
+são os gatilhos criados por 'flask init-advanced-features' (ver scripts/setup.py).
+O mesmo evento mantém, em qualquer banco, os mapas de ocupação (app.services.ocupacao).
+"""
+from datetime import datetime
+from types import SimpleNamespace
+
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, inspect, select, update, insert, delete
+
+from app import db
+from app.models.models import CategoriaCalendario, Eventos, ContagemCategoria
+from app.services.dias import como_data, contar_dias_validos_uniao, mascara_dias_semana, unir_intervalos
+from app.services.ocupacao import anos_do_intervalo, atualizar_mapas, colunas_ocorrencia, reconstruir_todos_mapas
+from app.services.recorrencia import COLUNAS_RECORRENCIA, expandir_ocorrencias, intervalos_de_eventos
+
+tabela_eventos = Eventos.__table__
+tabela_categorias = CategoriaCalendario.__table__
+tabela_contagem = ContagemCategoria.__table__
+
+
+def registrar_eventos_contagem():
+    """Registra o evento de sessão que mantém os contadores (apenas uma vez por processo)"""
+    if not event.contains(Session, 'after_flush', _apos_flush):
+        event.listen(Session, 'after_flush', _apos_flush)
+
+
+def valor_anterior(obj, atributo):
+    """Retorna o valor de um atributo antes das alterações pendentes da sessão"""
+    historico = inspect(obj).attrs[atributo].history
+    if historico.deleted:
+        return historico.deleted[0]
+    return getattr(obj, atributo)
+
+
+def _estado_evento(obj, anterior=False):
+    """Datas e regra de recorrência do evento, antes ou depois das alterações pendentes"""
+    def valor(atributo):
+        return valor_anterior(obj, atributo) if anterior else getattr(obj, atributo)
+
+    estado = {coluna: valor(coluna) for coluna in COLUNAS_RECORRENCIA}
+    estado['datainicio'] = como_data(valor('datainicio'))
+    estado['datafim'] = como_data(valor('datafim'))
+    return SimpleNamespace(**estado)
+
+
+def _ocorrencias_recortadas(eventos, janela):
+    """Ocorrências dos eventos recortadas para dentro da janela"""
+    return [_recortar(intervalo, janela) for intervalo in intervalos_de_eventos(eventos, *janela)]
+
+
+def _recortar(intervalo, janela):
+    """Recorta um intervalo (inicio, fim) para dentro da janela, ou None se não houver interseção"""
+    inicio, fim = max(intervalo[0], janela[0]), min(intervalo[1], janela[1])
+    return (inicio, fim) if inicio <= fim else None
+
+
+def _mascara_categoria(conexao, id_categoria):
+    dias = conexao.execute(
+        select(tabela_categorias.c.diassemanasvalidos)
+        .where(tabela_categorias.c.id_categoria == id_categoria)
+    ).scalar()
+    return mascara_dias_semana(dias)
+
+
+def _gravar_contagem(conexao, id_categoria, dias_validos, total_eventos):
+    """Grava os valores absolutos do contador de uma categoria (atualiza ou insere)"""
+    valores = {'diasvalidos': dias_validos, 'totaleventos': total_eventos, 'atualizadoem': datetime.now()}
+    resultado = conexao.execute(
+        update(tabela_contagem)
+        .where(tabela_contagem.c.id_categoria == id_categoria)
+        .values(**valores)
+    )
+    if resultado.rowcount == 0:
+        conexao.execute(insert(tabela_contagem).values(id_categoria=id_categoria, **valores))
+
+
+def calcular_contagem_completa(conexao, id_categoria):
+    """Caminho lento: recalcula (dias válidos, total de eventos) lendo todos os eventos da categoria"""
+    eventos = conexao.execute(
+        select(*colunas_ocorrencia())
+        .where(tabela_eventos.c.id_categoria == id_categoria)
+    ).all()
+    mascara = _mascara_categoria(conexao, id_categoria)
+    return contar_dias_validos_uniao(intervalos_de_eventos(eventos), mascara), len(eventos)
+
+
+def recalcular_contagem_categoria(conexao, id_categoria):
+    """Recalcula e grava do zero o contador de uma categoria"""
+    dias_validos, total_eventos = calcular_contagem_completa(conexao, id_categoria)
+    _gravar_contagem(conexao, id_categoria, dias_validos, total_eventos)
+
+
+def _variacao_dias(conexao, id_categoria, alteracao, mascara):
+    """
+    Calcula a variação de dias válidos olhando apenas as janelas de datas alteradas.
+
+    O estado posterior vem do banco (o flush já foi aplicado); o anterior é
+    reconstruído removendo as linhas novas/alteradas e recolocando os estados antigos.
+    """
+    variacao = 0
+    for janela in unir_intervalos(alteracao['janelas']):
+        linhas = conexao.execute(
+            select(tabela_eventos.c.id_evento, *colunas_ocorrencia())
+            .where(tabela_eventos.c.id_categoria == id_categoria)
+            .where(tabela_eventos.c.datainicio <= janela[1])
+            .where(tabela_eventos.c.datafim >= janela[0])
+        ).all()
+
+        depois = _ocorrencias_recortadas(linhas, janela)
+        antes = _ocorrencias_recortadas(
+            [l for l in linhas if l.id_evento not in alteracao['ids_alterados']] + alteracao['estados_antigos'],
+            janela)
+
+        variacao += (contar_dias_validos_uniao([i for i in depois if i], mascara) -
+                     contar_dias_validos_uniao([i for i in antes if i], mascara))
+    return variacao
+
+
+def _apos_flush(session, flush_context):
+    """Aplica aos contadores as alterações de eventos e categorias deste flush"""
+    conexao = session.connection()
+
+    alteracoes = {}
+    recalcular = set()
+    removidas = set()
+
+    def alteracao_de(id_categoria):
+        return alteracoes.setdefault(id_categoria, {
+            'janelas': [], 'estados_antigos': [], 'ids_alterados': set(), 'eventos': 0
+        })
+
+    for obj in session.new:
+        if isinstance(obj, Eventos):
+            estado = _estado_evento(obj)
+            alteracao = alteracao_de(obj.id_categoria)
+            alteracao['janelas'].append((estado.datainicio, estado.datafim))
+            alteracao['ids_alterados'].add(obj.id_evento)
+            alteracao['eventos'] += 1
+        elif isinstance(obj, CategoriaCalendario):
+            recalcular.add(obj.id_categoria)
+
+    for obj in session.deleted:
+        if isinstance(obj, Eventos):
+            estado = _estado_evento(obj, anterior=True)
+            alteracao = alteracao_de(valor_anterior(obj, 'id_categoria'))
+            alteracao['janelas'].append((estado.datainicio, estado.datafim))
+            alteracao['estados_antigos'].append(estado)
+            alteracao['eventos'] -= 1
+        elif isinstance(obj, CategoriaCalendario):
+            removidas.add(obj.id_categoria)
+
+    for obj in session.dirty:
+        if isinstance(obj, Eventos) and session.is_modified(obj):
+            categoria_antiga = valor_anterior(obj, 'id_categoria')
+            estado_antigo = _estado_evento(obj, anterior=True)
+            estado_novo = _estado_evento(obj)
+            if categoria_antiga == obj.id_categoria and estado_antigo == estado_novo:
+                continue
+
+            antiga = alteracao_de(categoria_antiga)
+            antiga['janelas'].append((estado_antigo.datainicio, estado_antigo.datafim))
+            antiga['estados_antigos'].append(estado_antigo)
+            antiga['ids_alterados'].add(obj.id_evento)
+
+            nova = alteracao_de(obj.id_categoria)
+            nova['janelas'].append((estado_novo.datainicio, estado_novo.datafim))
+            nova['ids_alterados'].add(obj.id_evento)
+
+            if categoria_antiga != obj.id_categoria:
+                antiga['eventos'] -= 1
+                nova['eventos'] += 1
+        elif isinstance(obj, CategoriaCalendario):
+            if inspect(obj).attrs.diassemanasvalidos.history.has_changes():
+                recalcular.add(obj.id_categoria)
+
+    # Os mapas de ocupação são mantidos aqui em qualquer banco
+    anos_por_categoria = {}
+    for id_categoria, alteracao in alteracoes.items():
+        for inicio, fim in alteracao['janelas']:
+            anos_por_categoria.setdefault(id_categoria, set()).update(anos_do_intervalo(inicio, fim))
+    atualizar_mapas(conexao, anos_por_categoria, removidas)
+
+    if conexao.dialect.name == 'postgresql':
+        # No PostgreSQL os contadores são mantidos pelos gatilhos do banco
+        return
+
+    for id_categoria in removidas:
+        conexao.execute(delete(tabela_contagem).where(tabela_contagem.c.id_categoria == id_categoria))
+
+    for id_categoria in recalcular - removidas:
+        recalcular_contagem_categoria(conexao, id_categoria)
+
+    for id_categoria, alteracao in alteracoes.items():
+        if id_categoria in removidas or id_categoria in recalcular:
+            continue
+
+        atual = conexao.execute(
+            select(tabela_contagem.c.diasvalidos, tabela_contagem.c.totaleventos)
+            .where(tabela_contagem.c.id_categoria == id_categoria)
+        ).first()
+
+        # Sem contador prévio não há base para a variação: recalcula do zero
+        if atual is None:
+            recalcular_contagem_categoria(conexao, id_categoria)
+            continue
+
+        mascara = _mascara_categoria(conexao, id_categoria)
+        variacao = _variacao_dias(conexao, id_categoria, alteracao, mascara) if mascara else 0
+        _gravar_contagem(conexao, id_categoria,
+                         atual.diasvalidos + variacao,
+                         atual.totaleventos + alteracao['eventos'])
+
+
+def recalcular_todas_contagens():
+    """
+    Reconstrói todos os contadores (e os mapas de ocupação) a partir dos eventos
+    e compara os contadores com os valores armazenados.
+    Retorna a lista de divergências encontradas antes da reconstrução.
+    """
+    conexao = db.session.connection()
+
+    intervalos_por_categoria = {}
+    eventos_por_categoria = {}
+    for linha in conexao.execute(select(tabela_eventos.c.id_categoria, *colunas_ocorrencia())):
+        intervalos_por_categoria.setdefault(linha.id_categoria, []).extend(expandir_ocorrencias(linha))
+        eventos_por_categoria[linha.id_categoria] = eventos_por_categoria.get(linha.id_categoria, 0) + 1
+
+    armazenadas = {
+        linha.id_categoria: linha
+        for linha in conexao.execute(select(tabela_contagem))
+    }
+
+    categorias = conexao.execute(
+        select(tabela_categorias.c.id_categoria, tabela_categorias.c.nome,
+               tabela_categorias.c.diassemanasvalidos)
+    ).all()
+
+    divergencias = []
+    agora = datetime.now()
+    linhas = []
+    for categoria in categorias:
+        intervalos = intervalos_por_categoria.get(categoria.id_categoria, [])
+        dias_validos = contar_dias_validos_uniao(intervalos, mascara_dias_semana(categoria.diassemanasvalidos))
+        total_eventos = eventos_por_categoria.get(categoria.id_categoria, 0)
+
+        armazenada = armazenadas.get(categoria.id_categoria)
+        if armazenada is None or (armazenada.diasvalidos, armazenada.totaleventos) != (dias_validos, total_eventos):
+            divergencias.append({
+                'id_categoria': categoria.id_categoria,
+                'nome': categoria.nome,
+                'armazenado': None if armazenada is None else (armazenada.diasvalidos, armazenada.totaleventos),
+                'calculado': (dias_validos, total_eventos)
+            })
+
+        linhas.append({
+            'id_categoria': categoria.id_categoria,
+            'diasvalidos': dias_validos,
+            'totaleventos': total_eventos,
+            'atualizadoem': agora
+        })
+
+    # Reconstrói a tabela inteira, descartando também contadores de categorias inexistentes
+    conexao.execute(delete(tabela_contagem))
+    if linhas:
+        conexao.execute(insert(tabela_contagem), linhas)
+    reconstruir_todos_mapas()
+    db.session.commit()
+
+    return divergencias
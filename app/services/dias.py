@@ -0,0 +1,134 @@
+from datetime import datetime, timedelta
+
+# NumPy é opcional: se estiver instalado, a contagem em lote usa busday_count
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Máscara com todos os dias da semana (bit 0 = Segunda ... bit 6 = Domingo)
+MASCARA_TODOS_DIAS = 0b1111111
+
+# Tabela de popcount para as 128 máscaras possíveis de 7 bits
+_POPCOUNT = tuple(bin(m).count('1') for m in range(128))
+
+
+def como_data(valor):
+    """Normaliza datetime para date (alguns trechos do sistema gravam datas como datetime)"""
+    return valor.date() if isinstance(valor, datetime) else valor
+
+
+def mascara_dias_semana(diassemanasvalidos):
+    """Converte a string de dias válidos (1=Segunda até 7=Domingo) em uma máscara de bits"""
+    mascara = 0
+    for d in diassemanasvalidos or '':
+        if '1' <= d <= '7':
+            mascara |= 1 << (int(d) - 1)
+    return mascara
+
+
+def contar_dias_validos(inicio, fim, mascara):
+    """Conta os dias entre inicio e fim (inclusive) cujo dia da semana está na máscara, em O(1)"""
+    total_dias = (fim - inicio).days + 1
+    if total_dias <= 0 or not mascara:
+        return 0
+
+    semanas, resto = divmod(total_dias, 7)
+    dias_validos = semanas * _POPCOUNT[mascara]
+
+    if resto:
+        # Rotaciona a máscara para que o bit 0 corresponda ao dia da semana de inicio
+        dia_semana = inicio.weekday()
+        rotacionada = ((mascara >> dia_semana) | (mascara << (7 - dia_semana))) & MASCARA_TODOS_DIAS
+        dias_validos += _POPCOUNT[rotacionada & ((1 << resto) - 1)]
+
+    return dias_validos
+
+
+def _weekmask_numpy(mascara):
+    """Converte a máscara de bits para o formato de weekmask do NumPy ('1111100')"""
+    return ''.join('1' if mascara & (1 << i) else '0' for i in range(7))
+
+
+def contar_dias_validos_lote(intervalos, mascara):
+    """
+    Conta os dias válidos de vários intervalos (inicio, fim) de uma só vez.
+    Retorna uma lista com a contagem de cada intervalo, na mesma ordem.
+    """
+    intervalos = list(intervalos)
+    if not intervalos or not mascara:
+        return [0] * len(intervalos)
+
+    if np is None:
+        return [contar_dias_validos(inicio, fim, mascara) for inicio, fim in intervalos]
+
+    inicios = np.array([inicio for inicio, _ in intervalos], dtype='datetime64[D]')
+    # busday_count considera o intervalo semiaberto [inicio, fim), por isso fim + 1 dia
+    fins = np.array([fim for _, fim in intervalos], dtype='datetime64[D]') + np.timedelta64(1, 'D')
+    fins = np.maximum(fins, inicios)
+
+    contagens = np.busday_count(inicios, fins, weekmask=_weekmask_numpy(mascara))
+    return contagens.tolist()
+
+
+def iterar_dias_validos(inicio, fim, mascara):
+    """Gera as datas válidas entre inicio e fim, saltando direto de um dia válido ao próximo"""
+    if not mascara:
+        return
+
+    # Para cada dia da semana, quantos dias avançar até o próximo dia válido
+    saltos = []
+    for dia_semana in range(7):
+        for passo in range(1, 8):
+            if mascara & (1 << ((dia_semana + passo) % 7)):
+                saltos.append(passo)
+                break
+
+    data_atual = inicio
+    if not mascara & (1 << data_atual.weekday()):
+        data_atual += timedelta(days=saltos[data_atual.weekday()])
+
+    while data_atual <= fim:
+        yield data_atual
+        data_atual += timedelta(days=saltos[data_atual.weekday()])
+
+
+def unir_intervalos(intervalos):
+    """Ordena e funde intervalos (inicio, fim) que se sobrepõem ou são adjacentes"""
+    unidos = []
+    for inicio, fim in sorted(intervalos):
+        if fim < inicio:
+            continue
+        if unidos and inicio <= unidos[-1][1] + timedelta(days=1):
+            if fim > unidos[-1][1]:
+                unidos[-1][1] = fim
+        else:
+            unidos.append([inicio, fim])
+    return [(inicio, fim) for inicio, fim in unidos]
+
+
+def contar_dias_validos_uniao(intervalos, mascara):
+    """Conta os dias válidos distintos cobertos por um conjunto de intervalos, sem contar dias repetidos"""
+    if not mascara:
+        return 0
+    return sum(contar_dias_validos(inicio, fim, mascara) for inicio, fim in unir_intervalos(intervalos))
+
+
+def dias_semana_domingo_zero(mascara):
+    """Converte a máscara (bit 0 = Segunda) para a lista de dias do FullCalendar/JavaScript (0 = Domingo)"""
+    return [(bit + 1) % 7 for bit in range(7) if mascara & (1 << bit)]
+
+
+def trechos_de_dias(datas, base):
+    """
+    Codifica datas em ordem crescente como trechos [deslocamento, quantidade] de dias
+    consecutivos, com deslocamento contado a partir de 'base'.
+    """
+    trechos = []
+    for data in datas:
+        deslocamento = (data - base).days
+        if trechos and trechos[-1][0] + trechos[-1][1] == deslocamento:
+            trechos[-1][1] += 1
+        else:
+            trechos.append([deslocamento, 1])
+    return trechos
@@ -0,0 +1,95 @@
+"""
+Exportação de relatórios em CSV e NDJSON como resposta em fluxo (streaming).
+
+As linhas chegam de um iterador (um Result do SQLAlchemy com yield_per, que no
+PostgreSQL usa um cursor do lado do servidor) e são escritas em blocos de
+LINHAS_POR_BLOCO, de modo que a memória usada não depende do tamanho do
+relatório. Se o cliente aceitar, o fluxo é comprimido com gzip à medida que é gerado.
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+
+from flask import Response, request, stream_with_context
+
+LINHAS_POR_BLOCO = 1000
+
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def valor_json(valor):
+    """Datas em ISO 8601 e somas (Decimal no PostgreSQL) como número"""
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return int(valor) if valor == valor.to_integral_value() else float(valor)
+    return valor
+
+
+def _valores(linha, colunas):
+    """Valores de uma linha (Row, dict ou objeto com atributos) na ordem das colunas"""
+    if hasattr(linha, '_mapping'):
+        linha = linha._mapping
+    if hasattr(linha, 'keys'):
+        return [linha[c] for c in colunas]
+    return [getattr(linha, c) for c in colunas]
+
+
+def blocos_csv(colunas, linhas):
+    """Gera o CSV (cabeçalho e linhas) em blocos de texto"""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(colunas)
+    for i, linha in enumerate(linhas, 1):
+        escritor.writerow(_valores(linha, colunas))
+        if i % LINHAS_POR_BLOCO == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def blocos_ndjson(colunas, linhas):
+    """Gera um objeto JSON por linha, em blocos de texto"""
+    bloco = []
+    for linha in linhas:
+        bloco.append(json.dumps({c: valor_json(v) for c, v in zip(colunas, _valores(linha, colunas))},
+                                ensure_ascii=False))
+        if len(bloco) == LINHAS_POR_BLOCO:
+            yield '\n'.join(bloco) + '\n'
+            bloco = []
+    if bloco:
+        yield '\n'.join(bloco) + '\n'
+
+
+def comprimir(blocos):
+    """Comprime um fluxo de blocos de bytes no formato gzip"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for bloco in blocos:
+        dados = compressor.compress(bloco)
+        if dados:
+            yield dados
+    yield compressor.flush()
+
+
+def resposta_exportacao(nome, formato, colunas, linhas):
+    """Resposta em fluxo com as linhas no formato pedido ('csv' ou 'ndjson')"""
+    gerar = blocos_csv if formato == 'csv' else blocos_ndjson
+    blocos = (bloco.encode('utf-8') for bloco in gerar(list(colunas), linhas))
+
+    gzip = 'gzip' in request.accept_encodings
+    if gzip:
+        blocos = comprimir(blocos)
+
+    resposta = Response(stream_with_context(blocos), content_type=FORMATOS[formato])
+    resposta.headers['Content-Disposition'] = f'attachment; filename="{nome}.{formato}"'
+    resposta.vary.add('Accept-Encoding')
+    if gzip:
+        resposta.headers['Content-Encoding'] = 'gzip'
+    return resposta
@@ -0,0 +1,214 @@
+"""
+Mapas de ocupação de dias por categoria (tabela ocupacaocategoria).
+
+Cada linha guarda, para uma categoria e um ano, um mapa de 366 bits em que o bit i
+indica se o i-ésimo dia do ano (0 = 1º de janeiro) está coberto por algum evento.
+Com isso:
+- dias válidos = popcount(ocupação & máscara dos dias da semana no ano);
+- "o dia está ocupado?" é um teste de bit;
+- a união de várias categorias é um OU bit a bit.
+
+Os mapas são reconstruídos por ano a cada flush que altera eventos
+(ver app.services.contagem) e por 'flask recompute-counts'.
+"""
+from datetime import date
+from functools import lru_cache
+
+from sqlalchemy import select, delete, insert, update, or_, and_
+
+from app import db
+from app.models.models import Eventos, OcupacaoCategoria
+from app.services.dias import MASCARA_TODOS_DIAS, unir_intervalos
+from app.services.recorrencia import COLUNAS_RECORRENCIA, expandir_ocorrencias, intervalos_de_eventos
+
+BYTES_POR_ANO = 46  # 366 bits arredondados para bytes
+
+tabela_eventos = Eventos.__table__
+tabela_ocupacao = OcupacaoCategoria.__table__
+
+
+def popcount(mapa):
+    """Quantidade de bits ligados no mapa"""
+    return bin(mapa).count('1')
+
+
+def para_bytes(mapa):
+    """Serializa um mapa (int) para gravação em bytea/BLOB"""
+    return mapa.to_bytes(BYTES_POR_ANO, 'little')
+
+
+def de_bytes(dados):
+    """Lê um mapa gravado em bytea/BLOB"""
+    return int.from_bytes(bytes(dados or b''), 'little')
+
+
+def anos_do_intervalo(inicio, fim):
+    return range(inicio.year, fim.year + 1)
+
+
+def mapa_de_intervalos(intervalos, ano):
+    """Monta o mapa de ocupação de um ano a partir de intervalos (inicio, fim)"""
+    inicio_ano, fim_ano = date(ano, 1, 1), date(ano, 12, 31)
+    mapa = 0
+    for inicio, fim in unir_intervalos(intervalos):
+        inicio, fim = max(inicio, inicio_ano), min(fim, fim_ano)
+        if inicio > fim:
+            continue
+        deslocamento = (inicio - inicio_ano).days
+        mapa |= ((1 << ((fim - inicio).days + 1)) - 1) << deslocamento
+    return mapa
+
+
+@lru_cache(maxsize=512)
+def mascara_ano(ano, mascara):
+    """Mapa com os dias do ano cujo dia da semana está na máscara (bit 0 = Segunda)"""
+    dias_no_ano = (date(ano, 12, 31) - date(ano, 1, 1)).days + 1
+    dia_semana = date(ano, 1, 1).weekday()
+
+    # Padrão de uma semana começando no dia da semana de 1º de janeiro
+    semana = ((mascara >> dia_semana) | (mascara << (7 - dia_semana))) & MASCARA_TODOS_DIAS
+
+    mapa = 0
+    for deslocamento in range(0, dias_no_ano, 7):
+        mapa |= semana << deslocamento
+    return mapa & ((1 << dias_no_ano) - 1)
+
+
+def mapa_do_intervalo(inicio, fim, ano):
+    """Mapa com todos os bits do intervalo (recortado ao ano) ligados"""
+    return mapa_de_intervalos([(inicio, fim)], ano)
+
+
+def contar_dias_mapas(mapas, mascara):
+    """Conta os dias ocupados cujo dia da semana está na máscara, somando todos os anos"""
+    if not mascara:
+        return 0
+    return sum(popcount(mapa & mascara_ano(ano, mascara)) for ano, mapa in mapas.items())
+
+
+def dia_ocupado(mapas, data):
+    """Verifica em O(1) se um dia está ocupado"""
+    return bool(mapas.get(data.year, 0) >> (data - date(data.year, 1, 1)).days & 1)
+
+
+def intervalo_ocupado(mapas, inicio, fim):
+    """Verifica se algum dia do intervalo está ocupado"""
+    return any(mapas.get(ano, 0) & mapa_do_intervalo(inicio, fim, ano)
+               for ano in anos_do_intervalo(inicio, fim))
+
+
+def unir_mapas(*conjuntos_de_mapas):
+    """União (OU bit a bit) de mapas de várias categorias, ano a ano"""
+    uniao = {}
+    for mapas in conjuntos_de_mapas:
+        for ano, mapa in mapas.items():
+            uniao[ano] = uniao.get(ano, 0) | mapa
+    return uniao
+
+
+def colunas_ocorrencia():
+    """Colunas de eventos necessárias para expandir as ocorrências"""
+    return [tabela_eventos.c.datainicio, tabela_eventos.c.datafim] + \
+        [tabela_eventos.c[coluna] for coluna in COLUNAS_RECORRENCIA]
+
+
+def _intervalos_eventos(conexao, id_categoria, anos=None):
+    """Intervalos das ocorrências dos eventos da categoria (apenas dos anos informados, se houver)"""
+    consulta = select(*colunas_ocorrencia()).where(tabela_eventos.c.id_categoria == id_categoria)
+    if anos is None:
+        return list(intervalos_de_eventos(conexao.execute(consulta)))
+
+    consulta = consulta.where(or_(*[
+        and_(tabela_eventos.c.datainicio <= date(ano, 12, 31), tabela_eventos.c.datafim >= date(ano, 1, 1))
+        for ano in anos
+    ]))
+    return list(intervalos_de_eventos(conexao.execute(consulta), date(min(anos), 1, 1), date(max(anos), 12, 31)))
+
+
+def calcular_mapas(intervalos):
+    """Calcula os mapas de todos os anos cobertos pelos intervalos"""
+    anos = set()
+    for inicio, fim in intervalos:
+        anos.update(anos_do_intervalo(inicio, fim))
+    mapas = {ano: mapa_de_intervalos(intervalos, ano) for ano in anos}
+    return {ano: mapa for ano, mapa in mapas.items() if mapa}
+
+
+def carregar_mapas(conexao, id_categoria, anos=None):
+    """Lê os mapas gravados de uma categoria ({ano: mapa})"""
+    consulta = (select(tabela_ocupacao.c.ano, tabela_ocupacao.c.mapa)
+                .where(tabela_ocupacao.c.id_categoria == id_categoria))
+    if anos is not None:
+        consulta = consulta.where(tabela_ocupacao.c.ano.in_(list(anos)))
+    return {linha.ano: de_bytes(linha.mapa) for linha in conexao.execute(consulta)}
+
+
+def _gravar_mapa(conexao, id_categoria, ano, mapa):
+    filtro = and_(tabela_ocupacao.c.id_categoria == id_categoria, tabela_ocupacao.c.ano == ano)
+    if not mapa:
+        conexao.execute(delete(tabela_ocupacao).where(filtro))
+        return
+    valores = {'mapa': para_bytes(mapa), 'diasocupados': popcount(mapa)}
+    if conexao.execute(update(tabela_ocupacao).where(filtro).values(**valores)).rowcount == 0:
+        conexao.execute(insert(tabela_ocupacao).values(id_categoria=id_categoria, ano=ano, **valores))
+
+
+def reconstruir_mapas(conexao, id_categoria, anos=None):
+    """
+    Reconstrói os mapas de uma categoria a partir dos eventos.
+    Com 'anos', apenas esses anos são refeitos; sem, a categoria inteira.
+    """
+    if anos is None:
+        conexao.execute(delete(tabela_ocupacao).where(tabela_ocupacao.c.id_categoria == id_categoria))
+        for ano, mapa in calcular_mapas(_intervalos_eventos(conexao, id_categoria)).items():
+            _gravar_mapa(conexao, id_categoria, ano, mapa)
+        return
+
+    intervalos = _intervalos_eventos(conexao, id_categoria, anos)
+    for ano in anos:
+        _gravar_mapa(conexao, id_categoria, ano, mapa_de_intervalos(intervalos, ano))
+
+
+def atualizar_mapas(conexao, anos_por_categoria, removidas=()):
+    """Atualiza os mapas dos anos afetados por um flush ({id_categoria: {anos}})"""
+    for id_categoria in removidas:
+        conexao.execute(delete(tabela_ocupacao).where(tabela_ocupacao.c.id_categoria == id_categoria))
+
+    for id_categoria, anos in anos_por_categoria.items():
+        if id_categoria in removidas:
+            continue
+        existentes = conexao.execute(
+            select(tabela_ocupacao.c.ano).where(tabela_ocupacao.c.id_categoria == id_categoria).limit(1)
+        ).first()
+        # Categoria sem nenhum mapa (ex.: dados anteriores à tabela): reconstrói todos os anos
+        reconstruir_mapas(conexao, id_categoria, None if existentes is None else sorted(anos))
+
+
+def mapas_categoria(id_categoria):
+    """
+    Mapas de uma categoria para leitura. Se a categoria ainda não tem mapas gravados,
+    eles são calculados em memória a partir dos eventos, sem gravar nada.
+    """
+    conexao = db.session.connection()
+    mapas = carregar_mapas(conexao, id_categoria)
+    if mapas:
+        return mapas
+    return calcular_mapas(_intervalos_eventos(conexao, id_categoria))
+
+
+def reconstruir_todos_mapas():
+    """Reconstrói os mapas de todas as categorias (usado por 'flask recompute-counts')"""
+    conexao = db.session.connection()
+    intervalos_por_categoria = {}
+    for linha in conexao.execute(select(tabela_eventos.c.id_categoria, *colunas_ocorrencia())):
+        intervalos_por_categoria.setdefault(linha.id_categoria, []).extend(expandir_ocorrencias(linha))
+
+    conexao.execute(delete(tabela_ocupacao))
+    linhas = []
+    for id_categoria, intervalos in intervalos_por_categoria.items():
+        for ano, mapa in calcular_mapas(intervalos).items():
+            linhas.append({'id_categoria': id_categoria, 'ano': ano,
+                           'mapa': para_bytes(mapa), 'diasocupados': popcount(mapa)})
+    if linhas:
+        conexao.execute(insert(tabela_ocupacao), linhas)
+    return len(linhas)
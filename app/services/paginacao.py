@@ -0,0 +1,124 @@
+"""
+Paginação por chave (keyset/seek) para as listagens.
+
+Em vez de OFFSET, cada página continua a partir dos valores da última linha da
+página anterior: WHERE (a, b) > (:a, :b) ORDER BY a, b LIMIT n. Com um índice em
+(a, b) o custo de qualquer página é o de ler n linhas, não importa o quão longe
+ela esteja. O cursor enviado ao cliente é a última chave codificada em base64.
+"""
+import base64
+import json
+from dataclasses import dataclass
+from datetime import date
+
+from flask import abort, request, url_for
+from sqlalchemy import and_, false, or_
+
+POR_PAGINA_PADRAO = 50
+POR_PAGINA_MAXIMO = 200
+
+
+@dataclass
+class Pagina:
+    itens: list
+    proximo_cursor: str = None
+
+    @property
+    def tem_proxima(self):
+        return self.proximo_cursor is not None
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+def codificar_cursor(valores):
+    """Codifica a chave da última linha (datas viram texto ISO)"""
+    valores = [v.isoformat() if isinstance(v, date) else v for v in valores]
+    return base64.urlsafe_b64encode(json.dumps(valores).encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor, tipos):
+    """
+    Decodifica um cursor, convertendo cada valor com o tipo correspondente
+    (date ou int); valores nulos continuam None. Retorna None sem cursor e
+    levanta CursorInvalido se ele não puder ser lido, em vez de voltar à
+    primeira página sem avisar.
+    """
+    if not cursor:
+        return None
+    try:
+        valores = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if not isinstance(valores, list) or len(valores) != len(tipos):
+            raise CursorInvalido(cursor)
+        return [None if v is None else date.fromisoformat(v) if tipo is date else tipo(v)
+                for v, tipo in zip(valores, tipos)]
+    except (ValueError, TypeError):
+        raise CursorInvalido(cursor)
+
+
+def depois_de(colunas, valores, descendente=False):
+    """
+    Condição (c1, c2, ...) > (v1, v2, ...) escrita com AND/OR, portável entre bancos
+    (com descendente, a condição é <, para ordens decrescentes). Nulos ficam antes
+    de todos os valores na ordem crescente e depois deles na decrescente, como em
+    ordem_nulos().
+    """
+    condicoes = []
+    for i, (coluna, valor) in enumerate(zip(colunas, valores)):
+        anteriores = [c.is_(None) if v is None else c == v for c, v in zip(colunas[:i], valores[:i])]
+        condicoes.append(and_(*anteriores, _seguinte(coluna, valor, descendente)))
+    return or_(*condicoes)
+
+
+def _seguinte(coluna, valor, descendente):
+    if valor is None:
+        return false() if descendente else coluna.is_not(None)
+    if descendente:
+        return or_(coluna < valor, coluna.is_(None))
+    return coluna > valor
+
+
+def ordem_nulos(coluna, descendente=False):
+    """Ordenação com nulos primeiro (crescente) ou por último (decrescente), igual em todos os bancos"""
+    return coluna.desc().nulls_last() if descendente else coluna.asc().nulls_first()
+
+
+def por_pagina(valor):
+    """Tamanho de página pedido pelo cliente, limitado a POR_PAGINA_MAXIMO"""
+    try:
+        return max(1, min(int(valor), POR_PAGINA_MAXIMO))
+    except (TypeError, ValueError):
+        return POR_PAGINA_PADRAO
+
+
+def paginar(query, colunas, tipos, cursor=None, limite=POR_PAGINA_PADRAO):
+    """
+    Aplica ordem e paginação por chave a uma consulta ORM.
+    'colunas' é a chave de ordenação (a última deve ser única, ex.: o id) e 'tipos'
+    o tipo Python de cada uma, usado para ler o cursor.
+    """
+    try:
+        chave = decodificar_cursor(cursor, tipos)
+    except CursorInvalido:
+        abort(400, description='Cursor de paginação inválido')
+    if chave is not None:
+        query = query.filter(depois_de(colunas, chave))
+
+    itens = query.order_by(*colunas).limit(limite + 1).all()
+    if len(itens) <= limite:
+        return Pagina(itens)
+
+    itens = itens[:limite]
+    ultimo = itens[-1]
+    return Pagina(itens, codificar_cursor([getattr(ultimo, coluna.key) for coluna in colunas]))
+
+
+def links_paginacao(endpoint, pagina, **valores):
+    """URLs da próxima página e da primeira (se não estamos nela), preservando os filtros da requisição"""
+    argumentos = {k: v for k, v in request.args.items() if k != 'cursor'}
+    argumentos.update(valores)
+    return {
+        'proxima_url': url_for(endpoint, cursor=pagina.proximo_cursor, **argumentos) if pagina.tem_proxima else None,
+        'primeira_url': url_for(endpoint, **argumentos) if request.args.get('cursor') else None,
+    }
@@ -0,0 +1,78 @@
+"""
+Perfil de desempenho do SQLite (SQLITE_DESEMPENHO=True), para instalações com
+USE_SQLITE=True.
+
+Cada conexão nova recebe os PRAGMAs de pragmas_desempenho() num evento 'connect':
+    journal_mode=WAL      leitores leem o último commit enquanto uma escrita
+                          acontece, em vez de esperar por ela
+    synchronous=NORMAL    com WAL, o disco só é sincronizado nos checkpoints
+    mmap_size, cache_size páginas lidas por mapeamento de memória e cache maior
+    temp_store=MEMORY     ordenações e tabelas temporárias em memória
+    busy_timeout          espera por uma escrita concorrente (DB_BUSY_TIMEOUT_MS)
+
+As rotas GET usam um segundo engine sobre o mesmo arquivo (app.extensions
+['engine_leitura'], ver app.services.sessao), com pool próprio e PRAGMA query_only: as leituras não
+disputam conexões com as gravações, e uma gravação acidental numa rota GET
+falha em vez de travar o banco.
+"""
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+
+from app import db
+from app.services.sessao import CHAVE_LEITURA
+
+PRAGMAS_CONFERIDOS = ('journal_mode', 'synchronous', 'mmap_size', 'cache_size',
+                      'temp_store', 'busy_timeout', 'query_only')
+
+
+def perfil_ativo(config):
+    """O perfil só se aplica a um banco SQLite em arquivo (WAL não existe em memória)"""
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    return bool(config.get('SQLITE_DESEMPENHO')) and url.get_backend_name() == 'sqlite' \
+        and url.database not in (None, '', ':memory:')
+
+
+def pragmas_desempenho(config):
+    return [
+        ('journal_mode', 'WAL'),
+        ('synchronous', 'NORMAL'),
+        ('mmap_size', config['SQLITE_MMAP_BYTES']),
+        # Negativo: tamanho em KiB, e não em páginas
+        ('cache_size', -config['SQLITE_CACHE_KB']),
+        ('temp_store', 'MEMORY'),
+        ('busy_timeout', config['DB_BUSY_TIMEOUT_MS']),
+    ]
+
+
+def aplicar_perfil(app):
+    """
+    Registra os PRAGMAs no engine da aplicação e cria o engine de leitura, com as
+    mesmas opções de pool (depois de db.init_app)
+    """
+    if not perfil_ativo(app.config):
+        return
+    pragmas = pragmas_desempenho(app.config)
+    leitura = create_engine(app.config['SQLALCHEMY_DATABASE_URI'],
+                            **app.config['SQLALCHEMY_ENGINE_OPTIONS'])
+    with app.app_context():
+        _executar_ao_conectar(db.engine, pragmas)
+    _executar_ao_conectar(leitura, pragmas + [('query_only', 'ON')])
+    app.extensions[CHAVE_LEITURA] = leitura
+
+
+def _executar_ao_conectar(engine, pragmas):
+    @event.listens_for(engine, 'connect')
+    def ao_conectar(conexao_dbapi, registro):
+        cursor = conexao_dbapi.cursor()
+        try:
+            for pragma, valor in pragmas:
+                cursor.execute(f'PRAGMA {pragma} = {valor}')
+        finally:
+            cursor.close()
+
+
+def pragmas_atuais(engine):
+    """Valores em vigor numa conexão do engine (exibidos em /healthz/db)"""
+    with engine.connect() as conexao:
+        return {pragma: conexao.exec_driver_sql(f'PRAGMA {pragma}').scalar()
+                for pragma in PRAGMAS_CONFERIDOS}
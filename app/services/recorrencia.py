@@ -0,0 +1,133 @@
+"""
+Regras de recorrência de eventos e expansão preguiçosa das ocorrências.
+
+Um evento recorrente guarda a regra nas colunas recorrencia* de Eventos:
+- recorrenciadias: dias da semana em que ocorre (1=Segunda até 7=Domingo, ex.: '135');
+- recorrenciaintervalo: repete a cada N semanas (padrão 1);
+- recorrenciacontagem: número máximo de ocorrências (opcional);
+- recorrenciaexcecoes: datas sem ocorrência, no formato AAAA-MM-DD separadas por vírgula.
+
+datainicio e datafim delimitam a série (datafim faz o papel de "até"), de modo que
+as consultas por sobreposição de datas continuam valendo para eventos recorrentes.
+Cada ocorrência dura um dia.
+"""
+import re
+from datetime import date, timedelta
+
+from app.services.dias import _POPCOUNT, como_data, mascara_dias_semana
+
+COLUNAS_RECORRENCIA = ('recorrenciadias', 'recorrenciaintervalo', 'recorrenciacontagem', 'recorrenciaexcecoes')
+
+
+def eh_recorrente(evento):
+    """Verifica se o evento (modelo ou linha de consulta) tem regra de recorrência"""
+    return bool(mascara_dias_semana(getattr(evento, 'recorrenciadias', None)))
+
+
+def datas_excecao(texto):
+    """Converte o texto de exceções ('2025-04-18, 2025-05-01') em um conjunto de datas"""
+    return {date.fromisoformat(parte) for parte in re.split(r'[\s,;]+', texto or '') if parte}
+
+
+def _segunda_feira(data):
+    return data - timedelta(days=data.weekday())
+
+
+def _ocorrencias_antes(inicio_serie, data, mascara, intervalo):
+    """Quantas datas da regra (sem descontar exceções) caem em [inicio_serie, data), em O(1)"""
+    if data <= inicio_serie:
+        return 0
+
+    semana = (_segunda_feira(data) - _segunda_feira(inicio_serie)).days // 7
+    semanas_ativas_completas = -(-semana // intervalo)  # semanas ativas antes da semana de 'data'
+
+    total = semanas_ativas_completas * _POPCOUNT[mascara]
+    total -= _POPCOUNT[mascara & ((1 << inicio_serie.weekday()) - 1)]
+    if semana % intervalo == 0:
+        total += _POPCOUNT[mascara & ((1 << data.weekday()) - 1)]
+    return total
+
+
+def expandir_ocorrencias(evento, inicio=None, fim=None):
+    """
+    Gera, em ordem, os intervalos (inicio, fim) das ocorrências do evento que tocam
+    a janela [inicio, fim]. Sem janela, gera a série inteira.
+
+    Eventos sem recorrência geram um único intervalo. Nos recorrentes, o gerador
+    salta direto para a semana da janela e só materializa as ocorrências dentro dela.
+    """
+    inicio_evento, fim_evento = como_data(evento.datainicio), como_data(evento.datafim)
+    janela_inicio = max(inicio_evento, inicio) if inicio else inicio_evento
+    janela_fim = min(fim_evento, fim) if fim else fim_evento
+
+    if not eh_recorrente(evento):
+        if janela_inicio <= janela_fim:
+            yield (inicio_evento, fim_evento)
+        return
+
+    if janela_inicio > janela_fim:
+        return
+
+    mascara = mascara_dias_semana(evento.recorrenciadias)
+    intervalo = max(evento.recorrenciaintervalo or 1, 1)
+    limite = evento.recorrenciacontagem
+    excecoes = datas_excecao(evento.recorrenciaexcecoes)
+    dias_da_semana = [d for d in range(7) if mascara & (1 << d)]
+
+    numero = _ocorrencias_antes(inicio_evento, janela_inicio, mascara, intervalo) if limite else 0
+
+    # Primeira semana ativa (múltipla do intervalo) a partir da semana da janela
+    semana_inicial = _segunda_feira(inicio_evento)
+    semana = (_segunda_feira(janela_inicio) - semana_inicial).days // 7
+    if semana % intervalo:
+        semana += intervalo - semana % intervalo
+
+    while True:
+        segunda = semana_inicial + timedelta(weeks=semana)
+        if segunda > janela_fim:
+            return
+        for dia_semana in dias_da_semana:
+            data = segunda + timedelta(days=dia_semana)
+            if data < janela_inicio:
+                continue
+            if data > janela_fim or (limite and numero >= limite):
+                return
+            numero += 1
+            if data not in excecoes:
+                yield (data, data)
+        semana += intervalo
+
+
+def ultima_ocorrencia(evento):
+    """Data da última ocorrência da série, ou None se a regra não gera nenhuma"""
+    ultima = None
+    for _, fim in expandir_ocorrencias(evento):
+        ultima = fim
+    return ultima
+
+
+def intervalos_de_eventos(eventos, inicio=None, fim=None):
+    """Gera os intervalos das ocorrências de vários eventos dentro da janela"""
+    for evento in eventos:
+        yield from expandir_ocorrencias(evento, inicio, fim)
+
+
+def ocorrencias_se_sobrepoem(evento_a, evento_b):
+    """Verifica se alguma ocorrência de evento_a se sobrepõe a alguma de evento_b"""
+    inicio = max(como_data(evento_a.datainicio), como_data(evento_b.datainicio))
+    fim = min(como_data(evento_a.datafim), como_data(evento_b.datafim))
+    if inicio > fim:
+        return False
+
+    # Varredura simultânea das duas sequências ordenadas, sem materializá-las
+    ocorrencias_a = expandir_ocorrencias(evento_a, inicio, fim)
+    ocorrencias_b = expandir_ocorrencias(evento_b, inicio, fim)
+    a, b = next(ocorrencias_a, None), next(ocorrencias_b, None)
+    while a and b:
+        if a[0] <= b[1] and b[0] <= a[1]:
+            return True
+        if a[1] < b[1]:
+            a = next(ocorrencias_a, None)
+        else:
+            b = next(ocorrencias_b, None)
+    return False
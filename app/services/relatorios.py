@@ -0,0 +1,191 @@
+"""
+Cálculo dos relatórios de dias letivos e feriados em qualquer banco.
+
+As visões vw_dias_letivos, vw_feriados_dias_letivos, vw_feriados_do_ano e
+vw_dias_letivos_por_periodo só existem no PostgreSQL (ver scripts/setup.py).
+Aqui os mesmos relatórios são calculados com consultas do SQLAlchemy Core
+agregadas no banco (uma linha por categoria ou por período, nunca por evento)
+e um pós-processamento em Python sobre esses poucos resultados, devolvendo as
+mesmas colunas das visões. É o caminho padrão em todos os bancos.
+
+As regras de nome das visões (cc.nome LIKE '%Feriados%' etc.) são aplicadas em
+Python sobre a lista de categorias, com a mesma semântica (sensível a maiúsculas)
+no PostgreSQL e no SQLite, onde LIKE ignora maiúsculas.
+"""
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+from sqlalchemy import select, func
+
+from app import db
+from app.models.models import Calendario, CategoriaCalendario, Eventos, OcupacaoCategoria, Periodo
+
+# NumPy é opcional: se estiver instalado, o filtro de dias úteis usa is_busday
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+tabela_periodo = Periodo.__table__
+tabela_calendario = Calendario.__table__
+tabela_categorias = CategoriaCalendario.__table__
+tabela_eventos = Eventos.__table__
+tabela_ocupacao = OcupacaoCategoria.__table__
+
+DIAS_SEMANA = ('Segunda-feira', 'Terça-feira', 'Quarta-feira', 'Quinta-feira',
+               'Sexta-feira', 'Sábado', 'Domingo')
+
+# Colunas de cada relatório, as mesmas das visões do PostgreSQL (app/models/views.py)
+COLUNAS = {
+    'dias_letivos': ('periodo', 'calendario', 'categoria', 'dias_planejados',
+                     'dias_com_eventos', 'eventos_ultimos_30_dias'),
+    'feriados_dias_letivos': ('feriado', 'data', 'dia_semana', 'periodo', 'categoria_afetada'),
+    'feriados_ano': ('id_evento', 'feriado', 'datainicio', 'datafim', 'calendario'),
+    'dias_por_periodo': ('periodo', 'total_dias_letivos'),
+}
+
+
+def _categorias():
+    """Categorias com período e calendário, numa única consulta"""
+    consulta = (
+        select(tabela_categorias.c.id_categoria, tabela_categorias.c.nome,
+               tabela_categorias.c.totaldias, tabela_categorias.c.habilitacaocontagem,
+               tabela_categorias.c.id_periodo,
+               tabela_periodo.c.descricao.label('periodo'), tabela_periodo.c.datainicial,
+               tabela_calendario.c.nome.label('calendario'), tabela_calendario.c.ativo)
+        .join(tabela_periodo, tabela_periodo.c.id_periodo == tabela_categorias.c.id_periodo)
+        .join(tabela_calendario, tabela_calendario.c.id_calendario == tabela_categorias.c.id_calendario)
+    )
+    return db.session.execute(consulta).all()
+
+
+def _conta_dias_letivos(categoria):
+    """Mesmo filtro das visões de dias letivos: contagem habilitada, sem feriados e recessos"""
+    return (bool(categoria.habilitacaocontagem)
+            and 'Feriados' not in categoria.nome and 'Recessos' not in categoria.nome)
+
+
+def _intervalo_do_ano(ano):
+    """[1º de janeiro, 1º de janeiro do ano seguinte), semiaberto para datas gravadas com hora"""
+    return date(ano, 1, 1), date(ano + 1, 1, 1)
+
+
+def _dias_uteis(datas):
+    """Indica, para cada data, se ela cai de segunda a sexta"""
+    if np is None:
+        return [data.weekday() < 5 for data in datas]
+    return np.is_busday(np.array(datas, dtype='datetime64[D]')).tolist()
+
+
+def dias_letivos(hoje=None):
+    """Dias planejados, dias com eventos e eventos dos últimos 30 dias de cada categoria letiva"""
+    hoje = hoje or date.today()
+    categorias = [c for c in _categorias() if _conta_dias_letivos(c)]
+    if not categorias:
+        return []
+    ids = [c.id_categoria for c in categorias]
+
+    ocupados = dict(db.session.execute(
+        select(tabela_ocupacao.c.id_categoria, func.sum(tabela_ocupacao.c.diasocupados))
+        .where(tabela_ocupacao.c.id_categoria.in_(ids))
+        .group_by(tabela_ocupacao.c.id_categoria)
+    ).all())
+    recentes = dict(db.session.execute(
+        select(tabela_eventos.c.id_categoria, func.count())
+        .where(tabela_eventos.c.id_categoria.in_(ids),
+               tabela_eventos.c.datainicio >= hoje - timedelta(days=30),
+               tabela_eventos.c.datainicio < hoje + timedelta(days=1))
+        .group_by(tabela_eventos.c.id_categoria)
+    ).all())
+
+    categorias.sort(key=lambda c: (c.calendario, c.datainicial))
+    return [SimpleNamespace(periodo=c.periodo, calendario=c.calendario, categoria=c.nome,
+                            dias_planejados=c.totaldias,
+                            dias_com_eventos=int(ocupados.get(c.id_categoria) or 0),
+                            eventos_ultimos_30_dias=recentes.get(c.id_categoria, 0))
+            for c in categorias]
+
+
+def dias_por_periodo(hoje=None):
+    """Número de datas distintas com eventos letivos em cada período"""
+    ids = [c.id_categoria for c in _categorias() if _conta_dias_letivos(c)]
+    if not ids:
+        return []
+
+    totais = db.session.execute(
+        select(tabela_periodo.c.descricao, func.count(func.distinct(tabela_eventos.c.datainicio)))
+        .join(tabela_categorias, tabela_categorias.c.id_periodo == tabela_periodo.c.id_periodo)
+        .join(tabela_eventos, tabela_eventos.c.id_categoria == tabela_categorias.c.id_categoria)
+        .where(tabela_categorias.c.id_categoria.in_(ids))
+        .group_by(tabela_periodo.c.descricao)
+        .order_by(tabela_periodo.c.descricao)
+    ).all()
+    return [SimpleNamespace(periodo=periodo, total_dias_letivos=total) for periodo, total in totais]
+
+
+def feriados_dias_letivos(hoje=None):
+    """Feriados do ano atual que caem de segunda a sexta, com as categorias de aulas do mesmo período"""
+    hoje = hoje or date.today()
+    categorias = _categorias()
+    feriados = {c.id_categoria: c for c in categorias if 'Feriados' in c.nome}
+    aulas_por_periodo = {}
+    for c in categorias:
+        if 'Aulas' in c.nome:
+            aulas_por_periodo.setdefault(c.id_periodo, []).append(c.nome)
+    if not feriados or not aulas_por_periodo:
+        return []
+
+    inicio, fim = _intervalo_do_ano(hoje.year)
+    eventos = db.session.execute(
+        select(tabela_eventos.c.titulo, tabela_eventos.c.datainicio, tabela_eventos.c.id_categoria)
+        .where(tabela_eventos.c.id_categoria.in_(list(feriados)),
+               tabela_eventos.c.datainicio >= inicio, tabela_eventos.c.datainicio < fim)
+        .order_by(tabela_eventos.c.datainicio, tabela_eventos.c.titulo)
+    ).all()
+    uteis = _dias_uteis([e.datainicio for e in eventos])
+
+    linhas = []
+    for evento, util in zip(eventos, uteis):
+        categoria = feriados[evento.id_categoria]
+        if not util:
+            continue
+        for aula in aulas_por_periodo.get(categoria.id_periodo, ()):
+            linhas.append(SimpleNamespace(feriado=evento.titulo, data=evento.datainicio,
+                                          dia_semana=DIAS_SEMANA[evento.datainicio.weekday()],
+                                          periodo=categoria.periodo, categoria_afetada=aula))
+    return linhas
+
+
+def feriados_ano(hoje=None):
+    """Feriados do ano atual nos calendários ativos"""
+    hoje = hoje or date.today()
+    feriados = {c.id_categoria: c for c in _categorias()
+                if c.ativo and 'feriado' in c.nome.lower()}
+    if not feriados:
+        return []
+
+    inicio, fim = _intervalo_do_ano(hoje.year)
+    eventos = db.session.execute(
+        select(tabela_eventos.c.id_evento, tabela_eventos.c.titulo, tabela_eventos.c.datainicio,
+               tabela_eventos.c.datafim, tabela_eventos.c.id_categoria)
+        .where(tabela_eventos.c.id_categoria.in_(list(feriados)),
+               tabela_eventos.c.datainicio >= inicio, tabela_eventos.c.datainicio < fim)
+        .order_by(tabela_eventos.c.datainicio, tabela_eventos.c.id_evento)
+    ).all()
+    return [SimpleNamespace(id_evento=e.id_evento, feriado=e.titulo, datainicio=e.datainicio,
+                            datafim=e.datafim, calendario=feriados[e.id_categoria].calendario)
+            for e in eventos]
+
+
+# Relatório (chave de available_models) -> função que calcula as linhas
+RELATORIOS = {
+    'dias_letivos': dias_letivos,
+    'feriados_dias_letivos': feriados_dias_letivos,
+    'feriados_ano': feriados_ano,
+    'dias_por_periodo': dias_por_periodo,
+}
+
+
+def calcular_relatorio(nome, hoje=None):
+    """Linhas de um relatório de RELATORIOS"""
+    return RELATORIOS[nome](hoje)
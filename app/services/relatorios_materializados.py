@@ -0,0 +1,205 @@
+"""
+Visões materializadas dos relatórios de agregação (somente PostgreSQL).
+
+vw_resumo_calendario, vw_dias_letivos e vw_dias_letivos_por_periodo refazem
+junções com COUNT(DISTINCT ...) a cada acesso. 'flask init-advanced-features' cria
+cópias materializadas (mv_*, ver scripts/setup.py) que os relatórios leem no lugar
+das visões. Elas são atualizadas com REFRESH MATERIALIZED VIEW CONCURRENTLY (os
+leitores não são bloqueados) pelo comando 'flask refresh-reports' ou, depois de
+gravações, por um temporizador que agrupa as gravações de um intervalo num único
+refresh. A tabela snapshotrelatorio guarda quando cada uma foi atualizada.
+
+eventos_ultimos_30_dias (mv_dias_letivos) depende da data do refresh: um snapshot
+de um dia anterior também agenda um refresh quando é lido, e o README sugere um
+'flask refresh-reports' diário para que ele não dependa de acessos.
+"""
+import threading
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+from flask import current_app, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+
+from app import db
+from app.models.models import Calendario, CategoriaCalendario, Eventos, Periodo, TipoCalendario
+from app.models.views import registro_visoes
+from app.services.versoes import etag_global
+
+# Relatório (chave de available_models) -> (visão materializada, ordenação da visão original)
+VISOES_MATERIALIZADAS = {
+    'resumo_calendario': ('mv_resumo_calendario', 'ano DESC, nomecalendario'),
+    'dias_letivos': ('mv_dias_letivos', 'calendario, datainicial'),
+    'dias_por_periodo': ('mv_dias_letivos_por_periodo', 'periodo'),
+}
+
+ATRASO_PADRAO = 30  # segundos entre a primeira gravação e o refresh automático
+
+# Chave do pg_try_advisory_xact_lock: um refresh por vez, mesmo com vários workers
+_CHAVE_TRAVA = 7_310_017
+
+_MODELOS_OBSERVADOS = (Calendario, CategoriaCalendario, Eventos, Periodo, TipoCalendario)
+
+_temporizador = None
+_trava_temporizador = threading.Lock()
+
+
+def materializadas_disponiveis():
+    """Nomes das visões materializadas existentes (do catálogo de visões, consultado uma vez por engine)"""
+    if db.engine.name != 'postgresql':
+        return frozenset()
+    return registro_visoes.catalogo() & {nome for nome, _ in VISOES_MATERIALIZADAS.values()}
+
+
+def visao_materializada(relatorio):
+    """Nome da visão materializada do relatório, se ela existir neste banco"""
+    if relatorio not in VISOES_MATERIALIZADAS:
+        return None
+    nome = VISOES_MATERIALIZADAS[relatorio][0]
+    return nome if nome in materializadas_disponiveis() else None
+
+
+def consulta_materializada(relatorio, colunas):
+    """SELECT das colunas na visão materializada do relatório, na ordem da visão original"""
+    nome, ordem = VISOES_MATERIALIZADAS[relatorio]
+    return text(f"SELECT {', '.join(colunas)} FROM {nome} ORDER BY {ordem}")
+
+
+def linhas_materializadas(relatorio, colunas):
+    """Linhas da visão materializada do relatório, na ordem da visão original"""
+    resultado = db.session.execute(consulta_materializada(relatorio, colunas))
+    return [SimpleNamespace(**linha._mapping) for linha in resultado]
+
+
+def ultima_atualizacao(nome=None):
+    """Quando a visão materializada (ou a mais antiga delas, sem nome) foi atualizada"""
+    if nome:
+        return db.session.execute(
+            text("SELECT atualizadoem FROM snapshotrelatorio WHERE visao = :visao"), {'visao': nome}
+        ).scalar()
+    return db.session.execute(text("SELECT MIN(atualizadoem) FROM snapshotrelatorio")).scalar()
+
+
+def descrever_idade(momento, agora=None):
+    """Idade de um snapshot em texto curto ('menos de 1 min', '5 min', '2 h', '3 dias')"""
+    segundos = ((agora or datetime.now()) - momento).total_seconds()
+    if segundos < 60:
+        return 'menos de 1 min'
+    if segundos < 3600:
+        return f'{int(segundos // 60)} min'
+    if segundos < 86400:
+        return f'{int(segundos // 3600)} h'
+    return f'{int(segundos // 86400)} dias'
+
+
+def snapshot_do_relatorio(relatorio):
+    """Dados do snapshot exibidos na página do relatório, ou None se ele lê a visão comum"""
+    nome = visao_materializada(relatorio)
+    momento = ultima_atualizacao(nome) if nome else None
+    if momento is None:
+        return None
+    if momento.date() < datetime.now().date():
+        _agendar_atualizacao()
+    return {'visao': nome, 'atualizadoem': momento, 'idade': descrever_idade(momento)}
+
+
+def etag_relatorios(*_):
+    """Versão global dos dados mais o momento do último refresh das visões materializadas"""
+    etag = etag_global()
+    if materializadas_disponiveis():
+        atualizacao = db.session.execute(text("SELECT MAX(atualizadoem) FROM snapshotrelatorio")).scalar()
+        etag = f'{etag}-mv{atualizacao.timestamp() if atualizacao else 0}'
+    return etag
+
+
+def atualizar_relatorios(concorrente=True):
+    """
+    Executa o REFRESH de todas as visões materializadas e registra o momento em
+    snapshotrelatorio. Retorna [(visão, segundos)], ou None se outro processo já
+    está atualizando.
+    """
+    registro_visoes.esquecer()
+    nomes = [nome for nome, _ in VISOES_MATERIALIZADAS.values() if nome in materializadas_disponiveis()]
+    if not nomes:
+        return []
+
+    if not db.session.execute(text("SELECT pg_try_advisory_xact_lock(:chave)"), {'chave': _CHAVE_TRAVA}).scalar():
+        db.session.rollback()
+        return None
+
+    # O refresh pode passar do DB_STATEMENT_TIMEOUT_MS pensado para as requisições
+    db.session.execute(text("SET LOCAL statement_timeout = 0"))
+    modo = 'CONCURRENTLY ' if concorrente else ''
+    tempos = []
+    for nome in nomes:
+        inicio = time.perf_counter()
+        db.session.execute(text(f"REFRESH MATERIALIZED VIEW {modo}{nome}"))
+        db.session.execute(text("""
+            INSERT INTO snapshotrelatorio (visao, atualizadoem) VALUES (:visao, CURRENT_TIMESTAMP)
+            ON CONFLICT (visao) DO UPDATE SET atualizadoem = EXCLUDED.atualizadoem
+        """), {'visao': nome})
+        tempos.append((nome, time.perf_counter() - inicio))
+    db.session.commit()
+    return tempos
+
+
+def registrar_atualizacao_automatica():
+    """
+    Agenda um refresh das visões materializadas depois de gravações que as afetam.
+    Gravações feitas enquanto um refresh está agendado entram no mesmo refresh.
+    O atraso vem de RELATORIOS_ATRASO_ATUALIZACAO (negativo desliga o agendamento).
+    """
+    if not event.contains(Session, 'after_flush', _marcar_desatualizados):
+        event.listen(Session, 'after_flush', _marcar_desatualizados)
+        event.listen(Session, 'after_commit', _agendar_apos_commit)
+        event.listen(Session, 'after_rollback', _descartar_marca)
+
+
+def _marcar_desatualizados(session, flush_context):
+    alterados = list(session.new) + list(session.dirty) + list(session.deleted)
+    if any(isinstance(obj, _MODELOS_OBSERVADOS) for obj in alterados):
+        session.info['relatorios_desatualizados'] = True
+
+
+def _descartar_marca(session):
+    session.info.pop('relatorios_desatualizados', None)
+
+
+def _agendar_apos_commit(session):
+    if session.info.pop('relatorios_desatualizados', False):
+        _agendar_atualizacao()
+
+
+def _agendar_atualizacao():
+    if not has_app_context() or db.engine.name != 'postgresql':
+        return
+    atraso = current_app.config.get('RELATORIOS_ATRASO_ATUALIZACAO', ATRASO_PADRAO)
+    if atraso < 0:
+        return
+    _agendar(current_app._get_current_object(), atraso)
+
+
+def _agendar(app, atraso):
+    global _temporizador
+    with _trava_temporizador:
+        if _temporizador is not None:
+            return
+        _temporizador = threading.Timer(atraso, _executar_agendado, args=(app,))
+        _temporizador.daemon = True
+        _temporizador.start()
+
+
+def _executar_agendado(app):
+    global _temporizador
+    # Gravações feitas a partir daqui podem não entrar neste refresh: agendam outro
+    with _trava_temporizador:
+        _temporizador = None
+    with app.app_context():
+        try:
+            atualizar_relatorios()
+        except Exception as e:
+            db.session.rollback()
+            app.logger.warning(f"Falha ao atualizar as visões materializadas: {e}")
+        finally:
+            db.session.remove()
@@ -0,0 +1,84 @@
+"""
+Estado do banco e do pool de conexões, exposto em /healthz/db.
+
+Eventos do pool (registrados uma vez por engine, em create_app) contam
+conexões abertas, checkouts, devoluções e invalidações, e o pico de conexões em
+uso ao mesmo tempo — o número a comparar com DB_POOL_SIZE + DB_MAX_OVERFLOW
+para saber se o pool está se esgotando.
+"""
+import threading
+import time
+import weakref
+
+from sqlalchemy import event, text
+from sqlalchemy.pool import QueuePool
+
+from app import db
+
+_estatisticas = weakref.WeakKeyDictionary()
+_trava = threading.Lock()
+
+
+def registrar_estatisticas_pool(engine):
+    """Registra os eventos que alimentam as estatísticas do pool do engine (uma vez por engine)"""
+    with _trava:
+        if engine in _estatisticas:
+            return
+        contadores = _estatisticas[engine] = {
+            'conexoes_abertas': 0, 'checkouts': 0, 'checkins': 0,
+            'invalidadas': 0, 'em_uso': 0, 'pico_em_uso': 0,
+        }
+
+    def ao_conectar(conexao_dbapi, registro):
+        with _trava:
+            contadores['conexoes_abertas'] += 1
+
+    def ao_retirar(conexao_dbapi, registro, proxy):
+        with _trava:
+            contadores['checkouts'] += 1
+            contadores['em_uso'] += 1
+            contadores['pico_em_uso'] = max(contadores['pico_em_uso'], contadores['em_uso'])
+
+    def ao_devolver(conexao_dbapi, registro):
+        with _trava:
+            contadores['checkins'] += 1
+            contadores['em_uso'] = max(contadores['em_uso'] - 1, 0)
+
+    def ao_invalidar(conexao_dbapi, registro, excecao):
+        with _trava:
+            contadores['invalidadas'] += 1
+
+    event.listen(engine.pool, 'connect', ao_conectar)
+    event.listen(engine.pool, 'checkout', ao_retirar)
+    event.listen(engine.pool, 'checkin', ao_devolver)
+    event.listen(engine.pool, 'invalidate', ao_invalidar)
+
+
+def estatisticas_pool(engine=None):
+    """Configuração e ocupação atual do pool do engine, mais os contadores acumulados"""
+    engine = engine or db.engine
+    pool = engine.pool
+    estado = {'classe': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        estado.update({
+            'tamanho': pool.size(),
+            'max_overflow': pool._max_overflow,
+            'timeout': pool.timeout(),
+            'livres': pool.checkedin(),
+            'retiradas': pool.checkedout(),
+            'overflow': pool.overflow(),
+        })
+    with _trava:
+        estado.update(_estatisticas.get(engine, {}))
+    return estado
+
+
+def verificar_banco():
+    """Executa SELECT 1 numa conexão do pool; retorna (ok, latência em ms, erro)"""
+    inicio = time.perf_counter()
+    try:
+        with db.engine.connect() as conexao:
+            conexao.execute(text('SELECT 1'))
+    except Exception as e:
+        return False, (time.perf_counter() - inicio) * 1000, str(e)
+    return True, (time.perf_counter() - inicio) * 1000, None
@@ -0,0 +1,42 @@
+"""
+Sessão do Flask-SQLAlchemy que encaminha as leituras das rotas GET para o
+engine de leitura da aplicação, quando ele existe (perfil de desempenho do
+SQLite, ver app.services.perfil_sqlite).
+
+Fica fora de app.services.perfil_sqlite porque é importada por app/__init__.py
+antes de db existir. Flushes continuam no engine principal: gravações feitas numa
+requisição GET (ex.: pelos eventos de after_flush) não passam pelo engine de leitura.
+"""
+from flask import current_app, has_request_context, request
+from flask_sqlalchemy.session import Session
+
+# Chave de app.extensions com o engine de leitura
+CHAVE_LEITURA = 'engine_leitura'
+METODOS_LEITURA = frozenset({'GET', 'HEAD'})
+
+
+class SessaoRoteada(Session):
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and _requisicao_de_leitura():
+            engine = engine_leitura()
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _requisicao_de_leitura():
+    return has_request_context() and request.method in METODOS_LEITURA
+
+
+def engine_leitura():
+    """Engine de leitura da aplicação atual (None quando não configurado)"""
+    return current_app.extensions.get(CHAVE_LEITURA)
+
+
+def engines_da_aplicacao():
+    """Engines do Flask-SQLAlchemy mais o de leitura, se houver"""
+    engines = list(current_app.extensions['sqlalchemy'].engines.values())
+    if engine_leitura() is not None:
+        engines.append(engine_leitura())
+    return engines
@@ -0,0 +1,147 @@
+"""
+Carimbos de versão por calendário (tabela versaocalendario) e GET condicional.
+
+Toda gravação que afeta o que um calendário exibe (eventos, categorias, o próprio
+calendário, períodos e tipos usados por ele) incrementa a versão do calendário num
+evento after_flush da sessão, venha ela de qualquer blueprint. As páginas e feeds
+de leitura usam a versão como ETag e respondem 304 a um If-None-Match igual,
+consultando apenas esta tabela, sem tocar em eventos.
+"""
+import hashlib
+from datetime import date, datetime
+from functools import wraps
+
+from flask import make_response, request, session as sessao_http
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, select, update, insert, delete, func
+
+from app import db
+from app.models.models import (
+    Calendario, CategoriaCalendario, Eventos, Periodo, TipoCalendario, VersaoCalendario
+)
+from app.services.contagem import valor_anterior
+
+tabela_versoes = VersaoCalendario.__table__
+tabela_categorias = CategoriaCalendario.__table__
+tabela_calendarios = Calendario.__table__
+
+
+def registrar_eventos_versao():
+    """Registra o evento de sessão que incrementa as versões (apenas uma vez por processo)"""
+    if not event.contains(Session, 'after_flush', _apos_flush):
+        event.listen(Session, 'after_flush', _apos_flush)
+
+
+def _calendarios_afetados(session, conexao):
+    """Ids dos calendários cujo conteúdo muda neste flush, e os dos calendários removidos"""
+    calendarios = set()
+    removidos = set()
+    categorias = set()
+    periodos = set()
+    tipos = set()
+
+    modificados = [obj for obj in session.dirty if session.is_modified(obj)]
+    for obj in list(session.new) + modificados + list(session.deleted):
+        if isinstance(obj, Eventos):
+            categorias.update({obj.id_categoria, valor_anterior(obj, 'id_categoria')})
+        elif isinstance(obj, CategoriaCalendario):
+            calendarios.update({obj.id_calendario, valor_anterior(obj, 'id_calendario')})
+        elif isinstance(obj, Calendario):
+            (removidos if obj in session.deleted else calendarios).add(obj.id_calendario)
+        elif isinstance(obj, Periodo):
+            periodos.add(obj.id_periodo)
+        elif isinstance(obj, TipoCalendario):
+            tipos.add(obj.id_tipo)
+
+    categorias.discard(None)
+    if categorias:
+        calendarios.update(conexao.execute(
+            select(tabela_categorias.c.id_calendario)
+            .where(tabela_categorias.c.id_categoria.in_(categorias))
+        ).scalars())
+    if periodos:
+        calendarios.update(conexao.execute(
+            select(tabela_categorias.c.id_calendario)
+            .where(tabela_categorias.c.id_periodo.in_(periodos))
+        ).scalars())
+    if tipos:
+        calendarios.update(conexao.execute(
+            select(tabela_calendarios.c.id_calendario)
+            .where(tabela_calendarios.c.id_tipo.in_(tipos))
+        ).scalars())
+
+    calendarios.discard(None)
+    return calendarios - removidos, removidos
+
+
+def _apos_flush(session, flush_context):
+    conexao = session.connection()
+    calendarios, removidos = _calendarios_afetados(session, conexao)
+
+    if removidos:
+        conexao.execute(delete(tabela_versoes).where(tabela_versoes.c.id_calendario.in_(removidos)))
+
+    agora = datetime.now()
+    for id_calendario in calendarios:
+        resultado = conexao.execute(
+            update(tabela_versoes)
+            .where(tabela_versoes.c.id_calendario == id_calendario)
+            .values(versao=tabela_versoes.c.versao + 1, atualizadoem=agora)
+        )
+        if resultado.rowcount == 0:
+            conexao.execute(insert(tabela_versoes).values(id_calendario=id_calendario, versao=1, atualizadoem=agora))
+
+
+def versao_calendario(id_calendario):
+    """Versão atual de um calendário, ou None se ele ainda não tem carimbo"""
+    return db.session.execute(
+        select(tabela_versoes.c.versao).where(tabela_versoes.c.id_calendario == id_calendario)
+    ).scalar()
+
+
+def versao_global():
+    """Carimbo que muda quando qualquer calendário muda (para relatórios gerais)"""
+    total, soma, ultima = db.session.execute(
+        select(func.count(), func.sum(tabela_versoes.c.versao), func.max(tabela_versoes.c.atualizadoem))
+    ).one()
+    return f'{total}.{soma or 0}.{ultima.timestamp() if ultima else 0}'
+
+
+def etag_calendario(id_calendario):
+    versao = versao_calendario(id_calendario)
+    return None if versao is None else f'cal{id_calendario}-v{versao}'
+
+
+def etag_global(*_):
+    return f'todos-{versao_global()}'
+
+
+def condicional(calcular_etag):
+    """
+    Decorador de rotas de leitura: responde 304 quando o If-None-Match bate com a
+    versão dos dados. A etag inclui a data de hoje (relatórios dependem de CURRENT_DATE),
+    o cabeçalho X-Requested-With (a mesma URL serve HTML e JSON) e o caminho com a query string.
+    """
+    def decorador(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            etag = calcular_etag(*kwargs.values())
+            # Mensagens flash pendentes precisam ser exibidas: não dá para responder 304
+            if etag is None or sessao_http.get('_flashes'):
+                return view(*args, **kwargs)
+
+            partes = [etag, date.today().isoformat(),
+                      request.headers.get('X-Requested-With', ''), request.full_path]
+            etag = hashlib.sha1('|'.join(partes).encode()).hexdigest()[:20]
+            if request.if_none_match.contains_weak(etag):
+                resposta = make_response('', 304)
+            else:
+                resposta = make_response(view(*args, **kwargs))
+                if resposta.status_code != 200:
+                    return resposta
+            resposta.set_etag(etag, weak=True)
+            resposta.headers['Cache-Control'] = 'no-cache'
+            resposta.vary.add('X-Requested-With')
+            return resposta
+        return wrapper
+    return decorador
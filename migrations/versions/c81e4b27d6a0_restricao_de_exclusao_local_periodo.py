@@ -0,0 +1,160 @@
+"""Restrição de exclusão GiST para conflitos de local
+
+Substitui o gatilho impedir_conflito_local_eventos por uma restrição
+EXCLUDE USING gist (local WITH =, daterange(...) WITH &&) nos eventos não
+recorrentes. Os recorrentes passam a ser verificados pelo gatilho de restrição
+trigger_conflito_local_recorrente (adiado para o COMMIT), criado aqui junto com
+a função dias_do_evento; 'flask init-advanced-features' recria os mesmos
+objetos. Apenas PostgreSQL; no SQLite não faz nada.
+
+Revision ID: c81e4b27d6a0
+Revises: a3f18c5d9e21
+Create Date: 2026-10-18 13:20:41.877902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c81e4b27d6a0'
+down_revision = 'a3f18c5d9e21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    op.execute("DROP TRIGGER IF EXISTS trigger_impedir_conflito_local ON eventos")
+    op.execute("DROP FUNCTION IF EXISTS impedir_conflito_local_eventos()")
+    op.execute("""
+        ALTER TABLE eventos ADD CONSTRAINT excl_eventos_local_periodo
+        EXCLUDE USING gist (local WITH =, daterange(datainicio, datafim, '[]') WITH &&)
+        WHERE (local IS NOT NULL AND COALESCE(recorrenciadias, '') = '')
+    """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_eventos_local_recorrentes
+        ON eventos USING gist (local, daterange(datainicio, datafim, '[]'))
+        WHERE local IS NOT NULL AND COALESCE(recorrenciadias, '') <> ''
+    """)
+    # Mesmas definições de scripts/setup.py
+    op.execute("""
+        CREATE OR REPLACE FUNCTION dias_do_evento(inicio DATE, fim DATE, dias TEXT, intervalo INTEGER,
+                                                  contagem INTEGER, excecoes TEXT)
+        RETURNS SETOF DATE AS $$
+            SELECT serie.d
+            FROM (
+                SELECT inicio + i AS d, row_number() OVER (ORDER BY i) AS numero
+                FROM generate_series(0, fim - inicio) AS i
+                WHERE COALESCE(dias, '') = ''
+                   OR (POSITION(EXTRACT(ISODOW FROM inicio + i)::INTEGER::TEXT IN dias) > 0
+                       AND ((i + EXTRACT(ISODOW FROM inicio)::INTEGER - 1) / 7)
+                           % GREATEST(COALESCE(intervalo, 1), 1) = 0)
+            ) AS serie
+            WHERE COALESCE(dias, '') = ''
+               OR ((COALESCE(contagem, 0) <= 0 OR serie.numero <= contagem)
+                   AND NOT (serie.d::TEXT = ANY(regexp_split_to_array(COALESCE(excecoes, ''), '[[:space:],;]+'))));
+        $$ LANGUAGE sql IMMUTABLE;
+
+        CREATE OR REPLACE FUNCTION impedir_conflito_local_recorrente()
+        RETURNS TRIGGER AS $$
+        DECLARE
+            atual eventos%ROWTYPE;
+            conflito BOOLEAN;
+        BEGIN
+          SELECT * INTO atual FROM eventos WHERE id_evento = NEW.id_evento;
+          IF NOT FOUND OR atual.local IS NULL THEN
+            RETURN NULL;
+          END IF;
+
+          IF COALESCE(atual.recorrenciadias, '') = '' THEN
+            PERFORM pg_advisory_xact_lock_shared(hashtext('eventos.local'), hashtext(atual.local));
+            conflito := EXISTS (
+              SELECT 1
+              FROM eventos e
+              WHERE
+                e.local = atual.local
+                AND COALESCE(e.recorrenciadias, '') <> ''
+                AND daterange(e.datainicio, e.datafim, '[]') && daterange(atual.datainicio, atual.datafim, '[]')
+                AND EXISTS (
+                  SELECT 1
+                  FROM dias_do_evento(e.datainicio, e.datafim, e.recorrenciadias, e.recorrenciaintervalo,
+                                      e.recorrenciacontagem, e.recorrenciaexcecoes) AS d
+                  WHERE d BETWEEN atual.datainicio AND atual.datafim
+                )
+            );
+          ELSE
+            PERFORM pg_advisory_xact_lock(hashtext('eventos.local'), hashtext(atual.local));
+            conflito := EXISTS (
+              SELECT 1
+              FROM eventos e
+              WHERE
+                e.local = atual.local
+                AND e.id_evento <> atual.id_evento
+                AND daterange(e.datainicio, e.datafim, '[]') && daterange(atual.datainicio, atual.datafim, '[]')
+                AND EXISTS (
+                  SELECT 1
+                  FROM dias_do_evento(e.datainicio, e.datafim, e.recorrenciadias, e.recorrenciaintervalo,
+                                      e.recorrenciacontagem, e.recorrenciaexcecoes) AS d
+                  WHERE d IN (SELECT dias_do_evento(atual.datainicio, atual.datafim, atual.recorrenciadias,
+                                                    atual.recorrenciaintervalo, atual.recorrenciacontagem,
+                                                    atual.recorrenciaexcecoes))
+                )
+            );
+          END IF;
+
+          IF conflito THEN
+            RAISE EXCEPTION 'Conflito detectado: já existe um evento agendado nesse local e período.';
+          END IF;
+          RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        DROP TRIGGER IF EXISTS trigger_conflito_local_recorrente ON eventos;
+        CREATE CONSTRAINT TRIGGER trigger_conflito_local_recorrente
+        AFTER INSERT OR UPDATE OF local, datainicio, datafim, recorrenciadias, recorrenciaintervalo,
+                                  recorrenciacontagem, recorrenciaexcecoes ON eventos
+        DEFERRABLE INITIALLY DEFERRED
+        FOR EACH ROW
+        WHEN (NEW.local IS NOT NULL)
+        EXECUTE FUNCTION impedir_conflito_local_recorrente();
+    """)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("DROP TRIGGER IF EXISTS trigger_conflito_local_recorrente ON eventos")
+    op.execute("DROP FUNCTION IF EXISTS impedir_conflito_local_recorrente()")
+    # dias_do_evento fica: os contadores de 'flask init-advanced-features' também a usam
+    op.execute("DROP INDEX IF EXISTS ix_eventos_local_recorrentes")
+    op.execute("ALTER TABLE eventos DROP CONSTRAINT IF EXISTS excl_eventos_local_periodo")
+    op.execute("""
+        CREATE OR REPLACE FUNCTION impedir_conflito_local_eventos()
+        RETURNS TRIGGER AS $$
+        BEGIN
+          IF EXISTS (
+            SELECT 1
+            FROM eventos e
+            WHERE 
+              e.local IS NOT NULL
+              AND e.local = NEW.local
+              AND e.id_evento <> COALESCE(NEW.id_evento, -1)
+              AND e.datainicio <= NEW.datafim
+              AND e.datafim >= NEW.datainicio
+          ) THEN
+            RAISE EXCEPTION 'Conflito detectado: já existe um evento agendado nesse local e período.';
+          END IF;
+          RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+
+        CREATE TRIGGER trigger_impedir_conflito_local
+        BEFORE INSERT OR UPDATE ON eventos
+        FOR EACH ROW
+        EXECUTE FUNCTION impedir_conflito_local_eventos();
+    """)